@@ -1,4 +1,4 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 import pdfplumber
 import os
 import traceback
@@ -10,9 +10,25 @@ import re
 import difflib
 from openai import OpenAI
 from dotenv import load_dotenv
-import urllib.request
-import urllib.parse
+import httpx
 import json
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pdf_document import PdfDocument, parse_pdf_document, read_upload_bytes
+from result_cache import ResultCache, content_key
+from ocr import TesseractSlots, ocr_images
+from soil_tables import parse_range, parse_soil_table
+from job_store import JOB_DONE, JOB_FAILED, JOB_QUEUED, JobStore
+from upstream_comments import UpstreamCommentsClient
+from llm_resilience import CircuitBreaker, CircuitOpenError, LLMDeadlineExceeded, ResilientLLM
+from route_limits import RouteLimiter
+import soil_comments
+import soil_prompts
+import instrumentation
+from instrumentation import DEBUG_DUMPS, annotate, llm_call, metrics, stage
 
 load_dotenv()
 
@@ -36,10 +52,14 @@ if OPENAI_API_KEY:
                 del os.environ[key]
         
         # Create client with explicit httpx client to avoid proxy issues
-        import httpx
+        # Sized for threaded workers: every concurrent comment request (and each section of a
+        # batch request) holds one connection while it waits for the model
         http_client = httpx.Client(
             timeout=httpx.Timeout(30.0),
-            limits=httpx.Limits(max_keepalive_connections=5, max_connections=10)
+            limits=httpx.Limits(
+                max_keepalive_connections=int(os.environ.get('OPENAI_MAX_KEEPALIVE', 16)),
+                max_connections=int(os.environ.get('OPENAI_MAX_CONNECTIONS', 32)),
+            )
         )
         
         # Create client with explicit parameters only
@@ -55,41 +75,148 @@ if OPENAI_API_KEY:
 else:
     print("WARNING: OPENAI_API_KEY environment variable not set. AI features will be disabled.")
 
+
+def _section_deadlines(value):
+    """{section: seconds} from "cec=10,tae=20"."""
+    deadlines = {}
+    for item in value.split(','):
+        section, _, seconds = item.partition('=')
+        if section.strip() and seconds.strip():
+            deadlines[section.strip()] = float(seconds)
+    return deadlines
+
+
+# Every OpenAI call goes through `llm`: a deadline per call (LLM_DEADLINE, or the section's
+# entry in LLM_SECTION_DEADLINES), LLM_ATTEMPTS attempts with jittered backoff, an optional
+# hedged request once a call is slower than the LLM_HEDGE_PERCENTILE of recent calls, and
+# a circuit breaker that skips OpenAI for LLM_BREAKER_RESET seconds after
+# LLM_BREAKER_FAILURES failed calls in a row (soil sections then use the local renderers)
+LLM_DEADLINE = float(os.environ.get('LLM_DEADLINE', 25))
+LLM_SECTION_DEADLINES = _section_deadlines(os.environ.get('LLM_SECTION_DEADLINES', ''))
+llm = None
+if client:
+    llm = ResilientLLM(
+        client,
+        CircuitBreaker(int(os.environ.get('LLM_BREAKER_FAILURES', 5)),
+                       float(os.environ.get('LLM_BREAKER_RESET', 30))),
+        attempts=int(os.environ.get('LLM_ATTEMPTS', 2)),
+        retry_backoff=float(os.environ.get('LLM_RETRY_BACKOFF', 0.5)),
+        hedge_percentile=float(os.environ.get('LLM_HEDGE_PERCENTILE', 0)),
+        on_event=lambda event, **labels: metrics.inc(f'soil_llm_{event}_total', **labels))
+
 app = Flask(__name__)
 CORS(app)
+instrumentation.init_app(app)
+
+# Concurrent requests per worker and route group before new ones get a 429 (0 = no limit).
+# With threaded workers (gunicorn.conf.py) keep LLM + proxy below the thread count so
+# extraction uploads always find a free thread while comment requests wait on OpenAI.
+ROUTE_GROUPS = {
+    'llm': ('generate_comments', 'generate_soil_comments', 'generate_soil_comments_batch',
+            'generate_comments_stream', 'generate_soil_comments_stream'),
+    'proxy': ('proxy_get_ai_comments',),
+    'extract': ('extract_soil_report', 'extract_soil_reports_batch'),
+}
+route_limiter = RouteLimiter(ROUTE_GROUPS, {
+    'llm': int(os.environ.get('LLM_ROUTE_CONCURRENCY', 6)),
+    'proxy': int(os.environ.get('PROXY_ROUTE_CONCURRENCY', 4)),
+    'extract': int(os.environ.get('EXTRACT_ROUTE_CONCURRENCY', 0)),
+}, on_reject=lambda group: metrics.inc('soil_http_rejected_total', group=group))
+route_limiter.init_app(app)
 
 
-def extract_tables_with_pdfplumber(file):
+def extract_tables_with_pdfplumber(document):
+    if not isinstance(document, PdfDocument):
+        document = parse_pdf_document(document)
     tables = []
-    with pdfplumber.open(file) as pdf:
-        for page_num, page in enumerate(pdf.pages):
-            page_tables = page.extract_tables()
-            app.logger.info(f'Page {page_num + 1}: Found {len(page_tables)} tables')
-            for t_idx, table in enumerate(page_tables):
-                tables.append(table)
+    for page in document.pages:
+        page_tables = page.tables
+        app.logger.info(f'Page {page.number}: Found {len(page_tables)} tables')
+        for t_idx, table in enumerate(page_tables):
+            tables.append(table)
+            if DEBUG_DUMPS:
                 app.logger.info(f'Table {t_idx + 1} (first 3 rows): {table[:3]}')
     return tables
 
 
-def extract_text_with_ocr(file):
-    images = convert_from_bytes(file.read())
+# Pooled OCR: pages of one request are tesseracted concurrently (OCR_WORKERS), while
+# OCR_MAX_TESSERACT_PROCS caps tesseract processes across all workers on the host
+OCR_WORKERS = int(os.environ.get('OCR_WORKERS', 1))
+OCR_MAX_TESSERACT_PROCS = int(os.environ.get('OCR_MAX_TESSERACT_PROCS') or (os.cpu_count() or 1))
+# Pages with fewer non-blank characters of extractable text than this are treated as scanned
+OCR_MIN_PAGE_CHARS = int(os.environ.get('OCR_MIN_PAGE_CHARS', 20))
+ocr_slots = None
+if OCR_WORKERS > 1:
+    ocr_slots = TesseractSlots(OCR_MAX_TESSERACT_PROCS, os.environ.get('OCR_SLOT_DIR') or None)
+    # Concurrent tesseract processes should not each spin up a full OpenMP team
+    os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+
+
+def _page_runs(page_numbers):
+    """Group sorted page numbers into contiguous (first, last) runs."""
+    runs = []
+    for number in sorted(page_numbers):
+        if runs and runs[-1][1] == number - 1:
+            runs[-1][1] = number
+        else:
+            runs.append([number, number])
+    return runs
+
+
+def ocr_pdf_pages(document, page_numbers=None):
+    """Rasterize and OCR pages of the document, returning [(page_number, text)].
+
+    With page_numbers=None the whole document is OCR'd; otherwise only the
+    given pages are rasterized (pdf2image first_page/last_page per run).
+    """
+    data = document.data if isinstance(document, PdfDocument) else document.read()
+    if page_numbers is None:
+        images = convert_from_bytes(data)
+        numbers = list(range(1, len(images) + 1))
+    else:
+        images = []
+        numbers = []
+        for first, last in _page_runs(page_numbers):
+            images.extend(convert_from_bytes(data, first_page=first, last_page=last))
+            numbers.extend(range(first, last + 1))
+    texts = ocr_images(images, workers=OCR_WORKERS, slots=ocr_slots)
+    annotate(ocr_pages=len(numbers))
+    metrics.inc('soil_ocr_pages_total', len(numbers))
+    if DEBUG_DUMPS:
+        for number, text in zip(numbers, texts):
+            app.logger.info(f'OCR Page {number} text (first 300 chars): {text[:300]}')
+    return list(zip(numbers, texts))
+
+
+def extract_text_with_ocr(document):
     all_lines = []
-    for idx, image in enumerate(images):
-        text = pytesseract.image_to_string(image)
-        app.logger.info(f'OCR Page {idx + 1} text (first 300 chars): {text[:300]}')
+    for _, text in ocr_pdf_pages(document):
         lines = text.splitlines()
         all_lines.extend(lines)
     return all_lines
 
 
-def parse_range(val):
-    # Extract numbers from a string like "99 - 124 ppm" and return the midpoint
-    nums = re.findall(r'\d+\.?\d*', val)
-    if len(nums) == 2:
-        return (float(nums[0]) + float(nums[1])) / 2
-    elif len(nums) == 1:
-        return float(nums[0])
-    return None
+def pages_needing_ocr(document, analysed_pages):
+    """Pages without an analysis that have no (or only negligible) extractable text.
+
+    Text pages without tables are left alone: OCR would only re-read the text
+    pdfplumber already has.
+    """
+    return [page.number for page in document.pages
+            if page.number not in analysed_pages
+            and len(''.join((page.text or '').split())) < OCR_MIN_PAGE_CHARS]
+
+
+def ocr_analysis_info(text, name, page):
+    """Analysis info for OCR'd text, with the same keys as extract_analysis_info.
+
+    Each OCR line is scanned as a one-row table for the crop, date, location
+    and paddock labels.
+    """
+    rows = [[[line.strip()]] for line in text.splitlines() if line.strip()] or [[]]
+    info = TableMetadataIndex(rows).info(len(rows) - 1)
+    info.update(name=name, page=page)
+    return info
 
 
 # List of known nutrient names for matching
@@ -227,7 +354,7 @@ import pdfplumber
 import re
 from collections import defaultdict
 
-def extract_nutrient_overview(pdf_path):
+def extract_nutrient_overview(document):
 
     # Keys for the 7 nutrient points
     nutrient_keys = [
@@ -246,12 +373,9 @@ def extract_nutrient_overview(pdf_path):
         return found_keys
     
     # Combine all PDF pages into one text string
-    full_text = ""
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            page_text = page.extract_text()
-            if page_text:
-                full_text += page_text + "\n"
+    if not isinstance(document, PdfDocument):
+        document = parse_pdf_document(document)
+    full_text = document.text
 
     # Regex to capture lines like: "PADDOCK: <Any name>"
     paddock_pattern = r"PADDOCK:\s*(.+)"
@@ -317,1123 +441,873 @@ def extract_nutrient_overview(pdf_path):
 
     return results
 
-@app.route('/extract-soil-report', methods=['POST'])
-def extract_soil_report():
-    try:
-        if 'file' not in request.files:
-            app.logger.error('No file uploaded')
-            return jsonify({'error': 'No file uploaded'}), 400
-        file = request.files['file']
-        app.logger.info(f'Received file: {file.filename}')
-        file.seek(0)
-        tables = extract_tables_with_pdfplumber(file)
-        app.logger.info(f'Extracted {len(tables)} tables from PDF')
+def _default_page_workers():
+    # Leave a core per gunicorn worker: split the host's CPUs between them
+    web_workers = int(os.environ.get('WEB_CONCURRENCY', 3))
+    return max(1, (os.cpu_count() or 1) // max(1, web_workers))
+
+
+# Optional process-pool page parsing for large multi-paddock reports
+PDF_PARALLEL_PAGES = os.environ.get('PDF_PARALLEL_PAGES', '0') == '1'
+PDF_PAGE_WORKERS = int(os.environ.get('PDF_PAGE_WORKERS') or _default_page_workers())
+PDF_PARALLEL_MIN_PAGES = int(os.environ.get('PDF_PARALLEL_MIN_PAGES', 4))
+
+# Bump whenever a change to the extraction pipeline alters its output so cached results are not reused
+EXTRACTION_PARSER_VERSION = '2'
+
+# Complete /extract-soil-report responses keyed on the upload's content hash. Set
+# EXTRACTION_CACHE_DIR to share results between gunicorn workers on the host.
+extraction_cache = ResultCache(
+    max_entries=int(os.environ.get('EXTRACTION_CACHE_SIZE', 64)),
+    cache_dir=os.environ.get('EXTRACTION_CACHE_DIR') or None,
+    max_disk_entries=int(os.environ.get('EXTRACTION_CACHE_DISK_SIZE', 1000)),
+)
+
+
+def run_soil_extraction(file, progress=None):
+    """Run the full soil report extraction pipeline, returning (body, status).
+
+    progress, if given, is called as progress(fraction, message) between stages.
+    """
+    if progress:
+        progress(0.05, 'Parsing PDF')
+    # Parse the PDF once; tables, nutrient overview and OCR all read from it
+    on_page = None
+    if progress:
+        def on_page(done, total):
+            progress(0.05 + 0.45 * done / total, f'Parsed page {done} of {total}')
+    with stage('pdf_parse'):
+        document = parse_pdf_document(
+            file,
+            workers=PDF_PAGE_WORKERS if PDF_PARALLEL_PAGES else 0,
+            min_pages=PDF_PARALLEL_MIN_PAGES,
+            on_page=on_page)
+    annotate(pages=document.page_count)
+    if document.peak_rss is not None:
+        annotate(peak_rss_mib=round(document.peak_rss / 2**20, 1))
+        app.logger.info(f'Parsed {document.page_count} pages; peak RSS {document.peak_rss / 2**20:.1f} MiB')
+    if progress:
+        progress(0.5, 'Reading nutrient tables')
+    tables = extract_tables_with_pdfplumber(document)
+    app.logger.info(f'Extracted {len(tables)} tables from PDF')
+    if DEBUG_DUMPS:
         for idx, table in enumerate(tables):
             app.logger.info(f'Table {idx + 1} has {len(table)} rows')
-        file.seek(0)
-        
-        # Store all found analyses
-        all_analyses = []
-        analysis_id = 0
-        
-        # Try to extract nutrients from tables (text-based PDF)
-        if tables:
-            for table_idx, table in enumerate(tables):
-                if not table or len(table) < 2:
-                    continue
-                
-                first_row = table[0]
-                if len(first_row)<4: 
-                    continue
-
-                # Find header row and map columns
-                header_row = None
-                header_idx = 0
-                is_tae_table = False
-                for i, row in enumerate(table):
-                        
-                    if any(cell and isinstance(cell, str)
-                           and 'ELEMENT' in cell.upper() for cell in row):
-                        header_row = row
-                        header_idx = i
-                        app.logger.info(f'Element table detected! Row: {row}')
-                        break
-                    # Check if this is a TAE table
-                    for cell in row:
-                        if cell and isinstance(cell, str):
-                            if 'T.A.E.' in cell.upper() or 'T.A.E' in cell.upper():
-                                is_tae_table = True
-                                header_row = row
-                                header_idx = i
-                                app.logger.info(f'TAE table detected! Row: {row}')
-                                break
-                    if is_tae_table:
-                        break
-                        
-                if header_row:
-                    header_map = {}
-                    for idx, cell in enumerate(header_row):
-                        if not cell:
-                            continue
-                        cell_l = cell.strip().lower()
-                        if 'element' in cell_l or 'category' in cell_l:
-                            header_map['name'] = idx
-                        elif 'your level' in cell_l or 'level' in cell_l:
-                            header_map['current'] = idx
-                        elif 'acceptable range' in cell_l or 'range' in cell_l:
-                            header_map['ideal'] = idx
-                        elif 'unit' in cell_l:
-                            header_map['unit'] = idx
-                            
-                    app.logger.info(f'Detected header row: {header_row}')
-                    app.logger.info(f'Header mapping: {header_map}')
-                    
-                    # Parse data rows
-                    nutrients = []
-                    for row in table[header_idx + 1:]:
-                        if not row or len(row) < 2:
-                            continue
-                        # Extract the range string as shown in the PDF
-                        range_str = row[header_map['ideal']].strip(
-                        ) if 'ideal' in header_map and row[header_map['ideal']] else None
-                        # Parse the value as before
-
-                        def parse_value(val):
-                            if not val:
-                                return 0
-                            val_clean = re.sub(
-                                r'\s*(ppm|%|mg/kg|mS/cm)', '', val)
-                            if '<' in val_clean:
-                                return 0
-                            # Extract the first number from the string
-                            match = re.search(r'[-+]?\d*\.\d+|\d+', val_clean)
-                            if match:
-                                return float(match.group())
-                            return 0
-                        current = parse_value(
-                            row[header_map['current']]) if 'current' in header_map else None
-                        # For compatibility, keep 'ideal' as the midpoint if
-                        # possible
-                        ideal = None
-                        if range_str and '-' in range_str:
-                            try:
-                                parts = [float(re.sub(r'[^0-9.]+', '', p))
-                                         for p in range_str.split('-')]
-                                if len(parts) == 2:
-                                    ideal = sum(parts) / 2
-                            except Exception:
-                                ideal = None
-                        nutrient_row = {
-                            'name': row[header_map['name']].strip() if 'name' in header_map and row[header_map['name']] else '',
-                            'current': current,
-                            'ideal': ideal,
-                            'unit': '',
-                            'range': range_str,
-                            'category': 'tae' if is_tae_table else None
-                        }
-                        if is_tae_table:
-                            app.logger.info(f'TAE nutrient created: {nutrient_row}')
-                        # Try to extract unit from current value
-                        if row[header_map['current']
-                               ] and '%' in row[header_map['current']]:
-                            nutrient_row['unit'] = '%'
-                        elif row[header_map['current']] and 'ppm' in row[header_map['current']]:
-                            nutrient_row['unit'] = 'ppm'
-                        nutrients.append(nutrient_row)
-                        
-                    # If we found valid nutrients, add this as an analysis
-                    if nutrients:
-                        # Try to extract analysis info from the table
-                        analysis_info = extract_analysis_info(tables, table_idx)
-                        all_analyses.append({
-                            'id': analysis_id,
-                            'nutrients': nutrients,
-                            'info': analysis_info
-                        })
-                        analysis_id += 1
-                        
-                else:
-                    # Fallback: try to extract from all rows with at least 2
-                    # columns
-                    app.logger.warning(
-                        'No header row detected, using fallback extraction for this table.')
-                    nutrients = []
-                    for row in table:
-                        if not row or len(row) < 2:
-                            continue
-                        name = row[0].strip() if row[0] else ''
-                        current_raw = row[1].strip() if row[1] else ''
-                        ideal_raw = row[2].strip() if len(
-                            row) > 2 and row[2] else ''
-                        # Skip empty names and header rows
-                        if not name or 'ELEMENT' in name or 'CATEGORY' in name:
-                            continue
-                        unit = ''
-                        if 'ppm' in current_raw or 'ppm' in ideal_raw:
-                            unit = 'ppm'
-                        elif '%' in current_raw or '%' in ideal_raw:
-                            unit = '%'
-
-                        def parse_value(val):
-                            if not val:
-                                return 0
-                            # Remove unit from value
-                            val_clean = re.sub(
-                                r'\s*(ppm|%|mg/kg|mS/cm)', '', val)
-                            if '<' in val_clean:
-                                return 0
-                            # Extract the first number from the string
-                            match = re.search(r'[-+]?\d*\.\d+|\d+', val_clean)
-                            if match:
-                                return float(match.group())
-                            return 0
-                        current = parse_value(current_raw)
-                        ideal = parse_range(ideal_raw)
-                        
-                        # Check if this table contains TAE data by looking at the table content FIRST
-                        is_tae_table = False
-                        for table_row in table:
-                            for cell in table_row:
-                                if cell and isinstance(cell, str):
-                                    if 'T.A.E.' in cell.upper() or 'T.A.E' in cell.upper():
-                                        is_tae_table = True
-                                        app.logger.info(f'TAE table detected in fallback! Row: {table_row}')
-                                        break
-                            if is_tae_table:
-                                break
-                        
-                        # PATCH: Always include base saturation nutrients with % unit, even if ideal is missing
-                        # BUT only if this is NOT a TAE table
-                        base_sat_names = ['Calcium', 'Magnesium', 'Potassium', 'Sodium', 'Aluminum', 'Hydrogen', 'Other Bases']
-                        if name in base_sat_names and unit == '%' and not is_tae_table:
-                            nutrient_row = {
-                                'name': name,
-                                'current': current,
-                                'ideal': ideal if ideal is not None else None,
-                                'unit': unit
-                            }
-                            app.logger.info(
-                                f'Base saturation PATCH: {nutrient_row}')
-                            nutrients.append(nutrient_row)
-                            continue
-                        elif name in base_sat_names and unit == '%' and is_tae_table:
-                            app.logger.info(f'Skipping base saturation logic for TAE nutrient: {name} (unit: {unit})')
-                        # Only add if we have a valid name and some data
-                        if name and (current > 0 or ideal is not None):
-                            nutrient_row = {
-                                'name': name,
-                                'current': current,
-                                'ideal': ideal,
-                                'unit': unit,
-                                'category': 'tae' if is_tae_table else None
-                            }
-                            if is_tae_table:
-                                app.logger.info(f'TAE nutrient being added: {nutrient_row}')
-                            else:
-                                app.logger.info(f'Fallback parsed nutrient row: {nutrient_row}')
-                            nutrients.append(nutrient_row)
-                            
-                    # If we found valid nutrients, add this as an analysis
-                    if nutrients:
-                        analysis_info = extract_analysis_info(tables, table_idx)
-                        all_analyses.append({
-                            'id': analysis_id,
-                            'nutrients': nutrients,
-                            'info': analysis_info
-                        })
-                        analysis_id += 1
-
-        # If no tables found, try OCR
-        if not all_analyses:
-            app.logger.warning('No tables found with pdfplumber, trying OCR...')
-            file.seek(0)
-            ocr_lines = extract_text_with_ocr(file)
+    
+    # Store all found analyses
+    all_analyses = []
+    analysis_id = 0
+    # Page each flattened table came from, and the pages that yielded an analysis
+    table_pages = [page.number for page in document.pages for _ in page.tables]
+    analysed_pages = set()
+    with stage('analysis_info'):
+        metadata_index = TableMetadataIndex(tables)
+    
+    # Try to extract nutrients from tables (text-based PDF); each table's kind is
+    # classified once and its rows parsed with precompiled patterns
+    for table_idx, table in enumerate(tables):
+        with stage('tables'):
+            nutrients = parse_soil_table(table, app.logger if DEBUG_DUMPS else None)
+        # If we found valid nutrients, add this as an analysis
+        if nutrients:
+            # Try to extract analysis info from the table
+            with stage('analysis_info'):
+                analysis_info = extract_analysis_info(tables, table_idx, metadata_index)
+            all_analyses.append({
+                'id': analysis_id,
+                'nutrients': nutrients,
+                'info': analysis_info
+            })
+            analysis_id += 1
+            analysed_pages.add(table_pages[table_idx])
+
+    # Mixed reports: OCR only the scanned pages the table parse could not read
+    if all_analyses:
+        ocr_page_numbers = pages_needing_ocr(document, analysed_pages)
+        if ocr_page_numbers:
+            if progress:
+                progress(0.6, f'Running OCR on {len(ocr_page_numbers)} pages')
+            app.logger.info(f'OCR for pages without extractable text: {ocr_page_numbers}')
+            metrics.inc('soil_ocr_fallbacks_total', scope='pages')
+            try:
+                with stage('ocr'):
+                    ocr_results = ocr_pdf_pages(document, ocr_page_numbers)
+            except Exception as e:
+                # Table analyses are still valid; report them rather than failing the upload
+                app.logger.warning(f'Per-page OCR failed, keeping table analyses only: {e}')
+                ocr_results = []
+            for page_number, text in ocr_results:
+                page_nutrients = extract_nutrients_from_text(text)
+                if page_nutrients:
+                    all_analyses.append({
+                        'id': analysis_id,
+                        'nutrients': page_nutrients,
+                        'info': ocr_analysis_info(text, f'OCR Analysis (page {page_number})', page_number)
+                    })
+                    analysis_id += 1
+
+    # If no tables found, OCR the whole document
+    if not all_analyses:
+        app.logger.warning('No tables found with pdfplumber, trying OCR...')
+        metrics.inc('soil_ocr_fallbacks_total', scope='document')
+        if progress:
+            progress(0.6, 'Running OCR')
+        with stage('ocr'):
+            ocr_lines = extract_text_with_ocr(document)
+        if DEBUG_DUMPS:
             app.logger.info(
                 "Original OCR lines for debug:\n" +
                 "\n".join(ocr_lines))
-            ocr_text = '\n'.join(ocr_lines)
-            nutrients_by_image_order = extract_nutrients_from_text(ocr_text)
-            if nutrients_by_image_order:
+        ocr_text = '\n'.join(ocr_lines)
+        nutrients_by_image_order = extract_nutrients_from_text(ocr_text)
+        if nutrients_by_image_order:
+            if DEBUG_DUMPS:
                 app.logger.info(
                     f'Final nutrients array (by image order): {nutrients_by_image_order}')
-                all_analyses.append({
-                    'id': 0,
-                    'nutrients': nutrients_by_image_order,
-                    'info': {'name': 'OCR Analysis', 'page': 1}
-                })
-
-        # Return all analyses found
-        if all_analyses:
-            app.logger.info(f'Found {len(all_analyses)} analyses in PDF')
-
-            # Build LaMotte/Reams candidates and deterministic selection from ALL analyses
-            import re as _re
-            flat_nutrients = []
-            for a in all_analyses:
-                flat_nutrients.extend(a.get('nutrients', []))
-
-            def _base_name(nm: str) -> str:
-                if not isinstance(nm, str):
-                    return ''
-                nm_clean = nm.strip()
-                nm_clean = _re.split(r"\s*\(", nm_clean)[0].strip()
-                low = nm_clean.lower()
-                if low.startswith('calcium'):
-                    return 'Calcium'
-                if low.startswith('magnesium'):
-                    return 'Magnesium'
-                if low.startswith('phosphorus'):
-                    return 'Phosphorus'
-                if low.startswith('potassium'):
-                    return 'Potassium'
-                return nm_clean
-
-            def _norm_num(val):
-                try:
-                    if isinstance(val, (int, float)):
-                        return float(val)
-                    if isinstance(val, str):
-                        m = _re.search(r"-?\d*\.?\d+", val.replace(',', ''))
-                        return float(m.group()) if m else float('nan')
-                except Exception:
-                    return float('nan')
-                return float('nan')
-
-            def _approx(a, b, tol=0.6):
-                try:
-                    return abs(float(a) - float(b)) <= tol
-                except Exception:
-                    return False
-
-            # Candidates: Ca/Mg/K/P ppm rows, exclude Mehlich and explicit TAE category
-            lamotte_candidates = []
-            for n in flat_nutrients:
-                name = n.get('name', '') or ''
-                unit = (n.get('unit') or '').lower()
-                cat = n.get('category')
-                if unit != 'ppm':
-                    continue
-                if '(mehlich' in name.lower():
-                    continue
-                if cat == 'tae':
-                    continue
-                b = _base_name(name)
-                if b in ['Calcium', 'Magnesium', 'Phosphorus', 'Potassium']:
-                    lamotte_candidates.append({
-                        'name': b,
-                        'current': n.get('current'),
-                        'ideal': n.get('ideal'),
-                        'unit': n.get('unit'),
-                        'raw_name': name,
-                        'category': cat,
-                    })
-
-            # Deterministic selection by ideal values; fallback to ordinal occurrences if needed
-            ideals = {'Phosphorus': 18.5, 'Calcium': 1500.0, 'Magnesium': 212.5, 'Potassium': 90.0}
-            selected_map = {}
-            for elem, target in ideals.items():
-                hits = [c for c in lamotte_candidates if c['name'] == elem and _approx(_norm_num(c.get('ideal')), target, 0.6)]
-                if hits:
-                    selected_map[elem] = hits[0]
-                else:
-                    # ordinal fallback from flat order
-                    occ = [n for n in flat_nutrients if _base_name(n.get('name', '')) == elem and (n.get('unit') or '').lower() == 'ppm']
-                    idx = 1 if elem == 'Phosphorus' else 2
-                    sel = occ[idx] if len(occ) > idx else (occ[-1] if occ else None)
-                    if sel:
-                        selected_map[elem] = {
-                            'name': elem,
-                            'current': sel.get('current'),
-                            'ideal': sel.get('ideal'),
-                            'unit': sel.get('unit'),
-                            'raw_name': sel.get('name'),
-                            'category': sel.get('category'),
-                        }
-
-            lamotte_payload = {
-                'candidates': lamotte_candidates,
-                'selected': [selected_map.get('Phosphorus'), selected_map.get('Calcium'), selected_map.get('Magnesium'), selected_map.get('Potassium')]
-            }
-
-            nutrient_overview = extract_nutrient_overview(file)
-            return jsonify({
-                'analyses': all_analyses,
-                'count': len(all_analyses),
-                'lamotte': lamotte_payload,
-                "nutrient_overview": nutrient_overview
+            all_analyses.append({
+                'id': 0,
+                'nutrients': nutrients_by_image_order,
+                'info': ocr_analysis_info(ocr_text, 'OCR Analysis', 1)
             })
 
-        app.logger.warning(
-            'No nutrients extracted from PDF (neither tables nor OCR).')
-        return jsonify(
-            {'error': 'No nutrients extracted from PDF (neither tables nor OCR).'}), 400
-    except Exception as e:
-        app.logger.error('Exception during PDF extraction: ' + str(e))
-        traceback.print_exc()
-        return jsonify(
-            {'error': 'Exception during PDF extraction', 'details': str(e)}), 500
-
-
-def extract_analysis_info(tables, table_idx):
-    """Extract analysis information from all tables up to and including the current one (to catch header metadata)"""
-    import re
-    from datetime import datetime
-    info = {
-        'name': f'Analysis {table_idx + 1}',
-        'page': table_idx + 1,
-        'crop': 'Unknown',
-        'location': 'Unknown',
-        'date': 'Unknown',
-        'paddock': 'Unknown'
-    }
-    date_pattern = re.compile(r"\d{2}/\d{2}/\d{4}")
-    
-    # First, try to extract from the table immediately before the nutrient table
-    if table_idx > 0:
-        prev_table = tables[table_idx - 1]
-        if 3 <= len(prev_table) <= 4:
-            rows = [row[0] if row and isinstance(row[0], str) else '' for row in prev_table]
-            rows = [r.strip() for r in rows if r and r.strip()]
-            if len(rows) >= 2:
-                # First row: crop
-                if not date_pattern.match(rows[0]):
-                    info['crop'] = rows[0]
-                # Second row: paddock (if not a date and not a known crop)
-                if len(rows) > 1 and info['paddock'] == "Unknown":
-                    if not date_pattern.match(rows[1]) and rows[1] != info['crop']:
-                        info['paddock'] = rows[1]
-                # Third row: date
-                if len(rows) > 2:
-                    if date_pattern.match(rows[2]):
-                        info['date'] = rows[2]
-    
-    # Scan all tables from the start up to and including the current table for any missing info
-    for idx in range(0, table_idx + 1):
-        if idx < 0 or idx >= len(tables):
-            continue
-        table = tables[idx]
-        # Heuristic: If table has 2-4 rows, try to extract missing info
-        if 3 <= len(table) <= 4:
-            rows = [row[0] if row and isinstance(row[0], str) else '' for row in table]
-            rows = [r.strip() for r in rows if r and r.strip()]
-            if len(rows) >= 2:
-                # First row: crop (if not already found)
-                if info['crop'] == 'Unknown' and not date_pattern.match(rows[0]):
-                    info['crop'] = rows[0]
-                # Second row: paddock (if not already found and not a date and not a known crop)
-                if info['paddock'] == 'Unknown' and len(rows) > 1:
-                    if not date_pattern.match(rows[1]) and rows[1] != info['crop']:
-                        info['paddock'] = rows[1]
-                # Third row: date (if not already found)
-                if info['date'] == 'Unknown' and len(rows) > 2:
-                    if date_pattern.match(rows[2]):
-                        info['date'] = rows[2]
-        # Also check for explicit PADDOCK: lines as fallback
-        for row in table:
-            if not row:
-                continue
-            row_text = ' '.join([str(cell) for cell in row if cell])
-            paddock_match = re.search(r"PADDOCK:?\s*([\w\-\s]+)", row_text, re.IGNORECASE)
-            if paddock_match:
-                paddock_val = paddock_match.group(1).strip()
-                if paddock_val:
-                    info['paddock'] = paddock_val
-                    print(f"Extracted paddock (explicit): {info['paddock']} from row: {row_text}")
-            # Crop
-            if info['crop'] == 'Unknown':
-                crop_match = re.search(r"CROP:?\s*([\w\-\s]+)", row_text, re.IGNORECASE)
-                if crop_match:
-                    crop_val = crop_match.group(1).strip()
-                    if crop_val:
-                        info['crop'] = crop_val
-            # Date
-            if info['date'] == 'Unknown':
-                date_match = date_pattern.search(row_text)
-                if date_match:
-                    info['date'] = date_match.group(0)
-            # Location
-            if info['location'] == 'Unknown':
-                loc_match = re.search(r"LOCATION:?\s*([\w\-\s]+)", row_text, re.IGNORECASE)
-                if loc_match:
-                    loc_val = loc_match.group(1).strip()
-                    if loc_val:
-                        info['location'] = loc_val
-    print(f"Final extracted info for analysis {table_idx + 1}: {info}")
-    return info
-
-
-@app.route('/generate-comments', methods=['POST'])
-def generate_comments():
-    try:
-        if not client:
-            return jsonify({'error': 'OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.'}), 500
-            
-        data = request.get_json()
-        deficient = data.get('deficient', [])
-        optimal = data.get('optimal', [])
-        excess = data.get('excess', [])
-
-        # Enhanced prompt for more detailed and professional response
-        prompt = f"""
-As a professional plant nutritionist and agronomist, provide a BRIEF executive summary for a Plant Therapy Report based on the following nutrient analysis:
-
-DEFICIENT NUTRIENTS: {', '.join(deficient) if deficient else 'None'}
-OPTIMAL NUTRIENTS: {', '.join(optimal) if optimal else 'None'}
-EXCESS NUTRIENTS: {', '.join(excess) if excess else 'None'}
-
-Provide a complete executive summary (2-3 sentences) that gives a brief overview of the plant's nutritional status. Make sure to complete your thoughts and provide a full summary. Do NOT include detailed nutrient descriptions, specific functions, or management recommendations. Keep it brief and professional.
-
-IMPORTANT: When mentioning nutrients, use the format "Full Name (Abbreviation)" - for example: Nitrogen (N), Phosphorus (P), Calcium (Ca), Magnesium (Mg), Potassium (K), Boron (B), Copper (Cu), Zinc (Zn), Iron (Fe), Manganese (Mn), Molybdenum (Mo), Sulphur (S), Sodium (Na).
-
-Focus on:
-- Brief overview of nutritional status
-- Professional tone
-- Complete sentences and thoughts
-- No detailed nutrient analysis
-- Use bold formatting for nutrient names
-"""
-
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=600,
-            temperature=0.7
-        )
-        summary = response.choices[0].message.content.strip()
-
-        # Remove any detailed nutrient descriptions that might still be generated
-        import re
-        # Remove any text that contains detailed nutrient descriptions
-        cleaned = re.sub(r"(Nitrogen is essential for.*?)(?=\n\n|\n[A-Z]|$)", "", summary, flags=re.DOTALL)
-        cleaned = re.sub(r"(Phosphorus is necessary for.*?)(?=\n\n|\n[A-Z]|$)", "", cleaned, flags=re.DOTALL)
-        cleaned = re.sub(r"(Calcium is vital for.*?)(?=\n\n|\n[A-Z]|$)", "", cleaned, flags=re.DOTALL)
-        cleaned = re.sub(r"(Magnesium is a key component.*?)(?=\n\n|\n[A-Z]|$)", "", cleaned, flags=re.DOTALL)
-        cleaned = re.sub(r"(Copper, Zinc, Iron, and Boron.*?)(?=\n\n|\n[A-Z]|$)", "", cleaned, flags=re.DOTALL)
-        cleaned = re.sub(r"(The excess of.*?)(?=\n\n|\n[A-Z]|$)", "", cleaned, flags=re.DOTALL)
-        cleaned = re.sub(r"(To address these deficiencies.*?)(?=\n\n|\n[A-Z]|$)", "", cleaned, flags=re.DOTALL)
-        cleaned = re.sub(r"(With proper management.*?)(?=\n\n|\n[A-Z]|$)", "", cleaned, flags=re.DOTALL)
-        # Remove any extra blank lines
-        cleaned = re.sub(r"\n{3,}", "\n\n", cleaned)
-        return jsonify({'summary': cleaned.strip()})
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
-
-
-@app.route('/generate-soil-comments', methods=['POST'])
-def generate_soil_comments():
-    try:
-        if not client:
-            return jsonify({'error': 'OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.'}), 500
-            
-        data = request.get_json()
-        section = data.get('section', '')
-        
-        # Check if data is in statusCategories format (from frontend)
-        status_categories = data.get('statusCategories', {})
-        if status_categories:
-            deficient = status_categories.get('deficient', [])
-            marginallyDeficient = status_categories.get('marginallyDeficient', [])
-            optimal = status_categories.get('optimal', [])
-            marginallyExcessive = status_categories.get('marginallyExcessive', [])
-            excess = status_categories.get('excess', [])
-        else:
-            # Fallback to direct format
-            deficient = data.get('deficient', [])
-            marginallyDeficient = data.get('marginallyDeficient', [])
-            optimal = data.get('optimal', [])
-            marginallyExcessive = data.get('marginallyExcessive', [])
-            excess = data.get('excess', [])
-            
-        nutrients_data = data.get('nutrients', [])
-
-        # Normalize and scope nutrients per section when needed
-        nutrients_data_clean = nutrients_data
-
-        # Short-circuit organic matter to a deterministic, single-category response
-        if section == 'organicMatter':
-            def _has_om(name_list):
-                return any(isinstance(nm, str) and 'organic matter' in nm.lower() for nm in name_list or [])
-
-            if _has_om(excess):
-                category = 'Excessive'
-                impact = ('Very high organic matter increases moisture retention and can promote nitrogen immobilization, ' \
-                          'leading to slower mineral nitrogen release, cooler/wetter seedbeds, and reduced early vigor. ' \
-                          'It may also elevate biological oxygen demand, limiting aeration and root respiration in fine-textured or compacted soils.')
-                rec = ('Reduce additional organic inputs temporarily and prioritize mineral balance, structure, and aeration. ' \
-                       'Use shallow strategic cultivation, controlled traffic, and, where appropriate, calcium sources (e.g., gypsum) to improve flocculation and infiltration. ' \
-                       'Monitor mineral N supply closely during early growth stages and adjust starter programs accordingly.')
-            elif _has_om(marginallyExcessive):
-                category = 'Marginally excessive'
-                impact = ('Slightly elevated organic matter enhances water-holding capacity but can marginally increase N tie-up in cool or wet conditions, ' \
-                          'and may slow soil warming in early spring.')
-                rec = ('Moderate fresh organic inputs, maintain residue cover without overloading, and balance with readily available nitrogen when conditions are cool. ' \
-                       'Keep soil structure open through surface residue management and periodic calcium additions if sodicity/dispersion is present.')
-            elif _has_om(optimal):
-                category = 'Optimal'
-                impact = ('Organic matter at optimal levels supports nutrient cycling, microbial activity, stable aggregation, and resilient water dynamics, ' \
-                          'reducing compaction risk and improving root exploration and nutrient uptake.')
-                rec = ('Maintain current practices: return residues, diversify rotations, include cover crops where feasible, and apply quality composts/manures at maintenance rates. ' \
-                       'Avoid unnecessary tillage to preserve aggregates and biological habitat.')
-            elif _has_om(marginallyDeficient):
-                category = 'Marginally deficient'
-                impact = ('Slightly low organic matter reduces cation exchange capacity and microbial activity, ' \
-                          'lowering nutrient retention and shortening moisture availability between rain/irrigation events.')
-                rec = ('Increase organic inputs using cover crops (legume/grass mixes), high-quality composts, and manures; ' \
-                       'minimize disturbance and keep living roots in the system as much as possible to build carbon incrementally.')
-            elif _has_om(deficient):
-                category = 'Deficient'
-                impact = ('Low organic matter severely limits nutrient holding capacity, aggregate stability, and water retention, ' \
-                          'increasing susceptibility to crusting, compaction, drought stress, and nutrient loss.')
-                rec = ('Adopt a multi-year rebuild plan: intensive cover-cropping (include legumes where N is needed), strategic manure/compost additions, residue retention, ' \
-                       'and reduced tillage. Pair with balanced mineral nutrition to support biology and accelerate carbon accrual.')
-            else:
-                category = 'Unknown'
-                impact = 'Insufficient data to assess organic matter status.'
-                rec = 'Confirm measurements and targets to enable a clear recommendation.'
-
-            intro = "Organic matter represents the decomposed plant and animal materials in the soil, critical for soil health and fertility."
-            cat_sentence = (category.lower() if isinstance(category, str) else 'unclear')
-            status_line = f"The levels are {cat_sentence}."
-            return jsonify({'summary': f"{intro} {status_line} {impact} {rec}"})
-        debug_lines_with_categories = None
-        if section == 'availableNutrients':
+    # Return all analyses found
+    if all_analyses:
+        app.logger.info(f'Found {len(all_analyses)} analyses in PDF')
+
+        # Build LaMotte/Reams candidates and deterministic selection from ALL analyses
+        import re as _re
+        flat_nutrients = []
+        for a in all_analyses:
+            flat_nutrients.extend(a.get('nutrients', []))
+
+        def _base_name(nm: str) -> str:
+            if not isinstance(nm, str):
+                return ''
+            nm_clean = nm.strip()
+            nm_clean = _re.split(r"\s*\(", nm_clean)[0].strip()
+            low = nm_clean.lower()
+            if low.startswith('calcium'):
+                return 'Calcium'
+            if low.startswith('magnesium'):
+                return 'Magnesium'
+            if low.startswith('phosphorus'):
+                return 'Phosphorus'
+            if low.startswith('potassium'):
+                return 'Potassium'
+            return nm_clean
+
+        def _norm_num(val):
             try:
-                seen_keys = set()
-                cleaned_list = []
-                for n in nutrients_data:
-                    # Exclude TAE nutrients from available nutrient analysis
-                    if str(n.get('category', '')).lower() == 'tae':
-                        continue
-                    name = str(n.get('name', '')).strip()
-                    # Normalize Aluminium spelling
-                    if name.lower() in ['aluminum', 'aluminium']:
-                        name = 'Aluminium'
-                    # Build a dedupe key without extraction method tags and underscores
-                    import re as _re
-                    base_name = _re.sub(r"\s*\([^)]*\)", '', name).replace('_', ' ').strip().lower()
-                    if base_name in seen_keys:
-                        continue
-                    n_copy = dict(n)
-                    n_copy['name'] = name
-                    cleaned_list.append(n_copy)
-                    seen_keys.add(base_name)
-                nutrients_data_clean = cleaned_list
-
-                # Build category lookup using normalized names from provided classification arrays
-                def _norm(nm: str) -> str:
-                    nm = (nm or '').strip()
-                    nm = _re.sub(r"\s*\([^)]*\)", '', nm)  # strip parenthetical tags
-                    nm = nm.replace('_', ' ')  # unify underscores
-                    if nm.lower() in ['aluminum', 'aluminium']:
-                        nm = 'Aluminium'
-                    return nm.strip().lower()
-
-                cat_map = {}
-                for nm in deficient:
-                    cat_map[_norm(nm)] = 'Deficient'
-                for nm in marginallyDeficient:
-                    cat_map[_norm(nm)] = 'Marginally deficient'
-                for nm in optimal:
-                    cat_map[_norm(nm)] = 'Optimal'
-                for nm in marginallyExcessive:
-                    cat_map[_norm(nm)] = 'Marginally excessive'
-                for nm in excess:
-                    cat_map[_norm(nm)] = 'Excessive'
-
-                # Build debug lines with categories
-                debug_lines = []
-                for n in nutrients_data_clean:
-                    nm = n.get('name', 'Unknown')
-                    key = _norm(nm)
-                    category = cat_map.get(key, 'Unclassified')
-                    debug_lines.append(f"- {nm}: {n.get('current', 'N/A')} {n.get('unit', '')} (Ideal: {n.get('ideal', 'N/A')} {n.get('unit', '')}) — Category: {category}")
-                debug_lines_with_categories = "\n".join(debug_lines)
+                if isinstance(val, (int, float)):
+                    return float(val)
+                if isinstance(val, str):
+                    m = _re.search(r"-?\d*\.?\d+", val.replace(',', ''))
+                    return float(m.group()) if m else float('nan')
             except Exception:
-                nutrients_data_clean = nutrients_data
-        
-        # Deterministic renderer for Available Nutrients to avoid LLM misclassification
-        if section == 'availableNutrients':
-            import re as _re
-            def _clean_name(nm: str) -> str:
-                if not nm:
-                    return 'Unknown'
-                base = nm.strip()
-                # Preserve Nitrate-N and Ammonium-N labels exactly
-                if base.lower().startswith('nitrate-n'):
-                    return 'Nitrate-N'
-                if base.lower().startswith('ammonium-n'):
-                    return 'Ammonium-N'
-                # Normalize Aluminum/Aluminium spelling
-                if base.lower().startswith('aluminum') or base.lower().startswith('aluminium'):
-                    return 'Aluminium'
-                # Strip extraction tags like (Mehlich III), (DTPA), (KCl), (CaCl2)
-                base = _re.sub(r"\s*\([^)]*\)", '', base)
-                # Replace underscores with spaces
-                base = base.replace('_', ' ').strip()
-                return base
-
-            def _sort(lst):
-                return sorted(lst, key=lambda x: x.lower())
-
-            def _fmt_list(lst):
-                if not lst:
-                    return ''
-                if len(lst) == 1:
-                    return lst[0]
-                return ", ".join(lst[:-1]) + f" and {lst[-1]}"
-
-            # Build normalized category lists from incoming status categories
-            cat_inputs = {
-                'Deficient': deficient or [],
-                'Marginally deficient': marginallyDeficient or [],
-                'Optimal': optimal or [],
-                'Marginally excessive': marginallyExcessive or [],
-                'Excessive': excess or [],
-            }
-            # Normalize, dedupe, and apply Aluminium rule (only mention in Excessive)
-            cats_norm = {k: [] for k in cat_inputs}
-            seen = set()
-            for cat, items in cat_inputs.items():
-                for nm in items:
-                    clean = _clean_name(nm)
-                    # Aluminium only if Excessive
-                    if clean == 'Aluminium' and cat != 'Excessive':
-                        continue
-                    key = (clean, cat)
-                    if key in seen:
-                        continue
-                    cats_norm[cat].append(clean)
-                    seen.add(key)
-
-            # Ensure no nutrient appears in more than one category (prefer stricter order: Excessive > Marginally excessive > Optimal > Marginally deficient > Deficient)
-            precedence = ['Excessive', 'Marginally excessive', 'Optimal', 'Marginally deficient', 'Deficient']
-            assigned = {}
-            for cat in precedence:
-                new_list = []
-                for nm in cats_norm[cat]:
-                    if nm not in assigned:
-                        assigned[nm] = cat
-                        new_list.append(nm)
-                cats_norm[cat] = new_list
-
-            # Sort each category alphabetically
-            for cat in cats_norm:
-                cats_norm[cat] = _sort(cats_norm[cat])
-
-            # Narrative rendering mirroring TAE style
-            sentences = []
-            if cats_norm['Deficient'] or cats_norm['Marginally deficient']:
-                segs = []
-                if cats_norm['Deficient']:
-                    segs.append(f"deficiencies in {_fmt_list(cats_norm['Deficient'])}")
-                if cats_norm['Marginally deficient']:
-                    segs.append(f"{'a marginal deficiency' if len(cats_norm['Marginally deficient'])==1 else 'marginal deficiencies'} in {_fmt_list(cats_norm['Marginally deficient'])}")
-                if len(segs) == 2:
-                    sentences.append(f"Currently, the soil analysis reveals {segs[0]}, while {segs[1]}.")
-                else:
-                    sentences.append(f"Currently, the soil analysis reveals {segs[0]}.")
-
-            if cats_norm['Optimal']:
-                sentences.append(f"Optimal levels are observed for {_fmt_list(cats_norm['Optimal'])}, supporting balanced nutrient availability.")
-
-            if cats_norm['Marginally excessive'] or cats_norm['Excessive']:
-                parts = []
-                if cats_norm['Marginally excessive']:
-                    parts.append(f"{'a marginal excess' if len(cats_norm['Marginally excessive'])==1 else 'marginal excesses'} in {_fmt_list(cats_norm['Marginally excessive'])}")
-                if cats_norm['Excessive']:
-                    parts.append(f"{'an excessive level' if len(cats_norm['Excessive'])==1 else 'excessive levels'} of {_fmt_list(cats_norm['Excessive'])}")
-                if len(parts) == 2:
-                    sentences.append(f"Additionally, {parts[0]}, whereas {parts[1]} may affect nutrient balance and crop performance.")
-                else:
-                    sentences.append(f"Additionally, {parts[0]} may affect nutrient balance and crop performance.")
-
-            intro = "Available nutrients are the plant-available forms of essential nutrients that can be immediately taken up by plant roots, crucial for plant nutrition and growth."
-            full = f"{intro} {' '.join(sentences)}".replace("  ", " ").strip()
-            return jsonify({'summary': full})
-
-        # Precompute selection for Lamotte/Reams by ordinal occurrence so the AI doesn't mis-pick
-        selected_block = ""
-        if section == 'lamotteReams':
-            import re as _re
-            def _base_name(nm: str) -> str:
-                if not isinstance(nm, str):
-                    return ''
-                nm_clean = nm.replace('_', ' ').strip()
-                nm_clean = _re.split(r"\s*\(", nm_clean)[0].strip()
-                low = nm_clean.lower()
-                if low.startswith('calcium'):
-                    return 'Calcium'
-                if low.startswith('magnesium'):
-                    return 'Magnesium'
-                if low.startswith('phosphorus'):
-                    return 'Phosphorus'
-                if low.startswith('potassium'):
-                    return 'Potassium'
-                return nm_clean
-            # Gather occurrences in order of appearance
-            occ = { 'Phosphorus': [], 'Calcium': [], 'Magnesium': [], 'Potassium': [] }
-            for n in nutrients_data:
-                b = _base_name(n.get('name', ''))
-                if b in occ:
-                    occ[b].append(n)
-            def _fmt(n):
-                if not n:
-                    return 'N/A'
-                cur = n.get('current', 'N/A')
-                unit = n.get('unit', '')
-                ideal = n.get('ideal', 'N/A')
-                unit_sfx = f" {unit}" if unit else ''
-                ideal_unit_sfx = f" {unit}" if unit else ''
-                return f"{cur}{unit_sfx} (Ideal: {ideal}{ideal_unit_sfx})"
-            selP = occ['Phosphorus'][1] if len(occ['Phosphorus']) >= 2 else (occ['Phosphorus'][-1] if occ['Phosphorus'] else None)
-            selCa = occ['Calcium'][2] if len(occ['Calcium']) >= 3 else (occ['Calcium'][-1] if occ['Calcium'] else None)
-            selMg = occ['Magnesium'][2] if len(occ['Magnesium']) >= 3 else (occ['Magnesium'][-1] if occ['Magnesium'] else None)
-            selK = occ['Potassium'][2] if len(occ['Potassium']) >= 3 else (occ['Potassium'][-1] if occ['Potassium'] else None)
-            selected_block = (
-                f"SELECTED ENTRIES (use these exactly): "
-                f"Phosphorus = {_fmt(selP)}; "
-                f"Calcium = {_fmt(selCa)}; "
-                f"Magnesium = {_fmt(selMg)}; "
-                f"Potassium = {_fmt(selK)}."
-            )
-            print("DEBUG - Lamotte selected by ordinal:", selected_block)
-
-        # Create section-specific prompts
-        section_prompts = {
-            'organicMatter': f"""
-As a professional soil scientist and agronomist, provide a BRIEF analysis of the soil's organic matter status for a Soil Therapy Report.
-
-ORGANIC MATTER DATA: {', '.join([
-    f"{n.get('name', 'Unknown')}: {n.get('current', 'N/A')} {n.get('unit', '')} (Ideal Range: {n.get('ideal_range', [None, None])[0]}–{n.get('ideal_range', [None, None])[1]} {n.get('unit', '')})"
-    if n.get('ideal_range') else
-    f"{n.get('name', 'Unknown')}: {n.get('current', 'N/A')} {n.get('unit', '')}"
-    for n in nutrients_data if 'organic matter' in n.get('name', '').lower()
-])}
-
-DEFICIENT: {', '.join(deficient) if deficient else 'None'}
-MARGINALLY DEFICIENT: {', '.join(marginallyDeficient) if marginallyDeficient else 'None'}
-OPTIMAL: {', '.join(optimal) if optimal else 'None'}
-MARGINALLY EXCESSIVE: {', '.join(marginallyExcessive) if marginallyExcessive else 'None'}
-EXCESS: {', '.join(excess) if excess else 'None'}
-
-CRITICAL INSTRUCTIONS:
-- Focus ONLY on ORGANIC MATTER values, NOT organic carbon values
-- Use percentage-based logic for organic matter status classification based on deviation from ideal values:
-  * Deficient: More than 40% below the optimal ideal value
-  * Marginally Deficient: Between 18% and 40% below the optimal ideal value  
-  * Optimal: Between 18% below and 18% above the optimal ideal value
-  * Marginally Excessive: Between 18% and 40% above the optimal ideal value
-  * Excessive: Above 40% above the optimal ideal value
-- IGNORE any target values - use only the ideal values
-- NEVER mention "organic carbon" or "LECO" in your response - only discuss "organic matter"
-
-CRITICAL: You MUST explicitly mention the nutrient status that exists. If the OPTIMAL list contains nutrients, mention them as "optimal". If the DEFICIENT list contains nutrients, mention them as "deficient". If the MARGINALLY DEFICIENT list contains nutrients, mention them as "marginally deficient". If the MARGINALLY EXCESSIVE list contains nutrients, mention them as "marginally excessive". If the EXCESS list contains nutrients, mention them as "excessive". Do NOT mention categories that are empty or say "no deficient nutrients" etc.
-
-CRITICAL: NEVER mention the percentage thresholds (like "40% below", "18% above", etc.) in your response. Focus on describing the nutrient status without explaining the calculation method.
-
-IMPORTANT: Start your analysis by explaining what "organic matter" means, then describe the current organic matter status. If organic matter is deficient or marginally deficient, include ONE sentence with a recommendation to improve organic matter levels. Focus ONLY on describing the current organic matter levels and their implications.
-
-List ALL specific nutrients in each category rather than using general terms. Write your response as ONE SINGLE PARAGRAPH, not multiple paragraphs.
-
-Provide a 4-5 sentence analysis focusing on:
-- Definition of organic matter and its significance for soil health and fertility
-- Current organic matter levels across ALL categories (deficient, marginally deficient, optimal, marginally excessive, excessive) and their implications for nutrient availability, soil structure, and water retention
-- One recommendation sentence if organic matter is deficient or marginally deficient
-
-Use professional soil science terminology. Focus on describing the current situation only.
-""",
-            'cec': f"""
-As a professional soil scientist and agronomist, provide a BRIEF analysis of the soil's Cation Exchange Capacity (CEC) for a Soil Therapy Report.
-
-CEC DATA: {', '.join([
-    f"{n.get('name', 'Unknown')}: {n.get('current', 'N/A')} {n.get('unit', '')}"
-    for n in nutrients_data if 'cec' in n.get('name', '').lower() or 'cation exchange' in n.get('name', '').lower()
-])}
-
-DEFICIENT: {', '.join(deficient) if deficient else 'None'}
-OPTIMAL: {', '.join(optimal) if optimal else 'None'}
-EXCESS: {', '.join(excess) if excess else 'None'}
-
-CRITICAL INSTRUCTIONS:
-- Focus ONLY on CEC (Cation Exchange Capacity) values.
-- CEC is measured in cmol(+)/kg (equivalent to meq/100 g).
-- Classify soil texture using the following reference table (strict):
-  * Sand: 1–5 cmol(+)/kg — extremely low exchange sites, rapid leaching
-  * Sandy Loam: 5–10 cmol(+)/kg — limited exchange sites, moderate leaching
-  * Loam: 10–15 cmol(+)/kg — balanced texture and moderate CEC
-  * Silt Loam: 15–25 cmol(+)/kg — higher CEC from fines and humus
-  * Clay Loam: 20–30 cmol(+)/kg — elevated CEC due to clay minerals
-  * Clay: 25–40+ cmol(+)/kg — high buffering and nutrient retention
-  * Organic Soils / Peat: 40–100+ cmol(+)/kg — very high CEC from humus functional groups
-- Overlap handling (e.g., 20–25 and 25–30): choose the category whose range midpoint is closest to the measured CEC; if exactly tied, prefer the finer-texture class (Clay Loam over Silt Loam; Clay over Clay Loam).
-
-Provide a 2-3 sentence analysis focusing on:
-- The measured CEC, the inferred soil texture (per table), and implications for nutrient retention/buffering.
-- Brief management considerations aligned with the inferred texture (e.g., leaching risk for sands; compaction/drainage for clays; pH-dependent charge for organics).
-
-Use professional soil science terminology. Focus on practical implications for fertilizer management and soil fertility.
-""",
-            'soilPh': f"""
-As a professional soil scientist and agronomist, provide a BRIEF analysis of the soil's pH status for a Soil Therapy Report.
-
-pH DATA: {', '.join([f"{n.get('name', 'Unknown')}: {n.get('current', 'N/A')} {n.get('unit', '')} (Ideal: {n.get('ideal', 'N/A')} {n.get('unit', '')})" for n in nutrients_data])}
-
-DEFICIENT: {', '.join(deficient) if deficient else 'None'}
-MARGINALLY DEFICIENT: {', '.join(marginallyDeficient) if marginallyDeficient else 'None'}
-OPTIMAL: {', '.join(optimal) if optimal else 'None'}
-MARGINALLY EXCESSIVE: {', '.join(marginallyExcessive) if marginallyExcessive else 'None'}
-EXCESS: {', '.join(excess) if excess else 'None'}
-
-CRITICAL INSTRUCTIONS:
-- Soil pH is a measure of soil acidity or alkalinity on a logarithmic scale from 0 to 14, where 7 is neutral, values below 7 are acidic, and values above 7 are alkaline. pH significantly influences nutrient availability, microbial activity, and plant growth.
-- Use percentage-based logic for pH status classification based on deviation from ideal values:
-  * **Deficient (Too Acidic)**: More than 25% below the optimal ideal pH value
-  * **Marginally Deficient (Slightly Acidic)**: Between 10% and 25% below the optimal ideal pH value  
-  * **Optimal**: Between 10% below and 10% above the optimal ideal pH value
-  * **Marginally Excessive (Slightly Alkaline)**: Between 10% and 25% above the optimal ideal pH value
-  * **Excessive (Too Alkaline)**: Above 25% above the optimal ideal pH value
-
-CRITICAL: You MUST explicitly mention the pH status that exists. If the OPTIMAL list contains pH values, mention them as "optimal". If the MARGINALLY EXCESSIVE list contains pH values, mention them as "marginally excessive". If the DEFICIENT list contains pH values, mention them as "deficient". Do NOT mention categories that are empty.
-
-CRITICAL: If the OPTIMAL list contains pH values, you MUST explicitly mention them as "optimal" in your response. Do NOT say "no optimal pH levels" if the OPTIMAL list contains values.
-
-CRITICAL: Use the correct terminology for pH - describe pH as "acidic", "alkaline", "slightly acidic", "slightly alkaline", etc. Do NOT use terms like "deficient" or "excessive" for pH, and do not use the plural forms "deficiencies" or "excesses" in relation to pH.
-
-CRITICAL: NEVER mention the percentage thresholds (like "30% below", "25% above", etc.) in your response. Focus on describing the nutrient status without explaining the calculation method.
-
-CRITICAL EXAMPLE: If only MARGINALLY EXCESSIVE contains pH values, say "The pH level is slightly alkaline" but DO NOT say "This indicates that the soil is neither deficient nor marginally deficient in pH, nor marginally excessive or excessive."
-
-PROHIBITED PHRASES (STRICT): Do not write meta-negations for pH such as "no deficiencies or excesses", "neither deficient nor excessive", "neither deficient nor marginally deficient, nor marginally excessive or excessive", "no issues across categories", or similar. pH is a single measure — simply state the status (acidic/alkaline/slightly/optimal) and its implications.
-
-CRITICAL: Do not mention the word "pH" more than 2 times in your response.
-
-ADD SPECIFICITY (STRICT): When status is slightly alkaline/alkaline (pH > 7), briefly name 1–2 likely nutrient availability impacts (e.g., reduced availability of Phosphorus, Iron, Zinc, and Manganese) and 1 biology/process note (e.g., altered microbial activity or slower nutrient release). When status is slightly acidic/acidic (pH < 7), briefly note increased availability of some micronutrients and potential Aluminium solubility issues in strongly acidic conditions. Keep this to one concise clause.
-
-IMPORTANT: Start your analysis by explaining what "soil pH" means, then describe the current pH status. DO NOT include any management recommendations, pH adjustment strategies, or solutions. Focus ONLY on describing the current pH levels and their implications. Avoid any mention of absent categories or negatives like "no deficiencies or excesses".
-
-STRICT OUTPUT FORMAT:
-- Use exactly 4 sentences.
-- Sentence 1: one-sentence definition of soil pH and why it matters for chemistry, biology, and growth (mention the term once here).
-- Sentence 2: start with "This pH level is" or "At pH" and state the status (optimal, slightly acidic, acidic, slightly alkaline, alkaline) with the measured value.
-- Sentence 3: describe nutrient availability dynamics appropriate to the status (e.g., near-neutral supports Phosphorus solubility and moderates Iron/Zinc/Manganese availability; low values can increase Aluminium solubility), and include a short note on microbial activity; avoid the word "pH" here.
-- Sentence 4: state the practical impact on fertilizer efficiency, buffering, and likely crop performance in one sentence; avoid recommendations and avoid the word "pH" here.
-- Do not mention any categories, negations, or the words "deficient", "excess", "neither", or "nor".
-
-List ALL specific pH measurements in each category rather than using general terms. Write your response as ONE SINGLE PARAGRAPH, not multiple paragraphs.
-
-Provide a 4 sentence analysis focusing on:
-- Definition of soil pH and its significance for soil chemistry and plant nutrition
-- Current status and measured value
-- Nutrient availability dynamics and microbiology appropriate to the status
-- Implication for fertilizer efficiency, buffering, and crop performance
-
-Use professional soil science terminology. Focus on describing the current situation only.
-""",
-            'baseSaturation': f"""
-As a professional soil scientist and agronomist, provide a BRIEF analysis of the soil's base saturation for a Soil Therapy Report.
-
-BASE SATURATION DATA: {', '.join([f"{n.get('name', 'Unknown')}: {n.get('current', 'N/A')} {n.get('unit', '')} (Ideal: {n.get('ideal', 'N/A')} {n.get('unit', '')})" for n in nutrients_data])}
-
-DEFICIENT: {', '.join(deficient) if deficient else 'None'}
-MARGINALLY DEFICIENT: {', '.join(marginallyDeficient) if marginallyDeficient else 'None'}
-OPTIMAL: {', '.join(optimal) if optimal else 'None'}
-MARGINALLY EXCESSIVE: {', '.join(marginallyExcessive) if marginallyExcessive else 'None'}
-EXCESS: {', '.join(excess) if excess else 'None'}
-
-CRITICAL INSTRUCTIONS:
-- Base saturation represents the percentage of the soil's cation exchange capacity (CEC) occupied by base cations (Calcium, Magnesium, Potassium, Sodium) and acid cations (Aluminum, Hydrogen), which influences soil fertility, nutrient availability, and plant growth.
-- Use percentage-based logic for base saturation status classification based on deviation from ideal values:
-  * Deficient: More than 40% below the optimal ideal value
-  * Marginally Deficient: Between 18% and 40% below the optimal ideal value  
-  * Optimal: Between 18% below and 18% above the optimal ideal value
-  * Marginally Excessive: Between 18% and 40% above the optimal ideal value
-  * Excessive: Above 40% above the optimal ideal value
-
-CRITICAL: You MUST explicitly mention the nutrient status that exists. If the OPTIMAL list contains nutrients, mention them as "optimal". If the DEFICIENT list contains nutrients, mention them as "deficient". If the MARGINALLY DEFICIENT list contains nutrients, mention them as "marginally deficient". If the MARGINALLY EXCESSIVE list contains nutrients, mention them as "marginally excessive". If the EXCESS list contains nutrients, mention them as "excessive". Do NOT mention categories that are empty or say "no deficient nutrients" etc.
-
-STRICT BASE SATURATION FILTER (MANDATORY): Only consider the base saturation nutrients for this section — Calcium, Magnesium, Potassium, Sodium, Aluminium/Aluminum, Hydrogen, and Other Bases. Ignore any nutrients labeled as TAE, LaMotte/Reams, or any with ppm units. Do not introduce nutrients outside this list in any category.
-
-CRITICAL: If the OPTIMAL list contains nutrients, you MUST explicitly mention them as "optimal" in your response. If the MARGINALLY DEFICIENT list contains nutrients, you MUST explicitly mention them as "marginally deficient" in your response. Do NOT say "no optimal nutrients" if the OPTIMAL list contains nutrients.
-
-CRITICAL: NEVER mention the percentage thresholds or ideal ranges (like "65-80%", "10-20%", etc.) in your response. Focus on describing the nutrient status without explaining the calculation method.
-
-CRITICAL: DO NOT mention any deficiencies or optimal levels for Aluminum, Hydrogen, or Other Bases in this base saturation section. Only discuss these nutrients if they appear in the excessive category, as they are only problematic when excessive. If these nutrients are in the deficient, marginally deficient, or optimal categories, completely ignore them and do not mention them at all.
+                return float('nan')
+            return float('nan')
 
-CRITICAL EXAMPLE: If Hydrogen is in the DEFICIENT list, do NOT say "deficiencies in Hydrogen" or mention Hydrogen at all. If Aluminum is in the MARGINALLY DEFICIENT list, do NOT say "marginally deficient Aluminum" or mention Aluminum at all. Only mention these nutrients if they are in the EXCESSIVE category.
+        def _approx(a, b, tol=0.6):
+            try:
+                return abs(float(a) - float(b)) <= tol
+            except Exception:
+                return False
+
+        # Candidates: Ca/Mg/K/P ppm rows, exclude Mehlich and explicit TAE category
+        lamotte_candidates = []
+        for n in flat_nutrients:
+            name = n.get('name', '') or ''
+            unit = (n.get('unit') or '').lower()
+            cat = n.get('category')
+            if unit != 'ppm':
+                continue
+            if '(mehlich' in name.lower():
+                continue
+            if cat == 'tae':
+                continue
+            b = _base_name(name)
+            if b in ['Calcium', 'Magnesium', 'Phosphorus', 'Potassium']:
+                lamotte_candidates.append({
+                    'name': b,
+                    'current': n.get('current'),
+                    'ideal': n.get('ideal'),
+                    'unit': n.get('unit'),
+                    'raw_name': name,
+                    'category': cat,
+                })
 
-IMPORTANT: Start your analysis by explaining what "base saturation" means, then describe the current nutrient status. DO NOT include any management recommendations, fertilization strategies, or solutions. Focus ONLY on describing the current nutrient levels and their implications.
+        # Deterministic selection by ideal values; fallback to ordinal occurrences if needed
+        ideals = {'Phosphorus': 18.5, 'Calcium': 1500.0, 'Magnesium': 212.5, 'Potassium': 90.0}
+        selected_map = {}
+        for elem, target in ideals.items():
+            hits = [c for c in lamotte_candidates if c['name'] == elem and _approx(_norm_num(c.get('ideal')), target, 0.6)]
+            if hits:
+                selected_map[elem] = hits[0]
+            else:
+                # ordinal fallback from flat order
+                occ = [n for n in flat_nutrients if _base_name(n.get('name', '')) == elem and (n.get('unit') or '').lower() == 'ppm']
+                idx = 1 if elem == 'Phosphorus' else 2
+                sel = occ[idx] if len(occ) > idx else (occ[-1] if occ else None)
+                if sel:
+                    selected_map[elem] = {
+                        'name': elem,
+                        'current': sel.get('current'),
+                        'ideal': sel.get('ideal'),
+                        'unit': sel.get('unit'),
+                        'raw_name': sel.get('name'),
+                        'category': sel.get('category'),
+                    }
+
+        lamotte_payload = {
+            'candidates': lamotte_candidates,
+            'selected': [selected_map.get('Phosphorus'), selected_map.get('Calcium'), selected_map.get('Magnesium'), selected_map.get('Potassium')]
+        }
 
-List ALL specific nutrients in each category rather than using general terms. Write your response as ONE SINGLE PARAGRAPH, not multiple paragraphs.
+        if progress:
+            progress(0.9, 'Building nutrient overview')
+        with stage('nutrient_overview'):
+            nutrient_overview = extract_nutrient_overview(document)
+        return {
+            'analyses': all_analyses,
+            'count': len(all_analyses),
+            'lamotte': lamotte_payload,
+            "nutrient_overview": nutrient_overview
+        }, 200
 
-Provide a 3–4 sentence analysis focusing on:
-- Definition of base saturation and its significance for soil fertility and cation balance
-- Current base saturation levels across ALL categories (deficient, marginally deficient, optimal, marginally excessive, excessive) and their implications for nutrient availability and plant nutrition
- - End with ONE concluding sentence that succinctly states how this base saturation pattern is likely to impact soil structure (flocculation/dispersion risk where relevant), nutrient availability/buffering, fertilizer efficiency, and crop performance. Do not give recommendations; describe impact only.
+    app.logger.warning(
+        'No nutrients extracted from PDF (neither tables nor OCR).')
+    return {'error': 'No nutrients extracted from PDF (neither tables nor OCR).'}, 400
 
-NUTRIENT MENTION RULE: When mentioning multiple nutrients in the same category, use the format "Calcium, Magnesium, and Potassium are deficient" or "Nitrogen and Phosphorus are optimal". Always list nutrients in alphabetical order within each category.
-""",
-              'availableNutrients': f"""
-As a professional soil scientist and agronomist, provide a BRIEF analysis of the soil's available nutrients for a Soil Therapy Report.
 
-AVAILABLE NUTRIENTS DATA: {', '.join([f"{n.get('name', 'Unknown')}: {n.get('current', 'N/A')} {n.get('unit', '')} (Ideal: {n.get('ideal', 'N/A')} {n.get('unit', '')})" for n in nutrients_data_clean])}
+def extract_soil_report_cached(data, progress=None):
+    """Extraction result for the given upload bytes, served from the cache when possible.
 
-DEFICIENT: {', '.join(deficient) if deficient else 'None'}
-MARGINALLY DEFICIENT: {', '.join(marginallyDeficient) if marginallyDeficient else 'None'}
-OPTIMAL: {', '.join(optimal) if optimal else 'None'}
-MARGINALLY EXCESSIVE: {', '.join(marginallyExcessive) if marginallyExcessive else 'None'}
-EXCESS: {', '.join(excess) if excess else 'None'}
+    Returns (body, status, cache_hit). Concurrent requests for the same bytes
+    wait on the extraction already running instead of starting their own.
+    """
+    key = content_key(data, EXTRACTION_PARSER_VERSION)
 
-CRITICAL INSTRUCTIONS:
-- Available nutrients are the plant-available forms of essential nutrients that can be immediately taken up by plant roots, providing the current supply of nutrients that plants can access.
-- Use percentage-based logic for nutrient status classification based on deviation from ideal values:
-  * Deficient: More than 60% below the optimal ideal value
-  * Marginally Deficient: Between 30% and 60% below the optimal ideal value  
-  * Optimal: Between 30% below and 30% above the optimal ideal value
-  * Marginally Excessive: Between 30% and 70% above the optimal ideal value
-  * Excessive: Above 70% above the optimal ideal value
+    def compute():
+        body, status = run_soil_extraction(data, progress)
+        return {'body': body, 'status': status}
 
-CRITICAL: You MUST explicitly mention the nutrient status that exists. If the OPTIMAL list contains nutrients, mention them as "optimal". If the DEFICIENT list contains nutrients, mention them as "deficient". If the MARGINALLY DEFICIENT list contains nutrients, mention them as "marginally deficient". If the MARGINALLY EXCESSIVE list contains nutrients, mention them as "marginally excessive". If the EXCESS list contains nutrients, mention them as "excessive". Do NOT mention categories that are empty or say "no deficient nutrients" etc.
+    result, hit = extraction_cache.get_or_compute(
+        key, compute, cacheable=lambda r: r['status'] == 200)
+    metrics.inc('soil_cache_requests_total', cache='extraction', result='hit' if hit else 'miss')
+    return result['body'], result['status'], hit
 
-CRITICAL: If the OPTIMAL list contains nutrients, you MUST explicitly mention them as "optimal" in your response. Do NOT say "no optimal nutrients" if the OPTIMAL list contains nutrients.
 
-CRITICAL ALUMINIUM RULE: DO NOT mention Aluminium/Aluminum unless it appears in the EXCESS category. If Aluminium appears in DEFICIENT, MARGINALLY DEFICIENT, OPTIMAL, or MARGINALLY EXCESSIVE categories, completely ignore it and do not mention it at all. Only mention Aluminium if it is in the EXCESS category, as Aluminium is only problematic when excessive.
+@app.route('/extract-soil-report', methods=['POST'])
+def extract_soil_report():
+    try:
+        if 'file' not in request.files:
+            app.logger.error('No file uploaded')
+            return jsonify({'error': 'No file uploaded'}), 400
+        file = request.files['file']
+        app.logger.info(f'Received file: {file.filename}')
+        body, status, hit = extract_soil_report_cached(read_upload_bytes(file))
+        annotate(cache='hit' if hit else 'miss')
+        app.logger.info(f'Extraction cache {"hit" if hit else "miss"} for {file.filename}')
+        response = jsonify(body)
+        response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response, status
+    except Exception as e:
+        app.logger.error('Exception during PDF extraction: ' + str(e))
+        traceback.print_exc()
+        return jsonify(
+            {'error': 'Exception during PDF extraction', 'details': str(e)}), 500
 
-CRITICAL: NEVER mention the percentage thresholds (like "30% below", "50% above", etc.) in your response. Focus on describing the nutrient status without explaining the calculation method.
 
-IMPORTANT: Start your analysis by explaining what "available nutrients" means, then describe the current nutrient status. DO NOT include any management recommendations, fertilization strategies, or solutions. Focus ONLY on describing the current nutrient levels and their implications.
+# Batch extraction: files processed concurrently per request, and the most accepted at once
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', 2))
+BATCH_MAX_FILES = int(os.environ.get('BATCH_MAX_FILES', 500))
 
-List ALL specific nutrients in each category rather than using general terms. Write your response as ONE SINGLE PARAGRAPH, not multiple paragraphs.
 
-        Provide a 5-6 sentence analysis focusing on:
-        - Definition of available nutrients and their significance for plant nutrition and growth
-        - Current available nutrient levels across ALL categories (deficient, marginally deficient, optimal, marginally excessive, excessive) and their implications for crop performance and yield potential
+def _extract_batch_file(index, filename, data):
+    """One NDJSON line for a batch upload: the /extract-soil-report payload or a per-file error."""
+    line = {'index': index, 'filename': filename}
+    try:
+        body, status, hit = extract_soil_report_cached(data)
+    except Exception as e:
+        app.logger.error(f'Exception during PDF extraction of {filename}: {e}')
+        line.update({'status': 500, 'error': 'Exception during PDF extraction', 'details': str(e)})
+        return line
+    line['status'] = status
+    line['cache'] = 'HIT' if hit else 'MISS'
+    if status == 200:
+        line['result'] = body
+    else:
+        line.update(body)
+    return line
+
+
+@app.route('/extract-soil-reports/batch', methods=['POST'])
+def extract_soil_reports_batch():
+    """Extract many soil reports in one multipart request, streaming one NDJSON line per file.
+
+    Lines are written as files finish (not in upload order); each carries the
+    upload's index and filename.
+    """
+    files = request.files.getlist('files') or request.files.getlist('file')
+    if not files:
+        return jsonify({'error': 'No files uploaded'}), 400
+    if len(files) > BATCH_MAX_FILES:
+        return jsonify({'error': f'Too many files: at most {BATCH_MAX_FILES} per batch'}), 413
+    uploads = [(idx, f.filename, read_upload_bytes(f)) for idx, f in enumerate(files)]
+    app.logger.info(f'Batch extraction of {len(uploads)} files')
+
+    def generate():
+        pool = ThreadPoolExecutor(max_workers=max(1, BATCH_WORKERS))
+        futures = [pool.submit(_extract_batch_file, *upload) for upload in uploads]
+        try:
+            for future in as_completed(futures):
+                yield json.dumps(future.result()) + '\n'
+        finally:
+            # Client went away or we are done: drop anything not yet started
+            pool.shutdown(wait=False, cancel_futures=True)
 
-        OUTPUT REQUIREMENTS:
-        STRICT OUTPUT FORMAT (after the debug list):
-        - Use EXACTLY 6 sentences.
-        - Sentence 1-2 MUST start with: "Available nutrients are" and give the brief definition.
-        - Sentence 3-5 MUST list ONLY the non-empty categories using this exact pattern with labels and semicolons between categories:
-          "Deficient: A, B, and C; Marginally deficient: D and E; Optimal: F; Marginally excessive: G; Excessive: H."
-        - If a category is empty, OMIT that label entirely (do not write "None").
-        - Within each category, list nutrient names in strict alphabetical order, separated by commas, using "and" before the last item. Do not repeat any category label or use filler phrases like "while" or "as well".
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson',
+                    headers={'X-Accel-Buffering': 'no'})
 
-        COMPLETENESS REQUIREMENT:
-        - The category sentence MUST include EVERY nutrient present in AVAILABLE NUTRIENTS DATA (after normalization and Aluminium rule), each nutrient mentioned EXACTLY ONCE across all categories. Do not omit any nutrient.
 
-        NAME NORMALIZATION & DEDUPLICATION:
-        - When writing names, remove any parenthetical extraction method tags like "(Mehlich III)", "(DTPA)", "(KCl)", or "(CaCl2)". Keep "Nitrate-N" and "Ammonium-N" as-is.
-        - Treat "Aluminum" and "Aluminium" as the same nutrient. Use the spelling "Aluminium" and NEVER list it twice.
-        - Do not mention any nutrient more than once across all categories.
+# Asynchronous extraction jobs. State lives in a local SQLite file shared by all
+# gunicorn workers, so any worker can answer a poll and unfinished jobs resume after a restart.
+JOB_DB_PATH = os.environ.get('JOB_DB_PATH') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'jobs.sqlite3')
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_STALE_AFTER = int(os.environ.get('JOB_STALE_AFTER', 120))
+JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+JOB_RETENTION = int(os.environ.get('JOB_RETENTION', 24 * 3600))
+JOB_MAINTENANCE_INTERVAL = int(os.environ.get('JOB_MAINTENANCE_INTERVAL', 15))
 
-        NUTRIENT MENTION RULE: When mentioning multiple nutrients in the same category, use the format "Nitrate-N, Phosphorus, and Sulfur are deficient" or "Calcium and Magnesium are optimal". Always list nutrients in alphabetical order within each category. Do not add any words other than the category labels, colon, the comma-separated list with "and" before the last item, and semicolons between categories.
+job_store = JobStore(JOB_DB_PATH)
+job_owner = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+job_executor = ThreadPoolExecutor(max_workers=max(1, JOB_WORKERS), thread_name_prefix='extract-job')
+_jobs_submitted = set()
+_jobs_lock = threading.Lock()
 
-Do NOT analyze the raw nutrient data yourself. Use ONLY the classification provided.
-""",
-            'lamotteReams': f"""
-As a professional soil scientist and agronomist, provide a BRIEF analysis of the soil's LaMotte/Reams test results for a Soil Therapy Report.
 
-LAMOTTE/REAMS DATA: {', '.join([
-    f"{n.get('name', 'Unknown')}: {n.get('current', 'N/A')} {n.get('unit', '')} (Ideal: {n.get('ideal', 'N/A')} {n.get('unit', '')})"
-    for n in nutrients_data
-])}
+def _run_extraction_job(job_id):
+    try:
+        if not job_store.claim(job_id, job_owner):
+            # Already picked up (or finished) by another worker
+            return
+        loaded = job_store.load_input(job_id)
+        if loaded is None or loaded[2] is None:
+            job_store.fail(job_id, 'Job input is missing')
+            return
+        _, filename, data = loaded
+        app.logger.info(f'Running extraction job {job_id} for {filename}')
+        try:
+            body, status, _ = extract_soil_report_cached(
+                data, progress=lambda fraction, message: job_store.update_progress(job_id, fraction, message))
+        except Exception as e:
+            app.logger.error(f'Exception during extraction job {job_id}: {e}')
+            traceback.print_exc()
+            job_store.fail(job_id, 'Exception during PDF extraction',
+                           {'error': 'Exception during PDF extraction', 'details': str(e)})
+            return
+        if status == 200:
+            job_store.finish(job_id, body)
+        else:
+            job_store.fail(job_id, body.get('error', 'Extraction failed'), body)
+    finally:
+        with _jobs_lock:
+            _jobs_submitted.discard(job_id)
+
+
+def _submit_extraction_job(job_id):
+    with _jobs_lock:
+        if job_id in _jobs_submitted:
+            return
+        _jobs_submitted.add(job_id)
+    job_executor.submit(_run_extraction_job, job_id)
+
+
+def _job_maintenance_loop():
+    """Heartbeat this worker's jobs, resume interrupted or orphaned ones and purge old results."""
+    last_purge = 0
+    while True:
+        time.sleep(JOB_MAINTENANCE_INTERVAL)
+        if not job_store.exists():
+            continue
+        try:
+            job_store.heartbeat(job_owner)
+            job_store.requeue_stale(JOB_STALE_AFTER, JOB_MAX_ATTEMPTS)
+            # Queued jobs nobody has claimed for a while belonged to a worker that went away
+            for job_id in job_store.queued_before(time.time() - JOB_STALE_AFTER / 2):
+                _submit_extraction_job(job_id)
+            if time.time() - last_purge > 3600:
+                job_store.purge(JOB_RETENTION)
+                last_purge = time.time()
+        except Exception as e:
+            app.logger.error(f'Extraction job maintenance failed: {e}')
+        # Job stages are timed outside any request; publish them for other workers' scrapes
+        metrics.flush()
+
+
+_maintenance_started = False
+
+
+def start_job_maintenance():
+    """Start this process's job maintenance thread (once).
+
+    Not started at import, so scripts and tests that import the app never
+    heartbeat or resume jobs. gunicorn workers start it from the
+    post_worker_init hook in gunicorn.conf.py; the job routes and the
+    development server start it on first use.
+    """
+    global _maintenance_started
+    with _jobs_lock:
+        if _maintenance_started:
+            return
+        _maintenance_started = True
+    threading.Thread(target=_job_maintenance_loop, name='extract-job-maintenance', daemon=True).start()
+
+
+@app.route('/extract-soil-report/jobs', methods=['POST'])
+def submit_extraction_job():
+    """Queue a soil report extraction and return its job id immediately."""
+    if 'file' not in request.files:
+        app.logger.error('No file uploaded')
+        return jsonify({'error': 'No file uploaded'}), 400
+    file = request.files['file']
+    start_job_maintenance()
+    job_id = job_store.create('extract-soil-report', file.filename, read_upload_bytes(file))
+    app.logger.info(f'Queued extraction job {job_id} for {file.filename}')
+    _submit_extraction_job(job_id)
+    return jsonify({
+        'job_id': job_id,
+        'status': JOB_QUEUED,
+        'status_url': f'/extract-soil-report/jobs/{job_id}'
+    }), 202
+
+
+@app.route('/extract-soil-report/jobs/<job_id>', methods=['GET'])
+def get_extraction_job(job_id):
+    """Status and progress of an extraction job, with the extraction payload once it is done."""
+    start_job_maintenance()
+    job = job_store.get(job_id) if job_store.exists() else None
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    response = {
+        'job_id': job['id'],
+        'status': job['status'],
+        'progress': job['progress'],
+        'message': job['message'],
+        'filename': job['filename'],
+        'created_at': job['created_at'],
+        'updated_at': job['updated_at'],
+    }
+    if job['status'] == JOB_DONE:
+        response['result'] = job['result']
+    elif job['status'] == JOB_FAILED:
+        response['error'] = job['error']
+        if job['result']:
+            response['details'] = job['result'].get('details')
+    return jsonify(response)
+
+
+DATE_PATTERN = re.compile(r"\d{2}/\d{2}/\d{4}")
+PADDOCK_PATTERN = re.compile(r"PADDOCK:?\s*([\w\-\s]+)", re.IGNORECASE)
+CROP_PATTERN = re.compile(r"CROP:?\s*([\w\-\s]+)", re.IGNORECASE)
+LOCATION_PATTERN = re.compile(r"LOCATION:?\s*([\w\-\s]+)", re.IGNORECASE)
+
+
+def _header_block_rows(table):
+    """First-column rows of a 3-4 row crop/paddock/date header table, else None."""
+    if not 3 <= len(table) <= 4:
+        return None
+    rows = [row[0] if row and isinstance(row[0], str) else '' for row in table]
+    rows = [r.strip() for r in rows if r and r.strip()]
+    return rows if len(rows) >= 2 else None
+
+
+class TableMetadataIndex:
+    """One pass over a document's tables collecting the metadata extract_analysis_info needs.
+
+    For every table position it records the crop, date and location that a
+    scan of tables 0..position would settle on, the last explicit PADDOCK: hit
+    and the header-block paddock candidates, so each analysis resolves its
+    info with lookups instead of rescanning every earlier row.
+    """
+
+    def __init__(self, tables):
+        self.header_blocks = [_header_block_rows(table) for table in tables]
+        self.crop = []
+        self.date = []
+        self.location = []
+        self.explicit_paddock = []
+        self.block_paddock = []
+        # (table position, paddock row, crop at that point) for header blocks whose second row is not a date
+        self.block_paddock_candidates = []
+        crop = date = location = block_paddock = 'Unknown'
+        explicit = None
+        for idx, table in enumerate(tables):
+            rows = self.header_blocks[idx]
+            if rows:
+                if crop == 'Unknown' and not DATE_PATTERN.match(rows[0]):
+                    crop = rows[0]
+                if not DATE_PATTERN.match(rows[1]):
+                    self.block_paddock_candidates.append((idx, rows[1], crop))
+                    if block_paddock == 'Unknown' and rows[1] != crop:
+                        block_paddock = rows[1]
+                if date == 'Unknown' and len(rows) > 2 and DATE_PATTERN.match(rows[2]):
+                    date = rows[2]
+            for row in table:
+                if not row:
+                    continue
+                row_text = ' '.join([str(cell) for cell in row if cell])
+                paddock_match = PADDOCK_PATTERN.search(row_text)
+                if paddock_match:
+                    paddock_val = paddock_match.group(1).strip()
+                    if paddock_val:
+                        explicit = (idx, paddock_val)
+                if crop == 'Unknown':
+                    crop_match = CROP_PATTERN.search(row_text)
+                    if crop_match and crop_match.group(1).strip():
+                        crop = crop_match.group(1).strip()
+                if date == 'Unknown':
+                    date_match = DATE_PATTERN.search(row_text)
+                    if date_match:
+                        date = date_match.group(0)
+                if location == 'Unknown':
+                    loc_match = LOCATION_PATTERN.search(row_text)
+                    if loc_match and loc_match.group(1).strip():
+                        location = loc_match.group(1).strip()
+            self.crop.append(crop)
+            self.date.append(date)
+            self.location.append(location)
+            self.explicit_paddock.append(explicit)
+            self.block_paddock.append(block_paddock)
+
+    def _paddock(self, table_idx, paddock, crop):
+        """Resolve the paddock for tables 0..table_idx given the state left by the previous-table check."""
+        explicit = self.explicit_paddock[table_idx]
+        start = 0
+        if explicit is not None:
+            # An explicit PADDOCK: hit always overrides; header blocks only fill an Unknown paddock
+            start, paddock = explicit[0] + 1, explicit[1]
+        if paddock != 'Unknown':
+            return paddock
+        if explicit is None and crop == 'Unknown':
+            return self.block_paddock[table_idx]
+        for idx, row_paddock, crop_at in self.block_paddock_candidates:
+            if idx > table_idx:
+                break
+            if idx < start:
+                continue
+            if row_paddock != 'Unknown' and row_paddock != (crop if crop != 'Unknown' else crop_at):
+                return row_paddock
+        return 'Unknown'
+
+    def info(self, table_idx):
+        info = {
+            'name': f'Analysis {table_idx + 1}',
+            'page': table_idx + 1,
+            'crop': 'Unknown',
+            'location': 'Unknown',
+            'date': 'Unknown',
+            'paddock': 'Unknown'
+        }
+        # First, try to extract from the table immediately before the nutrient table
+        if table_idx > 0:
+            rows = self.header_blocks[table_idx - 1]
+            if rows:
+                # First row: crop
+                if not DATE_PATTERN.match(rows[0]):
+                    info['crop'] = rows[0]
+                # Second row: paddock (if not a date and not a known crop)
+                if not DATE_PATTERN.match(rows[1]) and rows[1] != info['crop']:
+                    info['paddock'] = rows[1]
+                # Third row: date
+                if len(rows) > 2 and DATE_PATTERN.match(rows[2]):
+                    info['date'] = rows[2]
+        if not self.crop:
+            return info
+        # Fill anything still missing from the scan of tables 0..table_idx
+        last = min(table_idx, len(self.crop) - 1)
+        info['paddock'] = self._paddock(last, info['paddock'], info['crop'])
+        for field, settled in (('crop', self.crop), ('date', self.date), ('location', self.location)):
+            if info[field] == 'Unknown':
+                info[field] = settled[last]
+        return info
+
+
+def extract_analysis_info(tables, table_idx, index=None):
+    """Extract analysis information from all tables up to and including the current one (to catch header metadata)
+
+    Pass a TableMetadataIndex built once per document to avoid rescanning the
+    earlier tables for every analysis.
+    """
+    if index is None:
+        index = TableMetadataIndex(tables)
+    info = index.info(table_idx)
+    if DEBUG_DUMPS:
+        print(f"Final extracted info for analysis {table_idx + 1}: {info}")
+    return info
 
-{selected_block}
 
-DEFICIENT: {', '.join(deficient) if deficient else 'None'}
-MARGINALLY DEFICIENT: {', '.join(marginallyDeficient) if marginallyDeficient else 'None'}
-OPTIMAL: {', '.join(optimal) if optimal else 'None'}
-MARGINALLY EXCESSIVE: {', '.join(marginallyExcessive) if marginallyExcessive else 'None'}
-EXCESS: {', '.join(excess) if excess else 'None'}
+# LLM comment cache. Identical requests (after normalising the payload) reuse the
+# stored summary; set COMMENT_CACHE_DIR to share it between gunicorn workers.
+COMMENT_MODEL = os.environ.get('OPENAI_COMMENT_MODEL', 'gpt-3.5-turbo')
+# Bump when a comment prompt or renderer changes so stored summaries are regenerated
+COMMENT_PROMPT_VERSION = '1'
+COMMENT_CACHE_SIZE = int(os.environ.get('COMMENT_CACHE_SIZE', 512))
+COMMENT_CACHE_ROUNDING = int(os.environ.get('COMMENT_CACHE_ROUNDING', 2))
+comment_cache = ResultCache(
+    max_entries=COMMENT_CACHE_SIZE,
+    cache_dir=os.environ.get('COMMENT_CACHE_DIR') or None,
+    max_disk_entries=int(os.environ.get('COMMENT_CACHE_DISK_SIZE', 5000)),
+    ttl=int(os.environ.get('COMMENT_CACHE_TTL', 7 * 24 * 3600)),
+)
+STATUS_CATEGORY_KEYS = ('deficient', 'marginallyDeficient', 'optimal', 'marginallyExcessive', 'excess')
+
+
+def _canonical_comment_value(value):
+    if isinstance(value, dict):
+        return {str(k): _canonical_comment_value(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_canonical_comment_value(v) for v in value]
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        # 15 and 15.0 are the same reading; "+ 0.0" also folds -0.0 into 0.0
+        return round(float(value), COMMENT_CACHE_ROUNDING) + 0.0
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def comment_cache_key(kind, data):
+    """Cache key for a comment request: model, prompt version and the normalised payload.
+
+    Category lists are sorted, numbers rounded and strings stripped; the
+    nutrients list keeps its order because the prompts depend on it.
+    """
+    canonical = _canonical_comment_value({k: v for k, v in data.items() if k != 'regenerate'})
+    for holder in (canonical, canonical.get('statusCategories')):
+        if not isinstance(holder, dict):
+            continue
+        for category in STATUS_CATEGORY_KEYS:
+            if isinstance(holder.get(category), list):
+                holder[category] = sorted(holder[category], key=str)
+    payload = json.dumps({'model': COMMENT_MODEL, 'request': canonical},
+                         sort_keys=True, separators=(',', ':'))
+    return content_key(payload.encode('utf-8'), f'{COMMENT_PROMPT_VERSION}-{kind}')
 
-CRITICAL INSTRUCTIONS:
-- LaMotte/Reams testing provides an indication of the amount of plant-available nutrients at the time of sampling, using specific extraction methods that simulate plant root absorption.
-- Use percentage-based logic for nutrient status classification based on deviation from ideal values:
-  * Deficient: More than 40% below the optimal ideal value
-  * Marginally Deficient: Between 18% and 40% below the optimal ideal value  
-  * Optimal: Between 18% below and 18% above the optimal ideal value
-  * Marginally Excessive: Between 18% and 40% above the optimal ideal value
-  * Excessive: Above 40% above the optimal ideal value
 
-SELECTION DIRECTIVE (STRICT):
-- The four entries to use have already been preselected for you in the block "SELECTED ENTRIES" above. You MUST use EXACTLY those four, in that exact order, and ignore all other duplicates.
+class FallbackSummary(str):
+    """A deterministic summary served because the LLM call failed; not cached."""
 
-CRITICAL: You MUST explicitly mention the nutrient status that exists. If the OPTIMAL list contains nutrients, mention them as "optimal". If the DEFICIENT list contains nutrients, mention them as "deficient". Do NOT mention categories that are empty or say "no deficient nutrients" etc.
 
-CRITICAL: NEVER mention the percentage thresholds (like "30% below", "50% above", etc.) in your response. Focus on describing the nutrient status without explaining the calculation method.
+def _cacheable_summary(summary):
+    return bool(summary) and not isinstance(summary, FallbackSummary)
 
-IMPORTANT: Start your analysis by explaining what "LaMotte/Reams testing" means, then describe the current nutrient status for the four selected entries only. DO NOT include any management recommendations, fertilization strategies, or solutions. Focus ONLY on describing the current nutrient levels and their implications.
 
-List ALL four nutrients and their statuses. Write your response as ONE SINGLE PARAGRAPH for the analysis (the diagnostic preface is a separate sentence), not multiple paragraphs.
+def llm_error_response(e):
+    """Error response for a failed comment request: 503 while OpenAI is being skipped, 504 past the deadline."""
+    if isinstance(e, CircuitOpenError):
+        response = jsonify({'error': str(e)})
+        response.headers['Retry-After'] = str(int(llm.breaker.reset_after))
+        return response, 503
+    if isinstance(e, LLMDeadlineExceeded):
+        return jsonify({'error': str(e)}), 504
+    return jsonify({'error': str(e)}), 500
 
-Provide a 2-3 sentence analysis focusing on:
-- Definition of LaMotte/Reams testing and its significance for plant nutrition
-- Current LaMotte/Reams nutrient levels across ALL categories that apply to the four selected entries and their implications for crop performance
 
-NUTRIENT MENTION RULE: When mentioning multiple nutrients in the same category, list nutrients in alphabetical order within each category.
+def regenerate_requested(data):
+    """True when the caller asked for a fresh summary ("regenerate" field or Cache-Control: no-cache)."""
+    return bool(data.get('regenerate')) or 'no-cache' in request.headers.get('Cache-Control', '')
 
-Use professional soil science terminology. Focus on describing the current situation only.
-""",
-            'tae': f"""
-As a professional soil scientist and agronomist, provide a BRIEF analysis of the soil's Total Available Elements (TAE) for a Soil Therapy Report.
 
-TAE DATA: {', '.join([f"{n.get('name', 'Unknown')}: {n.get('current', 'N/A')} {n.get('unit', '')} (Ideal: {n.get('ideal', 'N/A')} {n.get('unit', '')})" for n in nutrients_data])}
+def cached_comment(kind, data, build, regenerate=False):
+    """Return (summary, cache_hit) for a comment request, calling build(data) on a miss.
 
-DEFICIENT: {', '.join(deficient) if deficient else 'None'}
-MARGINALLY DEFICIENT: {', '.join(marginallyDeficient) if marginallyDeficient else 'None'}
-OPTIMAL: {', '.join(optimal) if optimal else 'None'}
-MARGINALLY EXCESSIVE: {', '.join(marginallyExcessive) if marginallyExcessive else 'None'}
-EXCESS: {', '.join(excess) if excess else 'None'}
+    With regenerate the lookup is skipped and the stored summary replaced.
+    """
+    if COMMENT_CACHE_SIZE <= 0:
+        return build(data), False
+    key = comment_cache_key(kind, data)
+    if regenerate:
+        summary = build(data)
+        if _cacheable_summary(summary):
+            comment_cache.set(key, summary)
+        hit = False
+    else:
+        summary, hit = comment_cache.get_or_compute(key, lambda: build(data), cacheable=_cacheable_summary)
+    metrics.inc('soil_cache_requests_total', cache=f'{kind}_comments', result='hit' if hit else 'miss')
+    return summary, hit
 
-CRITICAL INSTRUCTIONS:
-- Total Available Elements (TAE) represent the total concentration of essential nutrients present in the soil, including both plant-available and potentially available forms that can be released through soil weathering and organic matter decomposition.
-- Use percentage-based logic for nutrient status classification based on deviation from ideal values:
-  * Deficient: More than 40% below the optimal ideal value
-  * Marginally Deficient: Between 18% and 40% below the optimal ideal value  
-  * Optimal: Between 18% below and 18% above the optimal ideal value
-  * Marginally Excessive: Between 18% and 40% above the optimal ideal value
-  * Excessive: Above 40% above the optimal ideal value
 
-STRICT TAE FILTER (MANDATORY): Only consider the following TAE nutrients:
-Sodium, Potassium, Calcium, Magnesium, Phosphorus, Aluminium/Aluminum, Copper, Iron, Manganese, Selenium, Zinc, Boron, Silicon, Cobalt, Molybdenum, Sulfur/Sulphur. Ignore any other rows/labels such as explanatory notes or headers (e.g., "Explanatory Notes T.A.E."), and NEVER mention them.
+def plant_comment_prompt(data):
+    """LLM prompt for the Plant Therapy executive summary."""
+    deficient = data.get('deficient', [])
+    optimal = data.get('optimal', [])
+    excess = data.get('excess', [])
 
-CRITICAL: You MUST explicitly mention the nutrient status that exists. If the OPTIMAL list contains nutrients, mention them as "optimal". If the DEFICIENT list contains nutrients, mention them as "deficient". Do NOT mention categories that are empty or say "no deficient nutrients" etc.
+    # Enhanced prompt for more detailed and professional response
+    prompt = f"""
+As a professional plant nutritionist and agronomist, provide a BRIEF executive summary for a Plant Therapy Report based on the following nutrient analysis:
 
-CRITICAL: If the OPTIMAL list contains nutrients, you MUST explicitly mention them as "optimal" in your response. Do NOT say "no optimal nutrients" if the OPTIMAL list contains nutrients.
+DEFICIENT NUTRIENTS: {', '.join(deficient) if deficient else 'None'}
+OPTIMAL NUTRIENTS: {', '.join(optimal) if optimal else 'None'}
+EXCESS NUTRIENTS: {', '.join(excess) if excess else 'None'}
 
-CRITICAL: NEVER mention the percentage thresholds (like "30% below", "50% above", etc.) in your response. Focus on describing the nutrient status without explaining the calculation method.
+Provide a complete executive summary (2-3 sentences) that gives a brief overview of the plant's nutritional status. Make sure to complete your thoughts and provide a full summary. Do NOT include detailed nutrient descriptions, specific functions, or management recommendations. Keep it brief and professional.
 
-CRITICAL: Be fluid on your response when mentioning nutrients on their category. Do not ever say: "Deficient: A, B, C. Excessive: F, G, H". Be more fluid and use sentences like "Your levels are...while...".
+IMPORTANT: When mentioning nutrients, use the format "Full Name (Abbreviation)" - for example: Nitrogen (N), Phosphorus (P), Calcium (Ca), Magnesium (Mg), Potassium (K), Boron (B), Copper (Cu), Zinc (Zn), Iron (Fe), Manganese (Mn), Molybdenum (Mo), Sulphur (S), Sodium (Na).
 
-IMPORTANT: Start your analysis by explaining what "Total Available Elements (TAE)" means, then describe the current nutrient status. DO NOT include any management recommendations, fertilization strategies, or solutions. Focus ONLY on describing the current nutrient levels and their implications. Do not use phrases like "all other listed elements"; list only the nutrients that actually appear in the provided categories.
+Focus on:
+- Brief overview of nutritional status
+- Professional tone
+- Complete sentences and thoughts
+- No detailed nutrient analysis
+- Use bold formatting for nutrient names
+"""
+    return prompt
+
+
+def clean_plant_comment(summary):
+    """Remove any detailed nutrient descriptions that might still be generated."""
+    # Remove any text that contains detailed nutrient descriptions
+    cleaned = re.sub(r"(Nitrogen is essential for.*?)(?=\n\n|\n[A-Z]|$)", "", summary, flags=re.DOTALL)
+    cleaned = re.sub(r"(Phosphorus is necessary for.*?)(?=\n\n|\n[A-Z]|$)", "", cleaned, flags=re.DOTALL)
+    cleaned = re.sub(r"(Calcium is vital for.*?)(?=\n\n|\n[A-Z]|$)", "", cleaned, flags=re.DOTALL)
+    cleaned = re.sub(r"(Magnesium is a key component.*?)(?=\n\n|\n[A-Z]|$)", "", cleaned, flags=re.DOTALL)
+    cleaned = re.sub(r"(Copper, Zinc, Iron, and Boron.*?)(?=\n\n|\n[A-Z]|$)", "", cleaned, flags=re.DOTALL)
+    cleaned = re.sub(r"(The excess of.*?)(?=\n\n|\n[A-Z]|$)", "", cleaned, flags=re.DOTALL)
+    cleaned = re.sub(r"(To address these deficiencies.*?)(?=\n\n|\n[A-Z]|$)", "", cleaned, flags=re.DOTALL)
+    cleaned = re.sub(r"(With proper management.*?)(?=\n\n|\n[A-Z]|$)", "", cleaned, flags=re.DOTALL)
+    # Remove any extra blank lines
+    cleaned = re.sub(r"\n{3,}", "\n\n", cleaned)
+    return cleaned.strip()
+
+
+PLANT_COMMENT_MAX_TOKENS = 600
+
+
+def build_plant_comment(data):
+    """Executive summary for a Plant Therapy report, written by the LLM."""
+    prompt = plant_comment_prompt(data)
+    with llm_call('generate_comments'):
+        response = llm.create(
+            LLM_DEADLINE,
+            model=COMMENT_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=PLANT_COMMENT_MAX_TOKENS,
+            temperature=0.7
+        )
+    return clean_plant_comment(response.choices[0].message.content.strip())
 
-List ALL specific nutrients in each category rather than using general terms like "several nutrients" or "various nutrients". Write your response as ONE SINGLE PARAGRAPH, not multiple paragraphs.
 
-Provide a 2-3 sentence analysis focusing on:
-- Definition of Total Available Elements (TAE) and their significance for soil fertility and nutrient reserves
-- Current TAE levels across ALL categories (deficient, marginally deficient, optimal, marginally excessive, excessive) and their implications for nutrient availability and plant nutrition
+@app.route('/generate-comments', methods=['POST'])
+def generate_comments():
+    try:
+        if not client:
+            return jsonify({'error': 'OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.'}), 500
 
-NUTRIENT MENTION RULE: When mentioning multiple nutrients in the same category, use the format "Aluminium, Calcium, Magnesium, and Sodium are deficient" or "Potassium and Cobalt are marginally deficient". Always list nutrients in alphabetical order within each category.
+        data = request.get_json()
+        summary, hit = cached_comment('plant', data, build_plant_comment, regenerate_requested(data))
+        response = jsonify({'summary': summary})
+        response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
+    except Exception as e:
+        return llm_error_response(e)
 
-Use professional soil science terminology. Focus on describing the current situation only.
-"""
-        }
 
-        prompt = section_prompts.get(section, f"""
-As a professional soil scientist and agronomist, provide a BRIEF analysis for a Soil Therapy Report.
+# Approximate input tokens allowed per soil comment prompt; nutrient entries past it are left out
+SOIL_PROMPT_TOKEN_BUDGET = int(os.environ.get('SOIL_PROMPT_TOKEN_BUDGET', 2000))
 
-SECTION: {section}
-DEFICIENT: {', '.join(deficient) if deficient else 'None'}
-OPTIMAL: {', '.join(optimal) if optimal else 'None'}
-EXCESS: {', '.join(excess) if excess else 'None'}
 
-Provide a 2-3 sentence analysis focusing on soil health and fertility implications.
+def log_prompt_tokens(stats):
+    """Record a soil prompt's approximate size (log line, timing field and histogram)."""
+    section = stats['section'] if stats['section'] in soil_prompts.SECTIONS else 'other'
+    metrics.observe('soil_llm_prompt_tokens', stats['prompt_tokens'], section=section)
+    annotate(prompt_tokens=stats['prompt_tokens'])
+    log = app.logger.warning if stats['dropped'] or stats['over_budget'] else app.logger.info
+    log(json.dumps({'event': 'soil_prompt', **stats}))
 
-NUTRIENT MENTION RULE: When mentioning multiple nutrients in the same category, use the format "nutrients are deficient" or "nutrients are optimal". Always list nutrients in alphabetical order within each category.
 
-Use professional soil science terminology.
-""")
+def prepare_soil_comment(data):
+    """Return (section, summary, prompt) for a soil comment request.
 
-        # Debug logging
+    organicMatter and availableNutrients are rendered locally and come back
+    as the summary; for the other sections summary is None and prompt is
+    the LLM prompt to send.
+    """
+    section = data.get('section', '')
+    
+    # Check if data is in statusCategories format (from frontend)
+    status_categories = data.get('statusCategories', {})
+    if status_categories:
+        deficient = status_categories.get('deficient', [])
+        marginallyDeficient = status_categories.get('marginallyDeficient', [])
+        optimal = status_categories.get('optimal', [])
+        marginallyExcessive = status_categories.get('marginallyExcessive', [])
+        excess = status_categories.get('excess', [])
+    else:
+        # Fallback to direct format
+        deficient = data.get('deficient', [])
+        marginallyDeficient = data.get('marginallyDeficient', [])
+        optimal = data.get('optimal', [])
+        marginallyExcessive = data.get('marginallyExcessive', [])
+        excess = data.get('excess', [])
+        
+    nutrients_data = data.get('nutrients', [])
+
+    # Short-circuit organic matter to a deterministic, single-category response
+    if section == 'organicMatter':
+        def _has_om(name_list):
+            return any(isinstance(nm, str) and 'organic matter' in nm.lower() for nm in name_list or [])
+
+        if _has_om(excess):
+            category = 'Excessive'
+            impact = ('Very high organic matter increases moisture retention and can promote nitrogen immobilization, ' \
+                      'leading to slower mineral nitrogen release, cooler/wetter seedbeds, and reduced early vigor. ' \
+                      'It may also elevate biological oxygen demand, limiting aeration and root respiration in fine-textured or compacted soils.')
+            rec = ('Reduce additional organic inputs temporarily and prioritize mineral balance, structure, and aeration. ' \
+                   'Use shallow strategic cultivation, controlled traffic, and, where appropriate, calcium sources (e.g., gypsum) to improve flocculation and infiltration. ' \
+                   'Monitor mineral N supply closely during early growth stages and adjust starter programs accordingly.')
+        elif _has_om(marginallyExcessive):
+            category = 'Marginally excessive'
+            impact = ('Slightly elevated organic matter enhances water-holding capacity but can marginally increase N tie-up in cool or wet conditions, ' \
+                      'and may slow soil warming in early spring.')
+            rec = ('Moderate fresh organic inputs, maintain residue cover without overloading, and balance with readily available nitrogen when conditions are cool. ' \
+                   'Keep soil structure open through surface residue management and periodic calcium additions if sodicity/dispersion is present.')
+        elif _has_om(optimal):
+            category = 'Optimal'
+            impact = ('Organic matter at optimal levels supports nutrient cycling, microbial activity, stable aggregation, and resilient water dynamics, ' \
+                      'reducing compaction risk and improving root exploration and nutrient uptake.')
+            rec = ('Maintain current practices: return residues, diversify rotations, include cover crops where feasible, and apply quality composts/manures at maintenance rates. ' \
+                   'Avoid unnecessary tillage to preserve aggregates and biological habitat.')
+        elif _has_om(marginallyDeficient):
+            category = 'Marginally deficient'
+            impact = ('Slightly low organic matter reduces cation exchange capacity and microbial activity, ' \
+                      'lowering nutrient retention and shortening moisture availability between rain/irrigation events.')
+            rec = ('Increase organic inputs using cover crops (legume/grass mixes), high-quality composts, and manures; ' \
+                   'minimize disturbance and keep living roots in the system as much as possible to build carbon incrementally.')
+        elif _has_om(deficient):
+            category = 'Deficient'
+            impact = ('Low organic matter severely limits nutrient holding capacity, aggregate stability, and water retention, ' \
+                      'increasing susceptibility to crusting, compaction, drought stress, and nutrient loss.')
+            rec = ('Adopt a multi-year rebuild plan: intensive cover-cropping (include legumes where N is needed), strategic manure/compost additions, residue retention, ' \
+                   'and reduced tillage. Pair with balanced mineral nutrition to support biology and accelerate carbon accrual.')
+        else:
+            category = 'Unknown'
+            impact = 'Insufficient data to assess organic matter status.'
+            rec = 'Confirm measurements and targets to enable a clear recommendation.'
+
+        intro = "Organic matter represents the decomposed plant and animal materials in the soil, critical for soil health and fertility."
+        cat_sentence = (category.lower() if isinstance(category, str) else 'unclear')
+        status_line = f"The levels are {cat_sentence}."
+        return section, f"{intro} {status_line} {impact} {rec}", None
+    if section == 'availableNutrients':
+        # Deterministic renderer to avoid LLM misclassification
+        return section, soil_comments.render_available_nutrients(data), None
+
+    prompt, prompt_stats = soil_prompts.build_soil_prompt(section, data, SOIL_PROMPT_TOKEN_BUDGET)
+    log_prompt_tokens(prompt_stats)
+
+    # Debug logging
+    if DEBUG_DUMPS:
         print(f"DEBUG - Section: {section}")
         print(f"DEBUG - Deficient: {deficient}")
         print(f"DEBUG - Marginally Deficient: {marginallyDeficient}")
@@ -1445,69 +1319,387 @@ Use professional soil science terminology.
         print("=" * 50)
         print(prompt)
         print("=" * 50)
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=300,
-            temperature=0.7
-        )
-        summary = response.choices[0].message.content.strip()
-        
-        # Debug logging
+    return section, None, prompt
+
+
+def clean_soil_comment(summary, section):
+    """Clean up any overly detailed responses and remove bold markdown."""
+    cleaned = re.sub(r"\n{3,}", "\n\n", summary)
+    # Strip any markdown bolding from AI output for soil comments
+    cleaned = re.sub(r"\*\*(.*?)\*\*", r"\1", cleaned)
+    # Additional sanitation for specific sections
+    try:
+        if section == 'soilPh':
+            # Remove meta-negations like "no deficiencies or excesses" and "neither ... nor ..."
+            cleaned = re.sub(r",?\s*with no deficiencies or excess(?:es)?(?:\s*(?:observed|present))?", "", cleaned, flags=re.IGNORECASE)
+            cleaned = re.sub(r"\bno deficiencies or excess(?:es)?(?:\s*(?:observed|present))?\.?", "", cleaned, flags=re.IGNORECASE)
+            cleaned = re.sub(r"[^.]*\bneither\b[^.]*\bnor\b[^.]*\.\s*", "", cleaned, flags=re.IGNORECASE)
+            # Tidy leftover punctuation/spaces
+            cleaned = re.sub(r"\s+,", ",", cleaned)
+            cleaned = re.sub(r"\s{2,}", " ", cleaned).strip()
+    except Exception:
+        pass
+    # No debug echo; return only professional response
+    return cleaned.strip()
+
+
+SOIL_COMMENT_MAX_TOKENS = 300
+
+
+# How LLM soil sections are written: 'llm' (OpenAI), 'deterministic' (local renderers,
+# no OpenAI call) or 'fallback' (OpenAI with SOIL_COMMENT_LLM_TIMEOUT, local renderer on
+# timeout or error). Requests may pick a mode with a "mode" field.
+SOIL_COMMENT_MODES = ('llm', 'deterministic', 'fallback')
+SOIL_COMMENT_MODE = os.environ.get('SOIL_COMMENT_MODE', 'llm')
+SOIL_COMMENT_LLM_TIMEOUT = float(os.environ.get('SOIL_COMMENT_LLM_TIMEOUT', 8))
+
+
+def with_soil_comment_mode(data):
+    """The request body with its effective "mode" filled in (part of the cache key)."""
+    mode = data.get('mode') or SOIL_COMMENT_MODE
+    if mode not in SOIL_COMMENT_MODES:
+        raise ValueError(f'Unknown mode {mode!r}; expected one of {", ".join(SOIL_COMMENT_MODES)}')
+    return {**data, 'mode': mode}
+
+
+def soil_comment_needs_llm(data):
+    """True when the section can only be written by OpenAI in the request's mode."""
+    section = data.get('section', '')
+    if section in LOCAL_SOIL_SECTIONS:
+        return False
+    return data['mode'] == 'llm' or section not in soil_comments.RENDERERS
+
+
+def _render_locally(data):
+    """Deterministic summary when the mode (or a missing OpenAI client) calls for one, else None."""
+    section = data.get('section', '')
+    if section not in soil_comments.RENDERERS:
+        return None
+    if data['mode'] == 'deterministic' or (data['mode'] == 'fallback' and not client):
+        return soil_comments.render_section(section, data)
+    return None
+
+
+def soil_llm_deadline(data):
+    deadline = LLM_SECTION_DEADLINES.get(data.get('section', ''), LLM_DEADLINE)
+    if data['mode'] == 'fallback':
+        return min(deadline, SOIL_COMMENT_LLM_TIMEOUT)
+    return deadline
+
+
+def soil_comment_falls_back(data, error):
+    """True when a failed LLM call should be answered by the section's deterministic renderer."""
+    if data.get('section', '') not in soil_comments.RENDERERS:
+        return False
+    return data['mode'] == 'fallback' or isinstance(error, CircuitOpenError)
+
+
+def build_soil_comment(data):
+    """Summary text for one Soil Therapy report section (local or written by the LLM)."""
+    data = with_soil_comment_mode(data)
+    summary = _render_locally(data)
+    if summary is not None:
+        return summary
+    section, summary, prompt = prepare_soil_comment(data)
+    if summary is not None:
+        return summary
+    try:
+        with llm_call('generate_soil_comments', section):
+            response = llm.create(
+                soil_llm_deadline(data),
+                model=COMMENT_MODEL,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=SOIL_COMMENT_MAX_TOKENS,
+                temperature=0.7
+            )
+    except Exception as e:
+        if not soil_comment_falls_back(data, e):
+            raise
+        app.logger.warning(f'LLM comment for {section} failed ({e}); using the deterministic renderer')
+        metrics.inc('soil_comment_fallbacks_total', section=section)
+        return FallbackSummary(soil_comments.render_section(section, data))
+    summary = response.choices[0].message.content.strip()
+    
+    # Debug logging
+    if DEBUG_DUMPS:
         print(f"DEBUG - AI Response: {summary}")
-        
-        # Clean up any overly detailed responses and remove bold markdown
-        import re
-        cleaned = re.sub(r"\n{3,}", "\n\n", summary)
-        # Strip any markdown bolding from AI output for soil comments
-        cleaned = re.sub(r"\*\*(.*?)\*\*", r"\1", cleaned)
-        # Additional sanitation for specific sections
+    return clean_soil_comment(summary, section)
+
+
+@app.route('/generate-soil-comments', methods=['POST'])
+def generate_soil_comments():
+    try:
+        data = request.get_json()
+        annotate(section=data.get('section', ''))
         try:
-            if section == 'soilPh':
-                # Remove meta-negations like "no deficiencies or excesses" and "neither ... nor ..."
-                cleaned = re.sub(r",?\s*with no deficiencies or excess(?:es)?(?:\s*(?:observed|present))?", "", cleaned, flags=re.IGNORECASE)
-                cleaned = re.sub(r"\bno deficiencies or excess(?:es)?(?:\s*(?:observed|present))?\.?", "", cleaned, flags=re.IGNORECASE)
-                cleaned = re.sub(r"[^.]*\bneither\b[^.]*\bnor\b[^.]*\.\s*", "", cleaned, flags=re.IGNORECASE)
-                # Tidy leftover punctuation/spaces
-                cleaned = re.sub(r"\s+,", ",", cleaned)
-                cleaned = re.sub(r"\s{2,}", " ", cleaned).strip()
-        except Exception:
-            pass
-        # No debug echo; return only professional response
-        return jsonify({'summary': cleaned.strip()})
+            data = with_soil_comment_mode(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        if not client and soil_comment_needs_llm(data):
+            return jsonify({'error': 'OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.'}), 500
+
+        summary, hit = cached_comment('soil', data, build_soil_comment, regenerate_requested(data))
+        response = jsonify({'summary': summary})
+        response.headers['X-Cache'] = 'HIT' if hit else 'MISS'
+        return response
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return llm_error_response(e)
+
+
+# Multi-section soil commentary: local sections are rendered inline and the LLM
+# sections of one request run concurrently, at most SOIL_COMMENT_CONCURRENCY at a time
+SOIL_COMMENT_CONCURRENCY = int(os.environ.get('SOIL_COMMENT_CONCURRENCY', 4))
+SOIL_COMMENT_SECTIONS = ('organicMatter', 'cec', 'soilPh', 'baseSaturation', 'availableNutrients',
+                         'lamotteReams', 'tae')
+LOCAL_SOIL_SECTIONS = frozenset(['organicMatter', 'availableNutrients'])
+
+
+def soil_section_requests(data):
+    """Expand a multi-section request into one /generate-soil-comments body per section.
+
+    `sections` lists section names, or objects shaped like a single-section
+    request body ({section, nutrients, statusCategories}); it defaults to every
+    report section. Top-level nutrients and statusCategories cover the whole
+    report: a section that does not bring its own gets them narrowed to its
+    nutrients (soil_comments.narrow_to_section).
+    """
+    defaults = {key: data[key] for key in ('nutrients', 'statusCategories', 'mode') if key in data}
+    bodies = []
+    for item in data.get('sections') or SOIL_COMMENT_SECTIONS:
+        if isinstance(item, str):
+            item = {'section': item}
+        if not isinstance(item, dict) or not isinstance(item.get('section'), str) or not item['section']:
+            raise ValueError('Each entry of "sections" must be a section name or an object with a "section"')
+        inherited = soil_comments.narrow_to_section(
+            item['section'], {key: value for key, value in defaults.items() if key not in item})
+        bodies.append(with_soil_comment_mode({**inherited, **item}))
+    return bodies
+
+
+def _soil_section_comment(body, regenerate):
+    start = time.perf_counter()
+    try:
+        summary, hit = cached_comment('soil', body, build_soil_comment, regenerate)
+        return {'summary': summary, 'cache': 'HIT' if hit else 'MISS'}
+    except Exception as e:
+        app.logger.error(f"Soil comment for section {body['section']} failed: {e}")
+        return {'error': str(e)}
+    finally:
+        metrics.observe('soil_comment_section_duration_seconds', time.perf_counter() - start,
+                        section=body['section'])
+
+
+@app.route('/generate-soil-comments/batch', methods=['POST'])
+def generate_soil_comments_batch():
+    """Summaries for several soil report sections in one call.
+
+    Returns {"sections": {section: {"summary", "cache"} or {"error"}}}; a
+    failing section does not fail the others.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    try:
+        bodies = soil_section_requests(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    regenerate = regenerate_requested(data)
+    annotate(sections=len(bodies))
+
+    results = {}
+    llm_bodies = []
+    for body in bodies:
+        if body['section'] in LOCAL_SOIL_SECTIONS or body['mode'] == 'deterministic':
+            results[body['section']] = _soil_section_comment(body, regenerate)
+        elif not client and soil_comment_needs_llm(body):
+            results[body['section']] = {'error': 'OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.'}
+        else:
+            llm_bodies.append(body)
+    if llm_bodies:
+        workers = max(1, min(SOIL_COMMENT_CONCURRENCY, len(llm_bodies)))
+        with stage('llm_fanout'), ThreadPoolExecutor(max_workers=workers, thread_name_prefix='soil-comment') as pool:
+            for body, result in zip(llm_bodies, pool.map(lambda b: _soil_section_comment(b, regenerate), llm_bodies)):
+                results[body['section']] = result
+    return jsonify({'sections': {body['section']: results[body['section']] for body in bodies}})
+
+
+def stream_completion(prompt, max_tokens, endpoint, section='', deadline=LLM_DEADLINE):
+    """Yield the text deltas of a streamed chat completion as they arrive.
+
+    The deadline covers opening the stream (retries included), not reading it.
+    """
+    start = time.perf_counter()
+    with llm_call(endpoint, section):
+        stream = llm.create(
+            deadline,
+            model=COMMENT_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            max_tokens=max_tokens,
+            temperature=0.7,
+            stream=True
+        )
+        try:
+            first = True
+            for chunk in stream:
+                text = chunk.choices[0].delta.content if chunk.choices else None
+                if not text:
+                    continue
+                if first:
+                    metrics.observe('soil_llm_first_token_seconds', time.perf_counter() - start,
+                                    endpoint=endpoint, section=section)
+                    first = False
+                yield text
+        finally:
+            # Client went away mid-stream: stop reading from OpenAI as well
+            response = getattr(stream, 'response', None)
+            if response is not None:
+                response.close()
+
+
+def _sse(event, payload):
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+
+def comment_event_stream(kind, data, endpoint, section, prepare, max_tokens, clean, regenerate=False,
+                         deadline=LLM_DEADLINE, fallback=None):
+    """Server-Sent Events response for a comment request.
+
+    Emits `delta` events with the raw LLM text as it arrives, then one `done`
+    event whose summary is the sanitised, assembled text (clients replace
+    the streamed text with it), or an `error` event. prepare() returns
+    (summary, prompt) like prepare_soil_comment; cached and locally rendered
+    summaries arrive as a single `done` event. If the LLM fails before any
+    text was streamed, fallback(error) (when given) may supply the summary.
+    """
+    key = comment_cache_key(kind, data) if COMMENT_CACHE_SIZE > 0 else None
+
+    def generate():
+        try:
+            if key and not regenerate:
+                cached = comment_cache.get(key)
+                if cached is not None:
+                    metrics.inc('soil_cache_requests_total', cache=f'{kind}_comments', result='hit')
+                    yield _sse('done', {'summary': cached, 'cache': 'HIT'})
+                    return
+            summary, prompt = prepare()
+            if summary is None:
+                parts = []
+                try:
+                    for text in stream_completion(prompt, max_tokens, endpoint, section, deadline):
+                        parts.append(text)
+                        yield _sse('delta', {'text': text})
+                except Exception as e:
+                    summary = fallback(e) if fallback is not None and not parts else None
+                    if summary is None:
+                        raise
+                    app.logger.warning(f'Streaming {endpoint} failed ({e}); using the deterministic renderer')
+                    metrics.inc('soil_comment_fallbacks_total', section=section)
+                    yield _sse('done', {'summary': summary, 'cache': 'MISS', 'fallback': True})
+                    return
+                summary = clean(''.join(parts).strip())
+            if key and summary:
+                comment_cache.set(key, summary)
+                metrics.inc('soil_cache_requests_total', cache=f'{kind}_comments', result='miss')
+            yield _sse('done', {'summary': summary, 'cache': 'MISS'})
+        except Exception as e:
+            app.logger.error(f'Streaming {endpoint} failed: {e}')
+            yield _sse('error', {'error': str(e)})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/generate-comments/stream', methods=['POST'])
+def generate_comments_stream():
+    """Streaming (SSE) variant of /generate-comments."""
+    if not client:
+        return jsonify({'error': 'OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.'}), 500
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    return comment_event_stream(
+        'plant', data, 'generate_comments', '',
+        prepare=lambda: (None, plant_comment_prompt(data)),
+        max_tokens=PLANT_COMMENT_MAX_TOKENS,
+        clean=clean_plant_comment,
+        regenerate=regenerate_requested(data))
+
+
+@app.route('/generate-soil-comments/stream', methods=['POST'])
+def generate_soil_comments_stream():
+    """Streaming (SSE) variant of /generate-soil-comments."""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    section = data.get('section', '')
+    annotate(section=section)
+    try:
+        data = with_soil_comment_mode(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if not client and soil_comment_needs_llm(data):
+        return jsonify({'error': 'OpenAI API key not configured. Please set OPENAI_API_KEY environment variable.'}), 500
+
+    def prepare():
+        summary = _render_locally(data)
+        if summary is not None:
+            return summary, None
+        return prepare_soil_comment(data)[1:]
+
+    def fallback(error):
+        if soil_comment_falls_back(data, error):
+            return soil_comments.render_section(section, data)
+        return None
+
+    return comment_event_stream(
+        'soil', data, 'generate_soil_comments', section,
+        prepare=prepare,
+        max_tokens=SOIL_COMMENT_MAX_TOKENS,
+        clean=lambda text: clean_soil_comment(text, section),
+        regenerate=regenerate_requested(data),
+        deadline=soil_llm_deadline(data),
+        fallback=fallback)
+
+
+# Upstream AI comments (/api/proxy/get-ai-comments): pooled connections, a real timeout and
+# a short per-worker cache revalidated with ETag / Last-Modified once UPSTREAM_CACHE_TTL passes
+upstream_comments = UpstreamCommentsClient(
+    os.environ.get('UPSTREAM_API_BASE', 'https://nutrition.ntsgrow.com'),
+    timeout=float(os.environ.get('UPSTREAM_TIMEOUT', 10)),
+    ttl=float(os.environ.get('UPSTREAM_CACHE_TTL', 60)),
+    max_entries=int(os.environ.get('UPSTREAM_CACHE_SIZE', 256)),
+    stale_if_error=float(os.environ.get('UPSTREAM_STALE_IF_ERROR', 300)),
+    max_connections=int(os.environ.get('UPSTREAM_MAX_CONNECTIONS', 20)),
+)
 
 
 @app.route('/api/proxy/get-ai-comments/<report_ref_id>', methods=['GET'])
 def proxy_get_ai_comments(report_ref_id):
     """Proxy endpoint to fetch AI comments from external API to avoid CORS issues"""
+    key = request.args.get('key', '')
     try:
-        key = request.args.get('key', '')
-        
-        # Build the external API URL
-        external_url = f'https://nutrition.ntsgrow.com/api/downloadable-charts-pdfs/{report_ref_id}/get_ai_comments/?key={urllib.parse.quote(key)}'
-        # external_url = f'http://localhost:8000/api/downloadable-charts-pdfs/{report_ref_id}/get_ai_comments/?key={urllib.parse.quote(key)}'
-        
-        # Make the request to the external API
-        req = urllib.request.Request(external_url, method='GET')
-        req.add_header('User-Agent', 'Mozilla/5.0')
-        
-        with urllib.request.urlopen(req, timeout=30000) as response:
-            data = json.loads(response.read().decode('utf-8'))
-            return jsonify(data), response.status
-    except urllib.error.HTTPError as e:
-        error_body = e.read().decode('utf-8') if e.fp else 'Unknown error'
-        try:
-            error_data = json.loads(error_body)
-            return jsonify(error_data), e.code
-        except:
-            return jsonify({'error': error_body}), e.code
+        with stage('upstream'):
+            entry, cache = upstream_comments.get(report_ref_id, key)
+    except httpx.TimeoutException:
+        return jsonify({'error': 'Timed out waiting for the comments API'}), 504
+    except httpx.TransportError as e:
+        return jsonify({'error': f'Comments API unreachable: {e}'}), 502
     except Exception as e:
         return jsonify({'error': str(e)}), 500
+    metrics.inc('soil_cache_requests_total', cache='upstream_comments', result=cache.lower())
+    annotate(cache=cache.lower())
+    if entry['data'] is not None:
+        response = jsonify(entry['data'])
+    else:
+        response = jsonify({'error': entry['text'] or 'Unknown error'})
+    response.headers['X-Cache'] = cache
+    status = entry['status']
+    if status == 200 and entry['data'] is None:
+        status = 502
+    return response, status
 
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
+    start_job_maintenance()
     app.run(host='0.0.0.0', port=port, debug=True)
@@ -0,0 +1,185 @@
+"""Extraction benchmarks on the bundled Soil/Plant Therapy sample reports.
+
+Times the table extraction, nutrient overview and analysis info stages, the
+full /extract-soil-report handler (through the Flask test client, with the
+extraction cache cleared before every run) and extract_reports from
+plant_nutritional_deviation_score_2.py, plus its text parsing stage
+(parse_reports) on its own next to the previous parser
+(parse_reports_previous, from reference_plant_parser.py) on the same text,
+so the two can be compared directly. Each case records the median wall
+and CPU time over --repeat runs and the peak traced Python memory of one
+extra run.
+
+    python benchmarks/bench_extraction.py --save-baseline   # record a baseline
+    python benchmarks/bench_extraction.py --margin 0.25      # exit 1 on regression
+
+Baselines are machine specific: record one on the machine you compare on.
+"""
+import argparse
+import glob
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, REPO_DIR)
+# Never touch the host's real job database from a benchmark run
+os.environ.setdefault('JOB_DB_PATH', os.path.join(tempfile.mkdtemp(prefix='bench-jobs-'), 'jobs.sqlite3'))
+
+import app as backend  # noqa: E402
+from pdf_document import parse_pdf_document  # noqa: E402
+from result_cache import content_key  # noqa: E402
+import fitz  # noqa: E402
+from plant_nutritional_deviation_score_2 import extract_reports, parse_reports  # noqa: E402
+from reference_plant_parser import parse_reports_previous  # noqa: E402
+
+SOIL_PDFS = sorted(glob.glob(os.path.join(REPO_DIR, 'Soil Therapy _ NTS G.R.O.W*.pdf')))
+PLANT_PDFS = sorted(glob.glob(os.path.join(REPO_DIR, 'Plant Therapy _ NTS G.R.O.W*.pdf')))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+METRICS = ('wall_s', 'cpu_s', 'peak_mib')
+
+
+def _cases():
+    """Yield (case name, setup) where setup() returns the zero-argument callable to time."""
+    client = backend.app.test_client()
+    for path in SOIL_PDFS:
+        name = os.path.basename(path)
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        yield f'extract_tables_with_pdfplumber[{name}]', lambda path=path: (
+            lambda: backend.extract_tables_with_pdfplumber(path))
+
+        def overview(path=path):
+            document = parse_pdf_document(path)
+            return lambda: backend.extract_nutrient_overview(document)
+        yield f'extract_nutrient_overview[{name}]', overview
+
+        def analysis_info(path=path):
+            tables = parse_pdf_document(path).tables
+
+            def run():
+                index = backend.TableMetadataIndex(tables)
+                return [backend.extract_analysis_info(tables, idx, index) for idx in range(len(tables))]
+            return run
+        yield f'extract_analysis_info[{name}]', analysis_info
+
+        def handler(data=data, name=name):
+            key = content_key(data, backend.EXTRACTION_PARSER_VERSION)
+
+            def run():
+                backend.extraction_cache.delete(key)
+                response = client.post('/extract-soil-report',
+                                       data={'file': (io.BytesIO(data), name)})
+                if response.status_code != 200:
+                    raise RuntimeError(f'{name}: HTTP {response.status_code}')
+                return response
+            return run
+        yield f'/extract-soil-report[{name}]', handler
+
+    for path in PLANT_PDFS:
+        yield f'extract_reports[{os.path.basename(path)}]', lambda path=path: (
+            lambda: extract_reports(path))
+
+        def parse(path=path, parser=parse_reports):
+            with fitz.open(path) as doc:
+                text = '\n'.join(page.get_text() for page in doc)
+            # The reference is only a fair comparison while both parse the same readings
+            if parse_reports_previous(text) != parse_reports(text):
+                raise RuntimeError(f'{path}: parse_reports and the previous parser disagree')
+            return lambda: parser(text)
+        yield f'parse_reports[{os.path.basename(path)}]', parse
+        yield f'parse_reports_previous[{os.path.basename(path)}]', (
+            lambda parse=parse: parse(parser=parse_reports_previous))
+
+
+def measure(fn, repeat):
+    walls, cpus = [], []
+    fn()  # warm up imports and caches outside the measurement
+    for _ in range(repeat):
+        wall, cpu = time.perf_counter(), time.process_time()
+        fn()
+        walls.append(time.perf_counter() - wall)
+        cpus.append(time.process_time() - cpu)
+    # Separate run: tracing allocations slows the code down too much to time it
+    tracemalloc.start()
+    try:
+        fn()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'wall_s': statistics.median(walls), 'cpu_s': statistics.median(cpus),
+            'peak_mib': peak / 2**20}
+
+
+def compare(results, baseline, margin, min_seconds, min_mib):
+    """Return a list of regression messages (metric worse than baseline by more than margin)."""
+    regressions = []
+    for case, current in results.items():
+        previous = baseline.get(case)
+        if not previous:
+            continue
+        for metric in METRICS:
+            old, new = previous.get(metric), current[metric]
+            if old is None:
+                continue
+            # Sub-millisecond timings and tiny allocations are mostly noise
+            if max(old, new) < (min_mib if metric == 'peak_mib' else min_seconds):
+                continue
+            if new > old * (1 + margin):
+                regressions.append(f'{case}: {metric} {old:.4f} -> {new:.4f} (+{(new / old - 1) * 100:.0f}%)')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', default=os.environ.get('BENCH_BASELINE', DEFAULT_BASELINE))
+    parser.add_argument('--margin', type=float, default=float(os.environ.get('BENCH_MARGIN', 0.25)),
+                        help='allowed slowdown / memory growth as a fraction (default 0.25)')
+    parser.add_argument('--min-seconds', type=float, default=0.001,
+                        help='ignore timing changes when both runs are faster than this')
+    parser.add_argument('--min-mib', type=float, default=0.5,
+                        help='ignore memory changes when both runs peak below this')
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('-k', dest='filter', help='only run cases whose name contains this')
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'Case':<75} {'wall ms':>9} {'cpu ms':>9} {'peak MiB':>9}")
+    for case, setup in _cases():
+        if args.filter and args.filter not in case:
+            continue
+        result = measure(setup(), args.repeat)
+        results[case] = result
+        print(f"{case[:75]:<75} {result['wall_s'] * 1000:>9.1f} {result['cpu_s'] * 1000:>9.1f} "
+              f"{result['peak_mib']:>9.1f}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f'Baseline written to {args.baseline}')
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline}; run with --save-baseline to record one')
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.margin, args.min_seconds, args.min_mib)
+    for message in regressions:
+        print(f'REGRESSION {message}')
+    if regressions:
+        return 1
+    print(f'No regressions beyond {args.margin:.0%} of {args.baseline}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+"""Load test: PDF extraction latency while comment requests wait on a slow LLM.
+
+Starts the fake OpenAI server (devtools/fake_openai.py) answering every chat
+completion after --llm-delay seconds and a gunicorn server (gunicorn.conf.py) pointed at it
+with OPENAI_BASE_URL, caches disabled. It then uploads a sample soil report
+from --extract-clients threads, first alone and then alongside
+--comment-clients threads posting /generate-soil-comments, and compares the
+extraction latency percentiles of the two phases.
+
+    python benchmarks/bench_load.py                          # gthread workers (gunicorn.conf.py)
+    python benchmarks/bench_load.py --worker-class sync      # the old sync setup, for comparison
+
+Exits 1 when the loaded extraction p99 exceeds --max-slowdown times the idle p99.
+"""
+import argparse
+import glob
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+from devtools.fake_openai import start_fake_openai  # noqa: E402
+
+SOIL_PDFS = sorted(glob.glob(os.path.join(REPO_DIR, 'Soil Therapy _ NTS G.R.O.W*.pdf')))
+
+COMMENT_BODY = {
+    'section': 'cec',
+    'mode': 'llm',
+    'regenerate': True,
+    'nutrients': [{'name': 'CEC', 'current': 13.29, 'unit': 'cmol/kg'}],
+    'statusCategories': {'optimal': ['CEC']},
+}
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(port, llm_url, worker_class, workers):
+    env = dict(os.environ,
+               OPENAI_API_KEY='load-test', OPENAI_BASE_URL=llm_url,
+               EXTRACTION_CACHE_SIZE='0', EXTRACTION_CACHE_DIR='',
+               COMMENT_CACHE_SIZE='0', COMMENT_CACHE_DIR='',
+               REQUEST_TIMING='0', METRICS_DIR='',
+               JOB_DB_PATH=os.path.join(tempfile.mkdtemp(prefix='bench-jobs-'), 'jobs.sqlite3'))
+    command = [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py',
+               '--bind', f'127.0.0.1:{port}', '--workers', str(workers)]
+    if worker_class:
+        command += ['--worker-class', worker_class]
+    if worker_class == 'sync':
+        # gunicorn runs "sync" with threads > 1 as gthread
+        command += ['--threads', '1']
+    process = subprocess.Popen(command + ['app:app'], cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base = f'http://127.0.0.1:{port}'
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'{base}/metrics', timeout=1).read()
+            return process, base
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError('gunicorn exited during startup')
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn did not start within 30s')
+
+
+def _post(url, body, content_type, timeout=120):
+    req = urllib.request.Request(url, data=body, method='POST', headers={'Content-Type': content_type})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        e.read()
+        status = e.code
+    return status, time.perf_counter() - start
+
+
+def upload(base, pdf):
+    # A unique trailing comment gives every upload its own content hash, so nothing is coalesced
+    boundary = uuid.uuid4().hex
+    data = pdf + f'\n%load-{uuid.uuid4().hex}\n'.encode()
+    body = (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="report.pdf"\r\n'
+            f'Content-Type: application/pdf\r\n\r\n').encode() + data + f'\r\n--{boundary}--\r\n'.encode()
+    return _post(f'{base}/extract-soil-report', body, f'multipart/form-data; boundary={boundary}')
+
+
+def comment(base):
+    return _post(f'{base}/generate-soil-comments', json.dumps(COMMENT_BODY).encode(), 'application/json')
+
+
+def run_clients(clients, duration):
+    """Run (name, fn, threads) clients for `duration` seconds; {name: [(status, seconds)]}."""
+    results = {name: [] for name, _, _ in clients}
+    stop = time.time() + duration
+
+    def loop(name, fn):
+        while time.time() < stop:
+            results[name].append(fn())
+
+    threads = [threading.Thread(target=loop, args=(name, fn))
+               for name, fn, count in clients for _ in range(count)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def percentile(values, pct):
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def summarize(label, samples):
+    ok = [seconds for status, seconds in samples if status == 200]
+    statuses = {}
+    for status, _ in samples:
+        statuses[status] = statuses.get(status, 0) + 1
+    print(f"{label:<28} n={len(samples):<5} p50={percentile(ok, 50) * 1000:>8.0f}ms "
+          f"p95={percentile(ok, 95) * 1000:>8.0f}ms p99={percentile(ok, 99) * 1000:>8.0f}ms "
+          f"mean={(statistics.mean(ok) if ok else float('nan')) * 1000:>8.0f}ms status={statuses}")
+    return percentile(ok, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=float, default=20, help='seconds per phase')
+    parser.add_argument('--extract-clients', type=int, default=2)
+    parser.add_argument('--comment-clients', type=int, default=12)
+    parser.add_argument('--llm-delay', type=float, default=3.0, help='stub LLM response time (seconds)')
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--worker-class', help='override gunicorn.conf.py (e.g. sync)')
+    parser.add_argument('--max-slowdown', type=float, default=2.0,
+                        help='allowed loaded / idle extraction p99 ratio (default 2.0)')
+    parser.add_argument('--pdf', default=SOIL_PDFS[0] if SOIL_PDFS else None)
+    args = parser.parse_args()
+
+    with open(args.pdf, 'rb') as f:
+        pdf = f.read()
+    stub = start_fake_openai(delay=args.llm_delay)
+    process, base = start_gunicorn(_free_port(), stub.base_url, args.worker_class, args.workers)
+    try:
+        upload(base, pdf)  # warm up imports in a worker
+        print(f"gunicorn {args.worker_class or 'gthread (gunicorn.conf.py)'} x{args.workers}, "
+              f"LLM delay {args.llm_delay:.1f}s, {args.duration:.0f}s per phase")
+        idle = run_clients([('extract', lambda: upload(base, pdf), args.extract_clients)], args.duration)
+        idle_p99 = summarize('extract (idle)', idle['extract'])
+        loaded = run_clients([('extract', lambda: upload(base, pdf), args.extract_clients),
+                              ('comment', lambda: comment(base), args.comment_clients)], args.duration)
+        loaded_p99 = summarize('extract (with comments)', loaded['extract'])
+        summarize('generate-soil-comments', loaded['comment'])
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+        stub.shutdown()
+
+    ratio = loaded_p99 / idle_p99
+    print(f'Extraction p99 ratio under comment load: {ratio:.2f} (limit {args.max_slowdown:.2f})')
+    return 0 if ratio <= args.max_slowdown else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""Microbenchmark for the soil table classifier on the bundled sample reports.
+
+Parses each sample PDF once, then times classify_table and parse_soil_table
+per table and prints the mean cost per table kind, next to the mean cost of
+the parsing it replaced (reference_table_parser.py) on the same tables.
+
+    python benchmarks/bench_table_classifier.py [--repeat 200] [pdf ...]
+"""
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPO_DIR = os.path.dirname(BACKEND_DIR)
+sys.path.insert(0, BACKEND_DIR)
+
+from pdf_document import parse_pdf_document  # noqa: E402
+from soil_tables import classify_table, parse_soil_table  # noqa: E402
+from reference_table_parser import parse_soil_table_previous  # noqa: E402
+
+SAMPLE_PDFS = sorted(glob.glob(os.path.join(REPO_DIR, '*Therapy _ NTS G.R.O.W*.pdf')))
+
+
+def time_per_call(fn, table, repeat, log):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(table, log)
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_tables(tables, repeat, log):
+    """Return {kind: [(new, previous) seconds per table]} over `repeat` runs of every table."""
+    costs = defaultdict(list)
+    for table in tables:
+        layout = classify_table(table)
+        kind = layout.kind if layout else 'skipped'
+        if parse_soil_table(table) != parse_soil_table_previous(table, log):
+            raise RuntimeError(f'parse_soil_table and the previous parser disagree on a {kind} table')
+        costs[kind].append((time_per_call(parse_soil_table, table, repeat, log),
+                            time_per_call(parse_soil_table_previous, table, repeat, log)))
+    return costs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('pdfs', nargs='*', default=SAMPLE_PDFS)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    # Time the parsing, not the log formatting of every row
+    log = logging.getLogger('bench_table_classifier')
+    log.disabled = True
+
+    print(f"{'File':<55} {'Kind':<10} {'Tables':>6} {'Rows':>6} {'us/table':>10} {'previous':>10} {'speedup':>8}")
+    for path in args.pdfs:
+        tables = parse_pdf_document(path).tables
+        costs = bench_tables(tables, args.repeat, log)
+        rows = defaultdict(int)
+        for table in tables:
+            layout = classify_table(table)
+            rows[layout.kind if layout else 'skipped'] += len(table)
+        for kind, per_table in sorted(costs.items()):
+            mean_us = sum(new for new, _ in per_table) / len(per_table) * 1e6
+            previous_us = sum(old for _, old in per_table) / len(per_table) * 1e6
+            print(f"{os.path.basename(path)[:55]:<55} {kind:<10} {len(per_table):>6} {rows[kind]:>6} "
+                  f"{mean_us:>10.1f} {previous_us:>10.1f} {previous_us / mean_us:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
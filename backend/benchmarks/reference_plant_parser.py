@@ -0,0 +1,77 @@
+"""The Plant Therapy text parser as it was before the single-pass tokenizer.
+
+Kept unchanged (apart from taking the text instead of the PDF path) so
+bench_extraction.py can time it next to parse_reports on the same text.
+Do not use it outside the benchmarks.
+"""
+import re
+
+EXPECTED_NUTRIENTS = [
+    "N - Nitrogen", "P - Phosphorus", "K - Potassium", "S - Sulphur",
+    "Ca - Calcium", "Mg - Magnesium", "Na - Sodium", "Cu - Copper",
+    "Zn - Zinc", "Mn - Manganese", "Fe - Iron", "B - Boron",
+    "Mo - Molybdenum", "Si - Silicon", "Co - Cobalt"
+]
+
+
+def parse_reports_previous(text):
+    raw_sections = text.split("PADDOCK:")
+    reports = []
+
+    for section in raw_sections[1:]:
+        lines = section.splitlines()
+
+        paddock = next((line.strip() for line in lines if line.strip()), "Unknown")
+        paddock = paddock.replace("\u201c", "\"").replace("\u201d", "\"").replace("\u2013", "-")
+
+        actual_values = []
+        i = 0
+        while i < len(lines):
+            line = lines[i].strip()
+            if any(n in line for n in EXPECTED_NUTRIENTS):
+                nutrient = line
+                j = i + 1
+                while j < len(lines):
+                    val_line = lines[j].strip()
+                    try:
+                        value = float(val_line)
+                        actual_values.append((nutrient, value))
+                        break
+                    except ValueError:
+                        j += 1
+                i = j
+            else:
+                i += 1
+
+        actual_values = actual_values[:15]
+
+        if "Plant TherapyTM" not in section:
+            print(f"⚠️ Skipping paddock '{paddock}' – no ideal range block.")
+            continue
+
+        range_block = section.split("Plant TherapyTM")[1]
+        range_lines = range_block.splitlines()
+        range_values = []
+        for line in range_lines:
+            line = line.strip()
+            if "N/A" in line:
+                continue
+            match = re.match(r"(\d+\.?\d*)\s*-\s*(\d+\.?\d*)", line)
+            if match:
+                range_values.append((float(match.group(1)), float(match.group(2))))
+
+        if len(range_values) == 0:
+            print(f"⚠️ Skipping paddock '{paddock}' – no usable ranges found.")
+            continue
+
+        nutrients = [
+            {"Nutrient": label, "Actual": actual, "Min": min_val, "Max": max_val}
+            for (label, actual), (min_val, max_val) in zip(actual_values[:len(range_values)], range_values)
+        ]
+
+        reports.append({
+            "paddock": paddock,
+            "nutrients": nutrients
+        })
+
+    return reports
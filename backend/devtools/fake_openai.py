@@ -0,0 +1,172 @@
+"""Local stand-in for the OpenAI chat completions API.
+
+Point the backend at it with OPENAI_BASE_URL=http://127.0.0.1:<port>/v1 (and
+any OPENAI_API_KEY) to exercise deadlines, retries, hedging and the circuit
+breaker without calling OpenAI:
+
+    python devtools/fake_openai.py --port 8089 --delay 2 --fail-rate 0.2
+
+Behaviour can be changed while it runs by POSTing any of the settings below
+as JSON to /_fake/config; GET /_fake/stats returns the request counts.
+
+    delay       seconds before answering (plus a random 0..jitter)
+    jitter      extra random delay, seconds
+    fail_rate   share of requests answered with fail_status
+    fail_next   answer this many upcoming requests with fail_status
+    fail_status HTTP status of failed requests (default 500)
+    slow_next   answer this many upcoming requests after slow_delay seconds instead
+    slow_delay  delay of the slow_next requests
+    reply       completion text (streamed word by word when stream=true)
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULTS = {
+    'delay': 0.0,
+    'jitter': 0.0,
+    'fail_rate': 0.0,
+    'fail_next': 0,
+    'fail_status': 500,
+    'slow_next': 0,
+    'slow_delay': 5.0,
+    'reply': 'Stub soil comment from the fake OpenAI server.',
+}
+
+
+class FakeOpenAIServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, **config):
+        super().__init__(address, FakeOpenAIHandler)
+        self.config = dict(DEFAULTS, **config)
+        self.stats = {'requests': 0, 'failed': 0, 'streamed': 0}
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        return f'http://{self.server_address[0]}:{self.server_address[1]}/v1'
+
+    def configure(self, **config):
+        with self.lock:
+            self.config.update(config)
+
+    def next_outcome(self):
+        """(delay, failure status or None) for the next completion request."""
+        with self.lock:
+            config = self.config
+            self.stats['requests'] += 1
+            delay = config['delay'] + random.uniform(0, config['jitter'])
+            if config['slow_next'] > 0:
+                config['slow_next'] -= 1
+                delay = config['slow_delay']
+            status = None
+            if config['fail_next'] > 0:
+                config['fail_next'] -= 1
+                status = config['fail_status']
+            elif random.random() < config['fail_rate']:
+                status = config['fail_status']
+            if status is not None:
+                self.stats['failed'] += 1
+            return delay, status
+
+    def handle_error(self, request, client_address):
+        # Clients that give up on a slow answer close the connection mid-write
+        pass
+
+
+class FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        if self.path == '/_fake/stats':
+            with self.server.lock:
+                return self._json(200, dict(self.server.stats))
+        self._json(404, {'error': {'message': 'Not found'}})
+
+    def do_POST(self):
+        payload = self._read_json()
+        if self.path == '/_fake/config':
+            self.server.configure(**payload)
+            return self._json(200, self.server.config)
+        if not self.path.endswith('/chat/completions'):
+            return self._json(404, {'error': {'message': 'Not found'}})
+        delay, status = self.server.next_outcome()
+        time.sleep(delay)
+        if status is not None:
+            return self._json(status, {'error': {'message': 'Injected failure', 'type': 'fake_error'}})
+        reply = self.server.config['reply']
+        if payload.get('stream'):
+            return self._stream(reply)
+        self._json(200, {
+            'id': 'chatcmpl-fake', 'object': 'chat.completion', 'created': int(time.time()),
+            'model': payload.get('model', 'fake'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': reply}}],
+            'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+        })
+
+    def _stream(self, reply):
+        with self.server.lock:
+            self.server.stats['streamed'] += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        words = reply.split(' ')
+        for i, word in enumerate(words):
+            chunk = {'id': 'chatcmpl-fake', 'object': 'chat.completion.chunk', 'created': int(time.time()),
+                     'model': 'fake',
+                     'choices': [{'index': 0, 'finish_reason': None,
+                                  'delta': {'content': word if i == 0 else f' {word}'}}]}
+            self.wfile.write(f'data: {json.dumps(chunk)}\n\n'.encode())
+            self.wfile.flush()
+        self.wfile.write(b'data: [DONE]\n\n')
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fake_openai(host='127.0.0.1', port=0, **config):
+    """Start a FakeOpenAIServer in a background thread; stop it with server.shutdown()."""
+    server = FakeOpenAIServer((host, port), **config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--delay', type=float, default=DEFAULTS['delay'])
+    parser.add_argument('--jitter', type=float, default=DEFAULTS['jitter'])
+    parser.add_argument('--fail-rate', type=float, default=DEFAULTS['fail_rate'])
+    parser.add_argument('--fail-status', type=int, default=DEFAULTS['fail_status'])
+    args = parser.parse_args()
+    server = FakeOpenAIServer((args.host, args.port), delay=args.delay, jitter=args.jitter,
+                              fail_rate=args.fail_rate, fail_status=args.fail_status)
+    print(f'Fake OpenAI API on {server.base_url} (set OPENAI_BASE_URL to this)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
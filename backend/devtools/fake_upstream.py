@@ -0,0 +1,154 @@
+"""Local stand-in for the upstream AI comments API behind /api/proxy/get-ai-comments.
+
+Point the backend at it with UPSTREAM_API_BASE=http://127.0.0.1:<port>:
+
+    python devtools/fake_upstream.py --port 8090 --delay 0.5
+
+It answers GET /api/downloadable-charts-pdfs/<report_ref_id>/get_ai_comments/?key=...
+with a comments payload carrying ETag and Last-Modified, and returns 304 to a
+matching If-None-Match or If-Modified-Since. POST JSON settings to
+/_fake/config while it runs (delay, fail_next, fail_status, version: bump it
+to change every payload); GET /_fake/stats returns the request counts.
+"""
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+import urllib.parse
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+COMMENTS_PATH = re.compile(r'^/api/downloadable-charts-pdfs/([^/]+)/get_ai_comments/?$')
+
+DEFAULTS = {
+    'delay': 0.0,
+    'fail_next': 0,
+    'fail_status': 503,
+    'version': 1,
+}
+
+
+class FakeUpstreamServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, **config):
+        super().__init__(address, FakeUpstreamHandler)
+        self.config = dict(DEFAULTS, **config)
+        self.stats = {'requests': 0, 'not_modified': 0, 'failed': 0}
+        self.lock = threading.Lock()
+        # Last-Modified of each payload version
+        self.modified = {}
+
+    @property
+    def base_url(self):
+        return f'http://{self.server_address[0]}:{self.server_address[1]}'
+
+    def configure(self, **config):
+        with self.lock:
+            self.config.update(config)
+
+    def handle_error(self, request, client_address):
+        pass
+
+
+def comments_payload(report_ref_id, key, version):
+    return {
+        'report_ref_id': report_ref_id,
+        'closest_key': key,
+        'ai_comments': {
+            'combined_nutrients_explanation':
+                f'Stand-in comments for {report_ref_id} / {key} (version {version}).',
+        },
+        'form_data': {'nutrient_deficient': 'Calcium,Boron', 'nutrient_excess': 'Sodium'},
+    }
+
+
+class FakeUpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def _send(self, status, body=b'', headers=()):
+        self.send_response(status)
+        for name, value in headers:
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, status, payload, headers=()):
+        self._send(status, json.dumps(payload).encode(), [('Content-Type', 'application/json'), *headers])
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        payload = json.loads(self.rfile.read(length) or b'{}')
+        if self.path != '/_fake/config':
+            return self._json(404, {'detail': 'Not found.'})
+        self.server.configure(**payload)
+        self._json(200, self.server.config)
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == '/_fake/stats':
+            with self.server.lock:
+                return self._json(200, dict(self.server.stats))
+        match = COMMENTS_PATH.match(url.path)
+        if not match:
+            return self._json(404, {'detail': 'Not found.'})
+        report_ref_id = urllib.parse.unquote(match.group(1))
+        key = urllib.parse.parse_qs(url.query).get('key', [''])[0]
+
+        server = self.server
+        with server.lock:
+            server.stats['requests'] += 1
+            config = server.config
+            delay, version = config['delay'], config['version']
+            status = None
+            if config['fail_next'] > 0:
+                config['fail_next'] -= 1
+                status = config['fail_status']
+                server.stats['failed'] += 1
+            last_modified = server.modified.setdefault(version, formatdate(time.time(), usegmt=True))
+        time.sleep(delay)
+        if status is not None:
+            return self._json(status, {'detail': 'Injected failure'})
+
+        if not key:
+            return self._json(404, {'detail': 'No comments for this key.'})
+        body = json.dumps(comments_payload(report_ref_id, key, version)).encode()
+        etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+        validators = [('ETag', etag), ('Last-Modified', last_modified)]
+        if self.headers.get('If-None-Match') == etag or (
+                'If-None-Match' not in self.headers and self.headers.get('If-Modified-Since') == last_modified):
+            with server.lock:
+                server.stats['not_modified'] += 1
+            return self._send(304, headers=validators)
+        self._send(200, body, [('Content-Type', 'application/json'), *validators])
+
+    def log_message(self, *args):
+        pass
+
+
+def start_fake_upstream(host='127.0.0.1', port=0, **config):
+    """Start a FakeUpstreamServer in a background thread; stop it with server.shutdown()."""
+    server = FakeUpstreamServer((host, port), **config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--delay', type=float, default=DEFAULTS['delay'])
+    args = parser.parse_args()
+    server = FakeUpstreamServer((args.host, args.port), delay=args.delay)
+    print(f'Fake comments API on {server.base_url} (set UPSTREAM_API_BASE to this)')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
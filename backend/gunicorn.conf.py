@@ -0,0 +1,25 @@
+"""Gunicorn settings: gunicorn --config gunicorn.conf.py app:app
+
+Threaded (gthread) workers, so a request waiting on OpenAI or the upstream
+comments API holds one thread rather than a whole worker and PDF extraction
+keeps being served. The route groups in app.py bound how many threads the
+slow routes may take; keep LLM_ROUTE_CONCURRENCY + PROXY_ROUTE_CONCURRENCY
+below GUNICORN_THREADS.
+"""
+import os
+
+# Railway, Render and Heroku assign the port through PORT
+bind = os.environ.get('GUNICORN_BIND') or f"0.0.0.0:{os.environ.get('PORT', 8000)}"
+workers = int(os.environ.get('GUNICORN_WORKERS', 3))
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.environ.get('GUNICORN_THREADS', 12))
+# Seconds without a worker heartbeat before it is restarted; large OCR uploads can run long
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+
+def post_worker_init(worker):
+    # Each worker heartbeats its jobs and resumes orphaned ones, even before its first job request
+    import app
+    app.start_job_maintenance()
@@ -0,0 +1,154 @@
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from flask import Response, g, has_request_context, request
+
+from metrics import MetricsRegistry
+
+# Bulk dumps of table rows, OCR text and LLM prompts; off unless explicitly enabled
+DEBUG_DUMPS = os.environ.get('DEBUG_DUMPS', '0') == '1'
+# Per-stage timing (Server-Timing header and one structured log line per request)
+REQUEST_TIMING = os.environ.get('REQUEST_TIMING', '1') == '1'
+# Requests publish this worker's metrics for the others at most this often (seconds)
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1))
+
+# Shared by every gunicorn worker when METRICS_DIR is set (clear it when the service starts)
+metrics = MetricsRegistry(os.environ.get('METRICS_DIR') or None)
+metrics.counter('soil_http_requests_total', 'Requests handled, by endpoint, method and status.')
+metrics.histogram('soil_http_request_duration_seconds', 'Request latency by endpoint.')
+metrics.gauge('soil_http_requests_in_flight', 'Requests currently being handled, by endpoint.')
+metrics.counter('soil_http_rejected_total', 'Requests answered with 429 because their route group was full.')
+metrics.histogram('soil_stage_duration_seconds', 'Latency of pipeline stages (pdf_parse, tables, ocr, llm, ...).')
+metrics.histogram('soil_comment_section_duration_seconds', 'Soil comment request latency by section.')
+metrics.histogram('soil_llm_request_duration_seconds', 'OpenAI call latency by endpoint and section.')
+metrics.histogram('soil_llm_first_token_seconds', 'Time to the first streamed token by endpoint and section.')
+metrics.histogram('soil_llm_prompt_tokens', 'Approximate input tokens of soil comment prompts by section.',
+                  buckets=(250, 500, 750, 1000, 1250, 1500, 2000, 3000, 4000, 8000))
+metrics.counter('soil_llm_errors_total', 'Failed OpenAI calls by endpoint and section.')
+metrics.counter('soil_llm_retries_total', 'OpenAI call attempts after the first one.')
+metrics.counter('soil_llm_hedged_requests_total', 'Hedged OpenAI calls by the request that answered first (primary or hedge).')
+metrics.counter('soil_llm_circuit_opened_total', 'Times the OpenAI circuit breaker opened.')
+metrics.counter('soil_llm_circuit_rejections_total', 'OpenAI calls skipped because the circuit breaker was open.')
+metrics.counter('soil_comment_fallbacks_total', 'Soil comments served by the deterministic renderer after an LLM failure.')
+metrics.counter('soil_ocr_fallbacks_total', 'Extractions that fell back to OCR (scope: document or pages).')
+metrics.counter('soil_ocr_pages_total', 'Pages rasterized and run through tesseract.')
+metrics.counter('soil_cache_requests_total', 'Cache lookups by cache and result (hit or miss).')
+
+
+@contextmanager
+def stage(name):
+    """Time a named pipeline stage.
+
+    The duration goes to the stage histogram and, inside a request, to its
+    Server-Timing header, where repeated stages with the same name are summed.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, (time.perf_counter() - start) * 1000)
+
+
+def record_stage(name, duration_ms):
+    metrics.observe('soil_stage_duration_seconds', duration_ms / 1000, stage=name)
+    if not REQUEST_TIMING or not has_request_context():
+        return
+    stages = g.setdefault('stage_timings', {})
+    stages[name] = stages.get(name, 0.0) + duration_ms
+
+
+def annotate(**fields):
+    """Attach extra fields (cache hit, page count, section, ...) to the request's timing log line."""
+    if not has_request_context():
+        return
+    g.setdefault('timing_fields', {}).update(fields)
+
+
+@contextmanager
+def llm_call(endpoint, section=''):
+    """Time an OpenAI call as the 'llm' stage and count it if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        metrics.inc('soil_llm_errors_total', endpoint=endpoint, section=section)
+        raise
+    finally:
+        duration_ms = (time.perf_counter() - start) * 1000
+        record_stage('llm', duration_ms)
+        metrics.observe('soil_llm_request_duration_seconds', duration_ms / 1000,
+                        endpoint=endpoint, section=section)
+
+
+def server_timing_header(stages, total_ms):
+    parts = [f'{name};dur={duration:.1f}' for name, duration in stages.items()]
+    parts.append(f'total;dur={total_ms:.1f}')
+    return ', '.join(parts)
+
+
+def _endpoint_label():
+    # Unrouted paths (404s, scanners) share one label to keep the series count bounded
+    return request.endpoint or 'unmatched'
+
+
+def render_metrics():
+    metrics.flush()
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app):
+    """Time every request: Server-Timing header, one log line and the /metrics endpoint."""
+    log_level = os.environ.get('LOG_LEVEL')
+    if log_level:
+        app.logger.setLevel(log_level.upper())
+    app.add_url_rule('/metrics', 'metrics', render_metrics, methods=['GET'])
+
+    @app.before_request
+    def _start_request_timer():
+        g.request_started = time.perf_counter()
+        g.metrics_endpoint = _endpoint_label()
+        metrics.inc('soil_http_requests_in_flight', endpoint=g.metrics_endpoint)
+
+    @app.teardown_request
+    def _end_request(exc):
+        endpoint = g.get('metrics_endpoint')
+        if endpoint is not None:
+            # Teardown runs after streamed bodies finish, so the gauge covers the whole response
+            metrics.inc('soil_http_requests_in_flight', -1, endpoint=endpoint)
+            # Rate limited: a full snapshot per request is too costly on the hot routes. The job
+            # maintenance loop flushes periodically, and /metrics flushes its own worker first.
+            metrics.flush_if_older(METRICS_FLUSH_INTERVAL)
+
+    @app.after_request
+    def _report_request_timing(response):
+        started = g.get('request_started')
+        if started is None:
+            return response
+        total_ms = (time.perf_counter() - started) * 1000
+        endpoint = g.metrics_endpoint
+        metrics.inc('soil_http_requests_total', endpoint=endpoint, method=request.method,
+                    status=response.status_code)
+        metrics.observe('soil_http_request_duration_seconds', total_ms / 1000, endpoint=endpoint)
+        section = g.get('timing_fields', {}).get('section')
+        if section is not None:
+            metrics.observe('soil_comment_section_duration_seconds', total_ms / 1000, section=section)
+        if not REQUEST_TIMING:
+            return response
+        stages = g.get('stage_timings', {})
+        response.headers['Server-Timing'] = server_timing_header(stages, total_ms)
+        if app.logger.isEnabledFor(logging.INFO):
+            line = {
+                'event': 'request',
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'duration_ms': round(total_ms, 1),
+                'stages': {name: round(duration, 1) for name, duration in stages.items()},
+            }
+            line.update(g.get('timing_fields', {}))
+            app.logger.info(json.dumps(line))
+        return response
@@ -0,0 +1,179 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress REAL NOT NULL DEFAULT 0,
+    message TEXT,
+    filename TEXT,
+    input BLOB,
+    result TEXT,
+    error TEXT,
+    owner TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, updated_at);
+'''
+
+
+class JobStore:
+    """Background job state in a local SQLite file.
+
+    Every gunicorn worker opens the same database, so a job submitted to one
+    worker can be polled through any other, and queued or interrupted jobs
+    (with their uploaded input) survive a restart.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._init_lock = threading.Lock()
+        self._initialised = False
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        if not self._initialised:
+            with self._init_lock:
+                if not self._initialised:
+                    conn.execute('PRAGMA journal_mode=WAL')
+                    conn.executescript(_SCHEMA)
+                    self._initialised = True
+        return conn
+
+    def _execute(self, sql, params=()):
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute(sql, params).rowcount
+        finally:
+            conn.close()
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def create(self, kind, filename, data):
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        self._execute(
+            'INSERT INTO jobs (id, kind, status, filename, input, created_at, updated_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (job_id, kind, JOB_QUEUED, filename, sqlite3.Binary(data), now, now))
+        return job_id
+
+    def claim(self, job_id, owner):
+        """Atomically move a queued job to running for `owner`; False if someone else has it."""
+        now = time.time()
+        return self._execute(
+            'UPDATE jobs SET status = ?, owner = ?, attempts = attempts + 1, '
+            'updated_at = ?, heartbeat_at = ? WHERE id = ? AND status = ?',
+            (JOB_RUNNING, owner, now, now, job_id, JOB_QUEUED)) == 1
+
+    def load_input(self, job_id):
+        conn = self._connect()
+        try:
+            row = conn.execute('SELECT kind, filename, input FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return row['kind'], row['filename'], bytes(row['input']) if row['input'] is not None else None
+
+    def update_progress(self, job_id, progress, message=None):
+        now = time.time()
+        self._execute(
+            'UPDATE jobs SET progress = ?, message = ?, updated_at = ?, heartbeat_at = ? '
+            'WHERE id = ? AND status = ?',
+            (progress, message, now, now, job_id, JOB_RUNNING))
+
+    def heartbeat(self, owner):
+        """Mark every job `owner` is running as still alive."""
+        self._execute('UPDATE jobs SET heartbeat_at = ? WHERE owner = ? AND status = ?',
+                      (time.time(), owner, JOB_RUNNING))
+
+    def finish(self, job_id, result):
+        self._execute(
+            'UPDATE jobs SET status = ?, progress = 1, message = NULL, result = ?, input = NULL, '
+            'updated_at = ? WHERE id = ?',
+            (JOB_DONE, json.dumps(result), time.time(), job_id))
+
+    def fail(self, job_id, error, result=None):
+        self._execute(
+            'UPDATE jobs SET status = ?, message = NULL, error = ?, result = ?, input = NULL, '
+            'updated_at = ? WHERE id = ?',
+            (JOB_FAILED, error, json.dumps(result) if result is not None else None,
+             time.time(), job_id))
+
+    def requeue_stale(self, stale_after, max_attempts):
+        """Requeue running jobs whose owner stopped heartbeating (crash or restart).
+
+        Jobs that have already been attempted max_attempts times are failed
+        instead, so a PDF that kills its worker cannot loop forever.
+        Returns the ids of the requeued jobs.
+        """
+        cutoff = time.time() - stale_after
+        conn = self._connect()
+        try:
+            with conn:
+                rows = conn.execute(
+                    'SELECT id, attempts FROM jobs WHERE status = ? AND heartbeat_at < ?',
+                    (JOB_RUNNING, cutoff)).fetchall()
+                requeued = []
+                for row in rows:
+                    if row['attempts'] >= max_attempts:
+                        conn.execute(
+                            'UPDATE jobs SET status = ?, error = ?, input = NULL, updated_at = ? '
+                            'WHERE id = ? AND status = ?',
+                            (JOB_FAILED, 'Job was interrupted too many times', time.time(),
+                             row['id'], JOB_RUNNING))
+                    elif conn.execute(
+                            'UPDATE jobs SET status = ?, owner = NULL, updated_at = ? '
+                            'WHERE id = ? AND status = ? AND heartbeat_at < ?',
+                            (JOB_QUEUED, time.time(), row['id'], JOB_RUNNING, cutoff)).rowcount:
+                        requeued.append(row['id'])
+                return requeued
+        finally:
+            conn.close()
+
+    def queued_before(self, cutoff):
+        """Ids of jobs still queued since before `cutoff` (their submitting worker went away)."""
+        conn = self._connect()
+        try:
+            rows = conn.execute('SELECT id FROM jobs WHERE status = ? AND updated_at < ? ORDER BY created_at',
+                                (JOB_QUEUED, cutoff)).fetchall()
+        finally:
+            conn.close()
+        return [row['id'] for row in rows]
+
+    def purge(self, older_than):
+        """Delete finished jobs last updated more than `older_than` seconds ago."""
+        return self._execute('DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?',
+                             (JOB_DONE, JOB_FAILED, time.time() - older_than))
+
+    def get(self, job_id):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                'SELECT id, kind, status, progress, message, filename, result, error, '
+                'attempts, created_at, updated_at FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        job = dict(row)
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
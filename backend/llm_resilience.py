@@ -0,0 +1,202 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import openai
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """OpenAI was not called because the circuit breaker is open."""
+
+
+class LLMDeadlineExceeded(TimeoutError):
+    """The call's deadline passed before OpenAI answered."""
+
+
+class CircuitBreaker:
+    """Stops calling a failing provider for `reset_after` seconds.
+
+    Opens after `failure_threshold` consecutive failed calls. Once the
+    pause is over a single probe call is let through (half open): success
+    closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_after=30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def allow(self):
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and self._clock() - self._opened_at >= self.reset_after:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        """Count a failed call; True when this failure opened the circuit."""
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = self._clock()
+                return True
+            return False
+
+
+class LatencyWindow:
+    """Latencies of the most recent successful calls, for the hedging threshold."""
+
+    def __init__(self, size=200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, pct, min_samples):
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+def is_retryable(error):
+    """Timeouts, connection failures, rate limits and 5xx responses are worth another attempt."""
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, LLMDeadlineExceeded)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in (408, 409, 429) or error.status_code >= 500
+    return False
+
+
+def provider_answered(error):
+    """A 4xx answer (bad request, auth, ...) means OpenAI is up; it does not count against the breaker."""
+    return isinstance(error, openai.APIStatusError) and not is_retryable(error)
+
+
+class ResilientLLM:
+    """Chat completions with a deadline, jittered retries, optional hedging and a circuit breaker.
+
+    create(deadline, **kwargs) takes the arguments of
+    client.chat.completions.create. Every attempt gets the time left until
+    the deadline as its httpx timeout (the client's own retries are turned
+    off), failed attempts are retried after a random backoff of up to
+    retry_backoff * 2**attempt seconds while time remains, and with
+    hedge_percentile set a second identical request is sent when the first
+    has not answered within that percentile of recent latencies; the first
+    answer wins. Streaming calls are retried until the stream opens but not
+    hedged. on_event(name, **labels) is told about retries, hedges and
+    breaker decisions.
+    """
+
+    def __init__(self, client, breaker, attempts=2, retry_backoff=0.5, hedge_percentile=0,
+                 hedge_min_samples=20, max_hedge_threads=8, on_event=None):
+        self.client = client
+        self.breaker = breaker
+        self.attempts = max(1, attempts)
+        self.retry_backoff = retry_backoff
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_samples = hedge_min_samples
+        self.latencies = LatencyWindow()
+        self._on_event = on_event or (lambda name, **labels: None)
+        self._hedge_pool = None
+        if hedge_percentile:
+            self._hedge_pool = ThreadPoolExecutor(max_workers=max_hedge_threads, thread_name_prefix='llm-hedge')
+
+    def create(self, deadline, **kwargs):
+        if not self.breaker.allow():
+            self._on_event('circuit_rejections')
+            raise CircuitOpenError('OpenAI circuit breaker is open; skipping the call')
+        expires = time.monotonic() + deadline
+        error = None
+        for attempt in range(self.attempts):
+            remaining = expires - time.monotonic()
+            if remaining <= 0:
+                break
+            if attempt:
+                self._on_event('retries')
+            try:
+                response = self._attempt(kwargs, expires)
+            except Exception as e:
+                error = e
+                if provider_answered(e):
+                    self.breaker.record_success()
+                    raise
+                if not is_retryable(e):
+                    break
+                pause = random.uniform(0, self.retry_backoff * 2 ** attempt)
+                time.sleep(max(0.0, min(pause, expires - time.monotonic())))
+                continue
+            self.breaker.record_success()
+            return response
+        if self.breaker.record_failure():
+            self._on_event('circuit_opened')
+        if error is None or isinstance(error, (LLMDeadlineExceeded, openai.APITimeoutError)):
+            raise LLMDeadlineExceeded(f'No answer from OpenAI within {deadline:g}s') from error
+        raise error
+
+    def _call(self, kwargs, timeout):
+        start = time.monotonic()
+        response = self.client.with_options(timeout=timeout, max_retries=0).chat.completions.create(**kwargs)
+        if not kwargs.get('stream'):
+            self.latencies.add(time.monotonic() - start)
+        return response
+
+    def _attempt(self, kwargs, expires):
+        remaining = expires - time.monotonic()
+        threshold = None
+        if self._hedge_pool is not None and not kwargs.get('stream'):
+            threshold = self.latencies.percentile(self.hedge_percentile, self.hedge_min_samples)
+        if threshold is None or threshold >= remaining:
+            return self._call(kwargs, remaining)
+
+        primary = self._hedge_pool.submit(self._call, kwargs, remaining)
+        done, _ = wait([primary], timeout=threshold)
+        if done:
+            return primary.result()
+        hedge = self._hedge_pool.submit(self._call, kwargs, expires - time.monotonic())
+        pending = {primary, hedge}
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, expires - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    # The slower request is left to finish (or time out) in its thread
+                    self._on_event('hedged_requests', winner='primary' if future is primary else 'hedge')
+                    return future.result()
+                error = future.exception()
+        if error is not None and not pending:
+            raise error
+        raise LLMDeadlineExceeded('No answer from OpenAI before the deadline')
@@ -0,0 +1,178 @@
+import bisect
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+COUNTER = 'counter'
+GAUGE = 'gauge'
+HISTOGRAM = 'histogram'
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class MetricsRegistry:
+    """Counters, gauges and histograms rendered in the Prometheus text format.
+
+    Each gunicorn worker keeps its own values in memory. With a ``directory``
+    every worker also writes a snapshot to ``<directory>/<pid>.json`` and a
+    scrape of any worker merges all snapshots, so the numbers cover the whole
+    service. Counters and histograms of workers that have exited keep
+    counting; their gauges (in-flight requests) are dropped.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._meta = {}
+        self._values = {}
+        self._flushed_at = 0.0
+
+    def _register(self, name, kind, help_text, buckets=None):
+        self._meta[name] = (kind, help_text, tuple(buckets) if buckets else None)
+
+    def counter(self, name, help_text):
+        self._register(name, COUNTER, help_text)
+
+    def gauge(self, name, help_text):
+        self._register(name, GAUGE, help_text)
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self._register(name, HISTOGRAM, help_text, buckets)
+
+    def inc(self, name, value=1, **labels):
+        """Add to a counter, or to a gauge (use a negative value to decrease it)."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        buckets = self._meta[name][2]
+        key = (name, _label_key(labels))
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # Per-bucket counts (the last one is +Inf), then sum
+                entry = self._values[key] = [0] * (len(buckets) + 1) + [0.0]
+            entry[bisect.bisect_left(buckets, value)] += 1
+            entry[-1] += value
+
+    def _snapshot(self):
+        with self._lock:
+            return [[name, [list(pair) for pair in labels],
+                     list(value) if isinstance(value, list) else value]
+                    for (name, labels), value in self._values.items()]
+
+    def flush(self):
+        """Write this worker's values for the other workers' scrapes."""
+        if not self.directory:
+            return
+        self._flushed_at = time.monotonic()
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._snapshot(), f)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+    def flush_if_older(self, interval):
+        """flush() unless this worker flushed less than `interval` seconds ago."""
+        if self.directory and time.monotonic() - self._flushed_at >= interval:
+            self.flush()
+
+    def _snapshots(self):
+        """(entries, process alive) for this worker and every worker that has flushed."""
+        yield self._snapshot(), True
+        if not self.directory:
+            return
+        own = f'{os.getpid()}.json'
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json') or filename == own:
+                continue
+            try:
+                with open(os.path.join(self.directory, filename)) as f:
+                    entries = json.load(f)
+                pid = int(filename[:-len('.json')])
+            except (OSError, ValueError):
+                continue
+            yield entries, _pid_alive(pid)
+
+    def collect(self):
+        """Merge all workers' values into {(name, labels): value}."""
+        merged = {}
+        for entries, alive in self._snapshots():
+            for name, labels, value in entries:
+                meta = self._meta.get(name)
+                if meta is None or (meta[0] == GAUGE and not alive):
+                    continue
+                key = (name, tuple(tuple(pair) for pair in labels))
+                if isinstance(value, list):
+                    current = merged.get(key)
+                    merged[key] = value if current is None else [a + b for a, b in zip(current, value)]
+                else:
+                    merged[key] = merged.get(key, 0) + value
+        return merged
+
+    def render(self):
+        merged = self.collect()
+        by_name = {}
+        for (name, labels), value in merged.items():
+            by_name.setdefault(name, []).append((labels, value))
+        lines = []
+        for name, (kind, help_text, buckets) in self._meta.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(by_name.get(name, [])):
+                if kind != HISTOGRAM:
+                    lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + (math.inf,), value[:-1]):
+                    cumulative += count
+                    le = (('le', _format_value(bound)),)
+                    lines.append(f'{name}_bucket{_format_labels(labels, le)} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value[-1])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,75 @@
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytesseract
+
+try:
+    import fcntl
+except ImportError:  # Windows dev servers: cap is per process only
+    fcntl = None
+
+
+class TesseractSlots:
+    """Caps the number of tesseract processes running at once on this host.
+
+    Each slot is a lock file in ``slot_dir``; holding an exclusive flock on one
+    of them is the right to run a tesseract process. All gunicorn workers use
+    the same directory, so the cap holds across processes. Without fcntl the
+    cap falls back to a per-process semaphore.
+    """
+
+    def __init__(self, max_procs, slot_dir=None, poll_interval=0.05):
+        self.max_procs = max(1, max_procs)
+        self.poll_interval = poll_interval
+        self._semaphore = threading.BoundedSemaphore(self.max_procs)
+        self.slot_dir = None
+        if fcntl is not None:
+            self.slot_dir = slot_dir or os.path.join(tempfile.gettempdir(), 'soil-ocr-slots')
+            os.makedirs(self.slot_dir, exist_ok=True)
+
+    def acquire(self):
+        # The semaphore keeps this process's threads from spinning on the same slots
+        self._semaphore.acquire()
+        if self.slot_dir is None:
+            return None
+        while True:
+            for slot in range(self.max_procs):
+                fd = os.open(os.path.join(self.slot_dir, f'slot-{slot}.lock'),
+                             os.O_CREAT | os.O_RDWR, 0o644)
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    return fd
+                except OSError:
+                    os.close(fd)
+            time.sleep(self.poll_interval)
+
+    def release(self, fd):
+        try:
+            if fd is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+        finally:
+            self._semaphore.release()
+
+
+def ocr_image(image, slots=None):
+    """Run tesseract on one image, holding a host-wide slot while it runs."""
+    if slots is None:
+        return pytesseract.image_to_string(image)
+    fd = slots.acquire()
+    try:
+        return pytesseract.image_to_string(image)
+    finally:
+        slots.release(fd)
+
+
+def ocr_images(images, workers=1, slots=None):
+    """OCR images concurrently, returning their texts in the original page order."""
+    if workers <= 1 or len(images) <= 1:
+        return [ocr_image(image, slots) for image in images]
+    with ThreadPoolExecutor(max_workers=min(workers, len(images))) as pool:
+        # tesseract runs in its own process, so threads are enough to overlap pages
+        return list(pool.map(lambda image: ocr_image(image, slots), images))
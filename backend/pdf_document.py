@@ -0,0 +1,194 @@
+import io
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pdfplumber
+
+
+class PdfPage:
+    """Text, tables and size of a single parsed PDF page."""
+
+    __slots__ = ('number', 'text', 'tables', 'width', 'height')
+
+    def __init__(self, number, text, tables, width=None, height=None):
+        self.number = number
+        self.text = text
+        self.tables = tables
+        self.width = width
+        self.height = height
+
+
+class PdfDocument:
+    """A PDF parsed once per request.
+
+    Holds the raw upload bytes (for the OCR fallback), the document metadata
+    and the per-page text and tables, so every extraction stage reads from the
+    same parse instead of re-opening the file.
+    """
+
+    def __init__(self, data, pages, metadata=None, peak_rss=None):
+        self.data = data
+        self.pages = pages
+        self.metadata = metadata or {}
+        # Highest resident set size (bytes) sampled while the pages were parsed
+        self.peak_rss = peak_rss
+
+    @property
+    def page_count(self):
+        return len(self.pages)
+
+    @property
+    def tables(self):
+        # Flattened in page order, matching the table indices used by extract_analysis_info
+        return [table for page in self.pages for table in page.tables]
+
+    @property
+    def text(self):
+        # Same shape as concatenating every non-empty page text followed by a newline
+        return ''.join(page.text + '\n' for page in self.pages if page.text)
+
+
+def read_upload_bytes(file):
+    """Return the bytes of an uploaded file, a file-like object or a path."""
+    if isinstance(file, (bytes, bytearray)):
+        return bytes(file)
+    if hasattr(file, 'read'):
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        return file.read()
+    with open(file, 'rb') as f:
+        return f.read()
+
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where unavailable."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+        # Lifetime peak rather than current size, in KiB on Linux and bytes on macOS
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def _release_page(page):
+    """Drop the layout objects pdfplumber cached while reading the page."""
+    if hasattr(page, 'close'):
+        page.close()
+    else:
+        # pdfplumber < 0.11 has no Page.close(); same effect through its public methods
+        page.flush_cache()
+        page.get_textmap.cache_clear()
+
+
+def _parse_pages(pdf, on_page=None):
+    """Parse pages one at a time, keeping only their compact text and tables.
+
+    Returns (pages, peak_rss). Each page's layout objects are released as soon
+    as it has been read, so memory stays flat as the page count grows.
+    """
+    pages = []
+    peak_rss = current_rss()
+    page_count = len(pdf.pages)
+    for page in pdf.pages:
+        # Tables and text share the page's parsed layout objects
+        tables = page.extract_tables()
+        text = page.extract_text()
+        pages.append(PdfPage(page.page_number, text, tables,
+                             float(page.width), float(page.height)))
+        rss = current_rss()
+        if rss is not None and (peak_rss is None or rss > peak_rss):
+            peak_rss = rss
+        _release_page(page)
+        if on_page:
+            on_page(len(pages), page_count)
+    return pages, peak_rss
+
+
+def _parse_page_range(data, first_page, last_page):
+    """Process-pool task: parse pages first_page..last_page (1-based, inclusive)."""
+    with pdfplumber.open(io.BytesIO(data), pages=list(range(first_page, last_page + 1))) as pdf:
+        return _parse_pages(pdf)
+
+
+_page_pool = None
+_page_pool_workers = 0
+_page_pool_lock = threading.Lock()
+
+
+def _get_page_pool(workers):
+    global _page_pool, _page_pool_workers
+    with _page_pool_lock:
+        if _page_pool is None or _page_pool_workers != workers:
+            if _page_pool is not None:
+                _page_pool.shutdown(wait=False)
+            # spawn rather than fork: the web worker may be multi-threaded
+            _page_pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+            _page_pool_workers = workers
+        return _page_pool
+
+
+def _reset_page_pool(pool):
+    global _page_pool
+    with _page_pool_lock:
+        if _page_pool is pool:
+            _page_pool = None
+    pool.shutdown(wait=False)
+
+
+def _page_chunks(page_count, chunks):
+    """Split 1..page_count into at most `chunks` contiguous (first, last) ranges."""
+    chunks = max(1, min(chunks, page_count))
+    size, extra = divmod(page_count, chunks)
+    ranges = []
+    first = 1
+    for i in range(chunks):
+        last = first + size - 1 + (1 if i < extra else 0)
+        ranges.append((first, last))
+        first = last + 1
+    return ranges
+
+
+def parse_pdf_document(file, workers=0, min_pages=4, on_page=None):
+    """Parse a PDF once, extracting tables and text from every page.
+
+    With ``workers`` > 1 and at least ``min_pages`` pages, contiguous page
+    ranges are parsed concurrently in a shared process pool. Pages come back
+    in document order either way, so flattened table indices are unchanged.
+    on_page(pages_done, page_count) is called as pages finish.
+    """
+    data = read_upload_bytes(file)
+    with pdfplumber.open(io.BytesIO(data)) as pdf:
+        metadata = dict(pdf.metadata or {})
+        page_count = len(pdf.pages)
+        if workers <= 1 or page_count < min_pages:
+            pages, peak_rss = _parse_pages(pdf, on_page)
+            return PdfDocument(data, pages, metadata, peak_rss)
+
+    pool = _get_page_pool(workers)
+    try:
+        futures = [pool.submit(_parse_page_range, data, first, last)
+                   for first, last in _page_chunks(page_count, workers)]
+        pages = []
+        peak_rss = current_rss()
+        for future in futures:
+            chunk_pages, chunk_rss = future.result()
+            pages.extend(chunk_pages)
+            if on_page:
+                on_page(len(pages), page_count)
+            # Pool processes run alongside this one, so their peaks add to the request's
+            if chunk_rss is not None and peak_rss is not None:
+                peak_rss += chunk_rss
+    except BrokenProcessPool:
+        # A pool process died (e.g. OOM-killed); rebuild the pool next time and parse here
+        _reset_page_pool(pool)
+        return parse_pdf_document(data, workers=0, on_page=on_page)
+    return PdfDocument(data, pages, metadata, peak_rss)
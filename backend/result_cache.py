@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError:  # Windows dev servers: no cross-process coalescing
+    fcntl = None
+
+
+def content_key(data, version):
+    """Cache key for an upload: parser version plus the SHA-256 of its bytes."""
+    return f"v{version}-{hashlib.sha256(data).hexdigest()}"
+
+
+class ResultCache:
+    """Bounded LRU of JSON-serializable results with an optional on-disk tier.
+
+    The in-memory tier is per process. When ``cache_dir`` is set, entries are
+    also written there as JSON files so every gunicorn worker on the host can
+    reuse them, and concurrent computations of the same key are coalesced
+    across workers with a lock file. Within a process, callers asking for a
+    key that is already being computed wait for that computation and share
+    its result (or exception) instead of starting their own.
+    """
+
+    def __init__(self, max_entries=64, cache_dir=None, max_disk_entries=1000, ttl=None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _expired(self, stored_at):
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.json')
+
+    def _get_memory(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if self._expired(stored_at):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def _set_memory(self, key, value, stored_at):
+        with self._lock:
+            self._entries[key] = (stored_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _get_disk(self, key):
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if self._expired(entry.get('stored_at', 0)):
+            self._remove(path)
+            return None
+        try:
+            # Touch so disk eviction is least-recently-used rather than oldest-written
+            os.utime(path, None)
+        except OSError:
+            pass
+        return entry['stored_at'], entry['value']
+
+    def _set_disk(self, key, value, stored_at):
+        if not self.cache_dir:
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump({'stored_at': stored_at, 'value': value}, f)
+            os.replace(tmp_path, self._path(key))
+        except (OSError, TypeError, ValueError):
+            self._remove(tmp_path)
+            return
+        self._evict_disk()
+
+    def _evict_disk(self):
+        try:
+            names = [n for n in os.listdir(self.cache_dir) if n.endswith('.json')]
+        except OSError:
+            return
+        if len(names) <= self.max_disk_entries:
+            return
+        paths = [os.path.join(self.cache_dir, n) for n in names]
+        mtimes = []
+        for path in paths:
+            try:
+                mtimes.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+        mtimes.sort()
+        for _, path in mtimes[:len(mtimes) - self.max_disk_entries]:
+            self._remove(path)
+            self._remove(path[:-len('.json')] + '.lock')
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def get(self, key):
+        value = self._get_memory(key)
+        if value is not None:
+            return value
+        entry = self._get_disk(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        self._set_memory(key, value, stored_at)
+        return value
+
+    def set(self, key, value):
+        stored_at = time.time()
+        self._set_memory(key, value, stored_at)
+        self._set_disk(key, value, stored_at)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+        if self.cache_dir:
+            self._remove(self._path(key))
+
+    def get_or_compute(self, key, compute, cacheable=None):
+        """Return ``(value, hit)``, computing and storing the value on a miss.
+
+        ``cacheable(value)`` decides whether a freshly computed value is
+        stored; values it rejects are still returned to the caller. Callers
+        that waited on another thread's computation of the key get its value
+        (hit=True only if it was stored) or re-raise its exception.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value, True
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = {'done': threading.Event()}
+        if not leader:
+            # Another thread is computing this key; share its outcome once it lands
+            flight['done'].wait()
+            if 'error' in flight:
+                raise flight['error']
+            if 'value' in flight:
+                return flight['value'], flight['stored']
+            # The leader was interrupted before it had an outcome
+            return compute(), False
+
+        try:
+            with self._disk_lock(key):
+                # Another worker process may have finished while we waited on the lock
+                value = self.get(key)
+                if value is not None:
+                    flight.update(value=value, stored=True)
+                    return value, True
+                value = compute()
+                stored = cacheable is None or cacheable(value)
+                if stored:
+                    self.set(key, value)
+                flight.update(value=value, stored=stored)
+                return value, False
+        except Exception as e:
+            flight['error'] = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight['done'].set()
+
+    def _disk_lock(self, key):
+        if not self.cache_dir or fcntl is None:
+            return _NullLock()
+        return _FileLock(os.path.join(self.cache_dir, f'{key}.lock'))
+
+
+class _NullLock:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _FileLock:
+    """Exclusive advisory lock on a file, shared by all processes on the host."""
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        self._fd = os.open(self.path, os.O_CREAT | os.O_RDWR, 0o644)
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+        return False
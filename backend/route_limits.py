@@ -0,0 +1,45 @@
+import threading
+
+from flask import g, jsonify, request
+
+
+class RouteLimiter:
+    """Caps the requests a worker handles at once per group of routes.
+
+    Routes are grouped by endpoint name (LLM comments, upstream proxy, PDF
+    extraction). A request arriving while its group is full is answered at
+    once with 429 and a Retry-After header instead of queueing behind the
+    slow calls; the slot is released when the response, including a
+    streamed body, has been sent. A limit of 0 leaves the group unbounded.
+    """
+
+    def __init__(self, groups, limits, retry_after=1, on_reject=None):
+        self.retry_after = retry_after
+        self.on_reject = on_reject
+        self._group_of = {endpoint: group for group, endpoints in groups.items() for endpoint in endpoints}
+        self._slots = {group: threading.BoundedSemaphore(limit)
+                       for group, limit in limits.items() if limit > 0}
+
+    def init_app(self, app):
+        app.before_request(self._acquire)
+        app.teardown_request(self._release)
+
+    def _acquire(self):
+        group = self._group_of.get(request.endpoint)
+        slots = self._slots.get(group)
+        if slots is None:
+            return None
+        if not slots.acquire(blocking=False):
+            if self.on_reject:
+                self.on_reject(group)
+            response = jsonify({'error': 'Server busy, please retry shortly', 'group': group})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(self.retry_after)
+            return response
+        g.route_limit_group = group
+        return None
+
+    def _release(self, exc):
+        group = g.pop('route_limit_group', None)
+        if group is not None:
+            self._slots[group].release()
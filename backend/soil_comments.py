@@ -0,0 +1,507 @@
+"""Deterministic (no-LLM) summaries for the soil report sections.
+
+Each renderer follows the classification rules spelled out in the matching
+/generate-soil-comments prompt and takes the same request body: section,
+nutrients and statusCategories.
+"""
+import re
+
+DEFICIENT = 'Deficient'
+MARGINALLY_DEFICIENT = 'Marginally deficient'
+OPTIMAL = 'Optimal'
+MARGINALLY_EXCESSIVE = 'Marginally excessive'
+EXCESSIVE = 'Excessive'
+
+# Request keys of the status categories, in report order
+CATEGORY_KEYS = (
+    ('deficient', DEFICIENT),
+    ('marginallyDeficient', MARGINALLY_DEFICIENT),
+    ('optimal', OPTIMAL),
+    ('marginallyExcessive', MARGINALLY_EXCESSIVE),
+    ('excess', EXCESSIVE),
+)
+CATEGORY_ORDER = [category for _, category in CATEGORY_KEYS]
+# A nutrient listed in several categories keeps the first of these
+CATEGORY_PRECEDENCE = [EXCESSIVE, MARGINALLY_EXCESSIVE, OPTIMAL, MARGINALLY_DEFICIENT, DEFICIENT]
+
+TAG_PATTERN = re.compile(r"\s*\([^)]*\)")
+NUMBER_PATTERN = re.compile(r"-?\d*\.?\d+")
+
+BASE_SATURATION_NUTRIENTS = frozenset(
+    ['Calcium', 'Magnesium', 'Potassium', 'Sodium', 'Aluminium', 'Hydrogen', 'Other Bases'])
+# Only worth mentioning in base saturation when excessive
+ACID_CATIONS = frozenset(['Aluminium', 'Hydrogen', 'Other Bases'])
+TAE_NUTRIENTS = frozenset(
+    ['Sodium', 'Potassium', 'Calcium', 'Magnesium', 'Phosphorus', 'Aluminium', 'Copper', 'Iron',
+     'Manganese', 'Selenium', 'Zinc', 'Boron', 'Silicon', 'Cobalt', 'Molybdenum', 'Sulfur'])
+LAMOTTE_NUTRIENTS = ('Phosphorus', 'Calcium', 'Magnesium', 'Potassium')
+
+# Nutrient names of each report section, as in the frontend's sectionNutrientMap
+SECTION_NUTRIENT_NAMES = {
+    'organicMatter': ['Organic Matter (Calc)'],
+    'cec': ['CEC', 'TEC'],
+    'soilPh': ['pH-level (1:5 water)'],
+    'baseSaturation': ['Calcium', 'Magnesium', 'Potassium', 'Sodium', 'Aluminum', 'Hydrogen', 'Other_Bases'],
+    'availableNutrients': [
+        'Nitrate-N (KCl)', 'Ammonium-N (KCl)', 'Phosphorus (Mehlich III)', 'Calcium (Mehlich III)',
+        'Magnesium (Mehlich III)', 'Potassium (Mehlich III)', 'Sodium (Mehlich III)', 'Sulfur (KCl)',
+        'Aluminium', 'Silicon (CaCl2)', 'Boron (Hot CaCl2)', 'Iron (DTPA)', 'Manganese (DTPA)',
+        'Copper (DTPA)', 'Zinc (DTPA)'],
+    'lamotteReams': ['Calcium_LaMotte', 'Magnesium_LaMotte', 'Phosphorus_LaMotte', 'Potassium_LaMotte'],
+    'tae': [
+        'Sodium TAE', 'Potassium TAE', 'Calcium TAE', 'Magnesium TAE', 'Phosphorus TAE', 'Aluminium TAE',
+        'Copper TAE', 'Iron TAE', 'Manganese TAE', 'Selenium TAE', 'Zinc TAE', 'Boron TAE', 'Silicon TAE',
+        'Cobalt TAE', 'Molybdenum TAE', 'Sulfur TAE'],
+}
+SECTION_NAME_KEYS = {section: frozenset(name.lower() for name in names)
+                     for section, names in SECTION_NUTRIENT_NAMES.items()}
+TAE_SUFFIX = re.compile(r"[\s_]*TAE$", re.IGNORECASE)
+
+# (texture, low, high, nutrient retention, management note) from the CEC prompt's reference table
+CEC_TEXTURES = (
+    ('sand', 1, 5,
+     'which offers extremely few exchange sites and allows rapid leaching of cations',
+     'Nutrients are best supplied little and often, as large applications are prone to leaching.'),
+    ('sandy loam', 5, 10,
+     'which provides limited exchange sites and a moderate leaching risk',
+     'Split fertiliser applications help limit leaching losses between crop uptake periods.'),
+    ('loam', 10, 15,
+     'which gives a balanced texture with moderate nutrient retention and buffering',
+     'Standard fertiliser programs are generally well retained, with moderate buffering against pH change.'),
+    ('silt loam', 15, 25,
+     'where fines and humus contribute a higher capacity to hold nutrient cations',
+     'Good nutrient retention allows larger single applications, though surface sealing can limit infiltration.'),
+    ('clay loam', 20, 30,
+     'where clay minerals raise nutrient retention and buffering',
+     'Retained nutrients are less prone to leaching, while compaction and drainage need attention.'),
+    ('clay', 25, 40,
+     'with high buffering and strong nutrient retention',
+     'High buffering means soil amendments act slowly, and compaction and drainage are the main constraints.'),
+    ('organic soil', 40, 100,
+     'where humus functional groups provide very high exchange capacity',
+     'Much of this charge is pH dependent, so exchange capacity falls as the soil acidifies.'),
+)
+
+
+def clean_name(name):
+    """Nutrient name without extraction tags or underscores, with one Aluminium spelling."""
+    if not isinstance(name, str):
+        return ''
+    base = name.strip()
+    low = base.lower()
+    if low.startswith('nitrate-n'):
+        return 'Nitrate-N'
+    if low.startswith('ammonium-n'):
+        return 'Ammonium-N'
+    if low.startswith('aluminum') or low.startswith('aluminium'):
+        return 'Aluminium'
+    base = TAG_PATTERN.sub('', base).replace('_', ' ').strip()
+    if base.lower() in ('sulphur', 'sulfur'):
+        return 'Sulfur'
+    return base
+
+
+def base_name(name):
+    """Element name of a LaMotte/Reams style label such as "Calcium_LaMotte (ppm)"."""
+    if not isinstance(name, str):
+        return ''
+    base = re.split(r"\s*\(", name.replace('_', ' ').strip())[0].strip()
+    low = base.lower()
+    for element in LAMOTTE_NUTRIENTS:
+        if low.startswith(element.lower()):
+            return element
+    return base
+
+
+def fmt_list(items):
+    if not items:
+        return ''
+    if len(items) == 1:
+        return items[0]
+    return ", ".join(items[:-1]) + f" and {items[-1]}"
+
+
+def to_number(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        match = NUMBER_PATTERN.search(value.replace(',', ''))
+        return float(match.group()) if match else None
+    return None
+
+
+def fmt_number(value):
+    return f"{value:g}"
+
+
+def tae_name(name):
+    """Element name of a TAE label such as "Calcium_TAE" or "Calcium TAE"."""
+    return clean_name(TAE_SUFFIX.sub('', name)) if isinstance(name, str) else ''
+
+
+def is_ph(name):
+    """True for a pH reading such as "pH-level (1:5 water)", but not for Phosphorus."""
+    return 'ph' in re.findall(r"[a-z]+", str(name or '').lower())
+
+
+def base_saturation_name(name):
+    """clean_name of a base saturation label; '' for Mehlich, KCl, TAE or LaMotte readings of the cations."""
+    if not isinstance(name, str):
+        return ''
+    tags = re.findall(r"\(([^)]*)\)", name)
+    if any(tag.strip() != '%' for tag in tags) or {'tae', 'lamotte'} & set(re.findall(r"[a-z]+", name.lower())):
+        return ''
+    return clean_name(name)
+
+
+def lamotte_name(name):
+    """base_name of a LaMotte/Reams label; '' for the same elements from other tables."""
+    if not isinstance(name, str) or 'lamotte' not in name.lower():
+        return ''
+    return base_name(name)
+
+
+def in_section(section, name, entry=None):
+    """True when a nutrient (by name, or its entry's category) belongs to the report section."""
+    if not isinstance(name, str):
+        return False
+    if name.strip().lower() in SECTION_NAME_KEYS.get(section, ()):
+        return True
+    category = str((entry or {}).get('category', '')).lower()
+    if section == 'tae':
+        return (category == 'tae' or 'tae' in name.lower()) and tae_name(name) in TAE_NUTRIENTS
+    if section == 'lamotteReams':
+        return (category == 'lamotte_reams' or 'lamotte' in name.lower()) and base_name(name) in LAMOTTE_NUTRIENTS
+    return False
+
+
+def _lamotte_candidates(nutrients):
+    """Plain ppm Ca/Mg/K/P rows (not TAE or Mehlich), used when no entry is tagged LaMotte."""
+    return [n for n in nutrients
+            if base_name(n.get('name', '')) in LAMOTTE_NUTRIENTS
+            and str(n.get('unit') or '').strip().lower() == 'ppm'
+            and str(n.get('category', '')).lower() != 'tae'
+            and not re.search(r"mehlich|tae", str(n.get('name', '')), re.IGNORECASE)]
+
+
+def lamotte_entries(nutrients):
+    """The LaMotte/Reams nutrient entries, falling back to plain ppm Ca/Mg/K/P rows."""
+    nutrients = [n for n in nutrients if isinstance(n, dict)]
+    return [n for n in nutrients if in_section('lamotteReams', n.get('name'), n)] or _lamotte_candidates(nutrients)
+
+
+def lamotte_categories(data, entries):
+    """categorise() over the LaMotte/Reams labels and the names of `entries` only."""
+    entry_names = {n.get('name') for n in entries}
+    return categorise(data, frozenset(LAMOTTE_NUTRIENTS),
+                      name=lambda item: base_name(item) if item in entry_names else lamotte_name(item))
+
+
+def narrow_to_section(section, data):
+    """A report-wide request body cut down to one section's nutrients.
+
+    `nutrients` and every statusCategories list keep only the entries of the
+    section (SECTION_NUTRIENT_NAMES, plus TAE / LaMotte tagged entries), so
+    a section never comments on readings from another table. Sections
+    without a mapping are returned unchanged.
+    """
+    if section not in SECTION_NUTRIENT_NAMES:
+        return dict(data)
+    narrowed = dict(data)
+    nutrients = [n for n in data.get('nutrients') or [] if isinstance(n, dict)]
+    if 'nutrients' in data:
+        if section == 'lamotteReams':
+            kept = lamotte_entries(nutrients)
+        else:
+            kept = [n for n in nutrients if in_section(section, n.get('name'), n)]
+        narrowed['nutrients'] = kept
+    kept_names = {n.get('name') for n in narrowed.get('nutrients') or []}
+    if isinstance(data.get('statusCategories'), dict):
+        narrowed['statusCategories'] = {
+            key: [name for name in names
+                  if isinstance(name, str) and (name in kept_names or in_section(section, name))]
+            for key, names in data['statusCategories'].items() if isinstance(names, list)}
+    return narrowed
+
+
+def status_categories(data):
+    """{category: [names]} from statusCategories, or the top-level lists of the direct format."""
+    source = data.get('statusCategories') or data
+    return {category: list(source.get(key) or []) for key, category in CATEGORY_KEYS}
+
+
+def categorise(data, allowed=None, name=clean_name):
+    """Cleaned, de-duplicated and alphabetised category lists.
+
+    Names outside `allowed` are dropped and a nutrient listed in several
+    categories keeps only the most excessive one.
+    """
+    raw = status_categories(data)
+    assigned = {}
+    for category in CATEGORY_PRECEDENCE:
+        for item in raw[category]:
+            cleaned = name(item)
+            if not cleaned or (allowed is not None and cleaned not in allowed):
+                continue
+            assigned.setdefault(cleaned, category)
+    cats = {category: [] for category in CATEGORY_ORDER}
+    for nutrient, category in assigned.items():
+        cats[category].append(nutrient)
+    for category in cats:
+        cats[category].sort(key=str.lower)
+    return cats
+
+
+def classify_deviation(current, ideal, marginal, severe):
+    """Category of a value by its % deviation from ideal (the prompts' threshold rules)."""
+    if current is None or not ideal:
+        return None
+    deviation = (current - ideal) / ideal * 100
+    if deviation < -severe:
+        return DEFICIENT
+    if deviation < -marginal:
+        return MARGINALLY_DEFICIENT
+    if deviation <= marginal:
+        return OPTIMAL
+    if deviation <= severe:
+        return MARGINALLY_EXCESSIVE
+    return EXCESSIVE
+
+
+def _be(items):
+    return 'is' if len(items) == 1 else 'are'
+
+
+def status_clauses(cats):
+    """["A and B are deficient", "C is optimal", ...] for the non-empty categories."""
+    return [f"{fmt_list(cats[category])} {_be(cats[category])} {category.lower()}"
+            for category in CATEGORY_ORDER if cats[category]]
+
+
+def narrative_sentences(cats):
+    """Deficiency / optimal / excess sentences in the style of the available nutrients summary."""
+    sentences = []
+    if cats[DEFICIENT] or cats[MARGINALLY_DEFICIENT]:
+        segs = []
+        if cats[DEFICIENT]:
+            segs.append(f"deficiencies in {fmt_list(cats[DEFICIENT])}")
+        if cats[MARGINALLY_DEFICIENT]:
+            marginal = cats[MARGINALLY_DEFICIENT]
+            segs.append(f"{'a marginal deficiency' if len(marginal) == 1 else 'marginal deficiencies'} in {fmt_list(marginal)}")
+        if len(segs) == 2:
+            sentences.append(f"Currently, the soil analysis reveals {segs[0]}, while {segs[1]}.")
+        else:
+            sentences.append(f"Currently, the soil analysis reveals {segs[0]}.")
+    if cats[OPTIMAL]:
+        sentences.append(f"Optimal levels are observed for {fmt_list(cats[OPTIMAL])}, supporting balanced nutrient availability.")
+    if cats[MARGINALLY_EXCESSIVE] or cats[EXCESSIVE]:
+        parts = []
+        if cats[MARGINALLY_EXCESSIVE]:
+            marginal = cats[MARGINALLY_EXCESSIVE]
+            parts.append(f"{'a marginal excess' if len(marginal) == 1 else 'marginal excesses'} in {fmt_list(marginal)}")
+        if cats[EXCESSIVE]:
+            parts.append(f"{'an excessive level' if len(cats[EXCESSIVE]) == 1 else 'excessive levels'} of {fmt_list(cats[EXCESSIVE])}")
+        if len(parts) == 2:
+            sentences.append(f"Additionally, {parts[0]}, whereas {parts[1]} may affect nutrient balance and crop performance.")
+        else:
+            sentences.append(f"Additionally, {parts[0]} may affect nutrient balance and crop performance.")
+    return sentences
+
+
+def render_available_nutrients(data):
+    cats = categorise(data)
+    # Aluminium is only mentioned when excessive
+    for category in CATEGORY_ORDER:
+        if category != EXCESSIVE:
+            cats[category] = [n for n in cats[category] if n != 'Aluminium']
+    intro = ("Available nutrients are the plant-available forms of essential nutrients that can be immediately "
+             "taken up by plant roots, crucial for plant nutrition and growth.")
+    return f"{intro} {' '.join(narrative_sentences(cats))}".replace("  ", " ").strip()
+
+
+def render_cec(data):
+    nutrients = data.get('nutrients') or []
+    value = None
+    for n in nutrients:
+        name = str(n.get('name', '')).lower()
+        if 'cec' in name or 'cation exchange' in name:
+            value = to_number(n.get('current'))
+            if value is not None:
+                break
+    intro = ("Cation Exchange Capacity (CEC) measures the soil's ability to hold and exchange positively "
+             "charged nutrients such as Calcium, Magnesium and Potassium.")
+    if value is None:
+        return f"{intro} No CEC measurement was available to infer soil texture or nutrient retention."
+    candidates = [t for t in CEC_TEXTURES if t[1] <= value <= t[2]]
+    if not candidates:
+        candidates = [CEC_TEXTURES[0] if value < CEC_TEXTURES[0][1] else CEC_TEXTURES[-1]]
+    # Overlapping ranges: closest midpoint wins, ties go to the finer texture (later in the table)
+    texture = min(reversed(candidates), key=lambda t: abs(value - (t[1] + t[2]) / 2))
+    name, _, _, retention, management = texture
+    article = 'an' if name[0] in 'aeiou' else 'a'
+    return (f"{intro} The measured CEC of {fmt_number(value)} cmol(+)/kg is typical of {article} {name} "
+            f"texture, {retention}. {management}")
+
+
+PH_STATUS = {
+    DEFICIENT: 'acidic',
+    MARGINALLY_DEFICIENT: 'slightly acidic',
+    OPTIMAL: 'optimal',
+    MARGINALLY_EXCESSIVE: 'slightly alkaline',
+    EXCESSIVE: 'alkaline',
+}
+PH_DYNAMICS = {
+    'acidic': ("Strongly acidic conditions increase the solubility of Aluminium and some micronutrients while "
+               "limiting Phosphorus, Calcium and Magnesium supply, and they suppress bacterial activity and "
+               "organic matter turnover."),
+    'slightly acidic': ("Slightly acidic conditions keep micronutrients such as Iron, Zinc and Manganese readily "
+                        "available, although Phosphorus fixation begins to increase and microbial activity is "
+                        "somewhat reduced."),
+    'optimal': ("Near-neutral conditions support Phosphorus solubility and keep Iron, Zinc and Manganese "
+                "moderately available, while sustaining active microbial nutrient cycling."),
+    'slightly alkaline': ("Slightly alkaline conditions reduce the availability of Phosphorus, Iron, Zinc and "
+                          "Manganese, and microbial activity may slow the release of nutrients from organic matter."),
+    'alkaline': ("Alkaline conditions strongly restrict Phosphorus, Iron, Zinc and Manganese availability, and "
+                 "altered microbial activity slows nutrient release from organic matter."),
+}
+PH_IMPACT = {
+    'acidic': ("As a result, fertilizer efficiency is reduced, the soil's buffering is weakened, and crop "
+               "performance is likely to be constrained by nutrient imbalances and root stress."),
+    'slightly acidic': ("Overall, fertilizer efficiency remains reasonable with moderate buffering, although "
+                        "sensitive crops may show reduced performance."),
+    'optimal': ("This supports efficient fertilizer use, stable buffering, and favourable conditions for "
+                "consistent crop performance."),
+    'slightly alkaline': ("As a result, fertilizer efficiency for micronutrients and Phosphorus may decline, "
+                          "with buffering that resists change and a moderate risk to crop performance."),
+    'alkaline': ("As a result, fertilizer efficiency is reduced, the soil is strongly buffered against change, "
+                 "and crop performance is likely to suffer from induced micronutrient shortages."),
+}
+
+
+def render_soil_ph(data):
+    nutrients = data.get('nutrients') or []
+    reading = next((n for n in nutrients if is_ph(n.get('name'))), None)
+    value = to_number(reading.get('current')) if reading else None
+
+    status = None
+    cats = status_categories(data)
+    # Only pH entries count: a report-wide payload also lists Sodium, Calcium, ...
+    for category in CATEGORY_PRECEDENCE:
+        if any(is_ph(name) for name in cats[category]):
+            status = PH_STATUS[category]
+            break
+    if status is None and reading is not None:
+        category = classify_deviation(value, to_number(reading.get('ideal')), 10, 25)
+        status = PH_STATUS.get(category)
+
+    intro = ("Soil pH measures how acidic or alkaline the soil is and governs nutrient chemistry, "
+             "biological activity and plant growth.")
+    if status is None or value is None:
+        return f"{intro} No measurement was available to describe the current status."
+    status_line = f"This pH level is {status} at {fmt_number(value)}."
+    return f"{intro} {status_line} {PH_DYNAMICS[status]} {PH_IMPACT[status]}"
+
+
+def render_base_saturation(data):
+    cats = categorise(data, BASE_SATURATION_NUTRIENTS, name=base_saturation_name)
+    # Aluminium, Hydrogen and Other Bases only matter when excessive
+    for category in CATEGORY_ORDER:
+        if category != EXCESSIVE:
+            cats[category] = [n for n in cats[category] if n not in ACID_CATIONS]
+    intro = ("Base saturation is the share of the soil's cation exchange capacity occupied by Calcium, "
+             "Magnesium, Potassium and Sodium, and it shapes cation balance, soil fertility and nutrient "
+             "availability.")
+    clauses = status_clauses(cats)
+    if not clauses:
+        return f"{intro} No base saturation values were classified for this report."
+    status = f"Currently, {fmt_list(clauses)}."
+
+    # Low Calcium or high Sodium, Magnesium or acid cations push towards dispersion
+    structure_risk = (
+        'Calcium' in cats[DEFICIENT] + cats[MARGINALLY_DEFICIENT]
+        or any(n in cats[EXCESSIVE] + cats[MARGINALLY_EXCESSIVE] for n in ('Sodium', 'Magnesium'))
+        or bool(set(cats[EXCESSIVE]) & ACID_CATIONS)
+    )
+    imbalanced = any(cats[c] for c in CATEGORY_ORDER if c != OPTIMAL)
+    if structure_risk:
+        impact = ("This pattern is likely to weaken flocculation and raise dispersion risk, reducing "
+                  "infiltration, buffering and fertilizer efficiency, with knock-on effects for crop performance.")
+    elif imbalanced:
+        impact = ("This imbalance is likely to shift cation competition at the exchange sites, affecting "
+                  "nutrient availability, buffering and fertilizer efficiency and, in turn, crop performance.")
+    else:
+        impact = ("This balanced cation pattern supports stable soil structure, good buffering and efficient "
+                  "fertilizer use, favouring consistent crop performance.")
+    return f"{intro} {status} {impact}"
+
+
+def render_tae(data):
+    cats = categorise(data, TAE_NUTRIENTS, name=tae_name)
+    intro = ("Total Available Elements (TAE) represent the total concentration of essential nutrients in the "
+             "soil, including reserves that can be released through weathering and organic matter "
+             "decomposition.")
+    sentences = narrative_sentences(cats)
+    if not sentences:
+        return f"{intro} No TAE values were classified for this report."
+    return f"{intro} {' '.join(sentences)}".replace("  ", " ").strip()
+
+
+def lamotte_selection(nutrients):
+    """The LaMotte/Reams entries the prompt preselects: 2nd Phosphorus, 3rd Calcium/Magnesium/Potassium."""
+    occurrences = {element: [] for element in LAMOTTE_NUTRIENTS}
+    for n in nutrients:
+        element = base_name(n.get('name', ''))
+        if element in occurrences:
+            occurrences[element].append(n)
+    selected = {}
+    for element, found in occurrences.items():
+        position = 1 if element == 'Phosphorus' else 2
+        if len(found) > position:
+            selected[element] = found[position]
+        elif found:
+            selected[element] = found[-1]
+    return selected
+
+
+def render_lamotte_reams(data):
+    entries = lamotte_entries(data.get('nutrients') or [])
+    selected = lamotte_selection(entries)
+    listed = lamotte_categories(data, entries)
+    listed_category = {n: category for category, names in listed.items() for n in names}
+    cats = {category: [] for category in CATEGORY_ORDER}
+    for element in LAMOTTE_NUTRIENTS:
+        category = listed_category.get(element)
+        if category is None and element in selected:
+            entry = selected[element]
+            category = classify_deviation(to_number(entry.get('current')), to_number(entry.get('ideal')), 18, 40)
+        if category is not None:
+            cats[category].append(element)
+    for category in cats:
+        cats[category].sort()
+    intro = ("LaMotte/Reams testing indicates the nutrients available to plants at the time of sampling, using "
+             "extractions that simulate root uptake.")
+    clauses = status_clauses(cats)
+    if not clauses:
+        return f"{intro} No LaMotte/Reams values were available for Phosphorus, Calcium, Magnesium or Potassium."
+    if any(cats[c] for c in CATEGORY_ORDER if c != OPTIMAL):
+        impact = ("These imbalances in readily available nutrients are likely to influence early vigour, "
+                  "nutrient uptake and overall crop performance.")
+    else:
+        impact = "This balanced supply of readily available nutrients supports steady uptake and crop performance."
+    return f"{intro} Of the key entries, {fmt_list(clauses)}. {impact}"
+
+
+RENDERERS = {
+    'availableNutrients': render_available_nutrients,
+    'cec': render_cec,
+    'soilPh': render_soil_ph,
+    'baseSaturation': render_base_saturation,
+    'tae': render_tae,
+    'lamotteReams': render_lamotte_reams,
+}
+
+
+def render_section(section, data):
+    """Deterministic summary for a section, or None when the section has no renderer."""
+    renderer = RENDERERS.get(section)
+    return renderer(data) if renderer else None
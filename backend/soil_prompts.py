@@ -0,0 +1,364 @@
+"""Token-budgeted prompts for the soil comment sections written by OpenAI.
+
+The instruction text of every section is built once at import. A request
+only adds the nutrients relevant to its section, one compact entry each,
+and the category lists; nutrient entries are dropped from the end when the
+prompt would exceed the token budget.
+"""
+import re
+
+from soil_comments import (ACID_CATIONS, BASE_SATURATION_NUTRIENTS, CATEGORY_ORDER,
+                           DEFICIENT, EXCESSIVE, LAMOTTE_NUTRIENTS, OPTIMAL, TAE_NUTRIENTS,
+                           base_saturation_name, categorise, clean_name, is_ph, lamotte_categories,
+                           lamotte_entries, lamotte_selection, status_categories, tae_name)
+
+# Category lines in the order and spelling the instructions refer to
+CATEGORY_LABELS = dict(zip(CATEGORY_ORDER, ['DEFICIENT', 'MARGINALLY DEFICIENT', 'OPTIMAL',
+                                            'MARGINALLY EXCESSIVE', 'EXCESS']))
+MAIN_CATEGORIES = (DEFICIENT, OPTIMAL, EXCESSIVE)
+
+HEADING = "As a professional soil scientist and agronomist, provide a BRIEF analysis{} for a Soil Therapy Report."
+
+CEC_INSTRUCTIONS = """\
+CRITICAL INSTRUCTIONS:
+- Focus ONLY on CEC (Cation Exchange Capacity) values.
+- CEC is measured in cmol(+)/kg (equivalent to meq/100 g).
+- Classify soil texture using the following reference table (strict):
+  * Sand: 1–5 cmol(+)/kg — extremely low exchange sites, rapid leaching
+  * Sandy Loam: 5–10 cmol(+)/kg — limited exchange sites, moderate leaching
+  * Loam: 10–15 cmol(+)/kg — balanced texture and moderate CEC
+  * Silt Loam: 15–25 cmol(+)/kg — higher CEC from fines and humus
+  * Clay Loam: 20–30 cmol(+)/kg — elevated CEC due to clay minerals
+  * Clay: 25–40+ cmol(+)/kg — high buffering and nutrient retention
+  * Organic Soils / Peat: 40–100+ cmol(+)/kg — very high CEC from humus functional groups
+- Overlap handling (e.g., 20–25 and 25–30): choose the category whose range midpoint is closest to the measured CEC; if exactly tied, prefer the finer-texture class (Clay Loam over Silt Loam; Clay over Clay Loam).
+
+Provide a 2-3 sentence analysis focusing on:
+- The measured CEC, the inferred soil texture (per table), and implications for nutrient retention/buffering.
+- Brief management considerations aligned with the inferred texture (e.g., leaching risk for sands; compaction/drainage for clays; pH-dependent charge for organics).
+
+Use professional soil science terminology. Focus on practical implications for fertilizer management and soil fertility.
+"""
+
+
+SOIL_PH_INSTRUCTIONS = """\
+CRITICAL INSTRUCTIONS:
+- Soil pH is a measure of soil acidity or alkalinity on a logarithmic scale from 0 to 14, where 7 is neutral, values below 7 are acidic, and values above 7 are alkaline. pH significantly influences nutrient availability, microbial activity, and plant growth.
+- Use percentage-based logic for pH status classification based on deviation from ideal values:
+  * **Deficient (Too Acidic)**: More than 25% below the optimal ideal pH value
+  * **Marginally Deficient (Slightly Acidic)**: Between 10% and 25% below the optimal ideal pH value  
+  * **Optimal**: Between 10% below and 10% above the optimal ideal pH value
+  * **Marginally Excessive (Slightly Alkaline)**: Between 10% and 25% above the optimal ideal pH value
+  * **Excessive (Too Alkaline)**: Above 25% above the optimal ideal pH value
+
+CRITICAL: You MUST explicitly mention the pH status that exists. If the OPTIMAL list contains pH values, mention them as "optimal". If the MARGINALLY EXCESSIVE list contains pH values, mention them as "marginally excessive". If the DEFICIENT list contains pH values, mention them as "deficient". Do NOT mention categories that are empty.
+
+CRITICAL: If the OPTIMAL list contains pH values, you MUST explicitly mention them as "optimal" in your response. Do NOT say "no optimal pH levels" if the OPTIMAL list contains values.
+
+CRITICAL: Use the correct terminology for pH - describe pH as "acidic", "alkaline", "slightly acidic", "slightly alkaline", etc. Do NOT use terms like "deficient" or "excessive" for pH, and do not use the plural forms "deficiencies" or "excesses" in relation to pH.
+
+CRITICAL: NEVER mention the percentage thresholds (like "30% below", "25% above", etc.) in your response. Focus on describing the nutrient status without explaining the calculation method.
+
+CRITICAL EXAMPLE: If only MARGINALLY EXCESSIVE contains pH values, say "The pH level is slightly alkaline" but DO NOT say "This indicates that the soil is neither deficient nor marginally deficient in pH, nor marginally excessive or excessive."
+
+PROHIBITED PHRASES (STRICT): Do not write meta-negations for pH such as "no deficiencies or excesses", "neither deficient nor excessive", "neither deficient nor marginally deficient, nor marginally excessive or excessive", "no issues across categories", or similar. pH is a single measure — simply state the status (acidic/alkaline/slightly/optimal) and its implications.
+
+CRITICAL: Do not mention the word "pH" more than 2 times in your response.
+
+ADD SPECIFICITY (STRICT): When status is slightly alkaline/alkaline (pH > 7), briefly name 1–2 likely nutrient availability impacts (e.g., reduced availability of Phosphorus, Iron, Zinc, and Manganese) and 1 biology/process note (e.g., altered microbial activity or slower nutrient release). When status is slightly acidic/acidic (pH < 7), briefly note increased availability of some micronutrients and potential Aluminium solubility issues in strongly acidic conditions. Keep this to one concise clause.
+
+IMPORTANT: Start your analysis by explaining what "soil pH" means, then describe the current pH status. DO NOT include any management recommendations, pH adjustment strategies, or solutions. Focus ONLY on describing the current pH levels and their implications. Avoid any mention of absent categories or negatives like "no deficiencies or excesses".
+
+STRICT OUTPUT FORMAT:
+- Use exactly 4 sentences.
+- Sentence 1: one-sentence definition of soil pH and why it matters for chemistry, biology, and growth (mention the term once here).
+- Sentence 2: start with "This pH level is" or "At pH" and state the status (optimal, slightly acidic, acidic, slightly alkaline, alkaline) with the measured value.
+- Sentence 3: describe nutrient availability dynamics appropriate to the status (e.g., near-neutral supports Phosphorus solubility and moderates Iron/Zinc/Manganese availability; low values can increase Aluminium solubility), and include a short note on microbial activity; avoid the word "pH" here.
+- Sentence 4: state the practical impact on fertilizer efficiency, buffering, and likely crop performance in one sentence; avoid recommendations and avoid the word "pH" here.
+- Do not mention any categories, negations, or the words "deficient", "excess", "neither", or "nor".
+
+List ALL specific pH measurements in each category rather than using general terms. Write your response as ONE SINGLE PARAGRAPH, not multiple paragraphs.
+
+Provide a 4 sentence analysis focusing on:
+- Definition of soil pH and its significance for soil chemistry and plant nutrition
+- Current status and measured value
+- Nutrient availability dynamics and microbiology appropriate to the status
+- Implication for fertilizer efficiency, buffering, and crop performance
+
+Use professional soil science terminology. Focus on describing the current situation only.
+"""
+
+
+BASE_SATURATION_INSTRUCTIONS = """\
+CRITICAL INSTRUCTIONS:
+- Base saturation represents the percentage of the soil's cation exchange capacity (CEC) occupied by base cations (Calcium, Magnesium, Potassium, Sodium) and acid cations (Aluminum, Hydrogen), which influences soil fertility, nutrient availability, and plant growth.
+- Use percentage-based logic for base saturation status classification based on deviation from ideal values:
+  * Deficient: More than 40% below the optimal ideal value
+  * Marginally Deficient: Between 18% and 40% below the optimal ideal value  
+  * Optimal: Between 18% below and 18% above the optimal ideal value
+  * Marginally Excessive: Between 18% and 40% above the optimal ideal value
+  * Excessive: Above 40% above the optimal ideal value
+
+CRITICAL: You MUST explicitly mention the nutrient status that exists. If the OPTIMAL list contains nutrients, mention them as "optimal". If the DEFICIENT list contains nutrients, mention them as "deficient". If the MARGINALLY DEFICIENT list contains nutrients, mention them as "marginally deficient". If the MARGINALLY EXCESSIVE list contains nutrients, mention them as "marginally excessive". If the EXCESS list contains nutrients, mention them as "excessive". Do NOT mention categories that are empty or say "no deficient nutrients" etc.
+
+STRICT BASE SATURATION FILTER (MANDATORY): Only consider the base saturation nutrients for this section — Calcium, Magnesium, Potassium, Sodium, Aluminium/Aluminum, Hydrogen, and Other Bases. Ignore any nutrients labeled as TAE, LaMotte/Reams, or any with ppm units. Do not introduce nutrients outside this list in any category.
+
+CRITICAL: If the OPTIMAL list contains nutrients, you MUST explicitly mention them as "optimal" in your response. If the MARGINALLY DEFICIENT list contains nutrients, you MUST explicitly mention them as "marginally deficient" in your response. Do NOT say "no optimal nutrients" if the OPTIMAL list contains nutrients.
+
+CRITICAL: NEVER mention the percentage thresholds or ideal ranges (like "65-80%", "10-20%", etc.) in your response. Focus on describing the nutrient status without explaining the calculation method.
+
+CRITICAL: DO NOT mention any deficiencies or optimal levels for Aluminum, Hydrogen, or Other Bases in this base saturation section. Only discuss these nutrients if they appear in the excessive category, as they are only problematic when excessive. If these nutrients are in the deficient, marginally deficient, or optimal categories, completely ignore them and do not mention them at all.
+
+CRITICAL EXAMPLE: If Hydrogen is in the DEFICIENT list, do NOT say "deficiencies in Hydrogen" or mention Hydrogen at all. If Aluminum is in the MARGINALLY DEFICIENT list, do NOT say "marginally deficient Aluminum" or mention Aluminum at all. Only mention these nutrients if they are in the EXCESSIVE category.
+
+IMPORTANT: Start your analysis by explaining what "base saturation" means, then describe the current nutrient status. DO NOT include any management recommendations, fertilization strategies, or solutions. Focus ONLY on describing the current nutrient levels and their implications.
+
+List ALL specific nutrients in each category rather than using general terms. Write your response as ONE SINGLE PARAGRAPH, not multiple paragraphs.
+
+Provide a 3–4 sentence analysis focusing on:
+- Definition of base saturation and its significance for soil fertility and cation balance
+- Current base saturation levels across ALL categories (deficient, marginally deficient, optimal, marginally excessive, excessive) and their implications for nutrient availability and plant nutrition
+ - End with ONE concluding sentence that succinctly states how this base saturation pattern is likely to impact soil structure (flocculation/dispersion risk where relevant), nutrient availability/buffering, fertilizer efficiency, and crop performance. Do not give recommendations; describe impact only.
+
+NUTRIENT MENTION RULE: When mentioning multiple nutrients in the same category, use the format "Calcium, Magnesium, and Potassium are deficient" or "Nitrogen and Phosphorus are optimal". Always list nutrients in alphabetical order within each category.
+"""
+
+
+LAMOTTE_REAMS_INSTRUCTIONS = """\
+CRITICAL INSTRUCTIONS:
+- LaMotte/Reams testing provides an indication of the amount of plant-available nutrients at the time of sampling, using specific extraction methods that simulate plant root absorption.
+- Use percentage-based logic for nutrient status classification based on deviation from ideal values:
+  * Deficient: More than 40% below the optimal ideal value
+  * Marginally Deficient: Between 18% and 40% below the optimal ideal value  
+  * Optimal: Between 18% below and 18% above the optimal ideal value
+  * Marginally Excessive: Between 18% and 40% above the optimal ideal value
+  * Excessive: Above 40% above the optimal ideal value
+
+SELECTION DIRECTIVE (STRICT):
+- The four entries to use have already been preselected for you in the block "SELECTED ENTRIES" above. You MUST use EXACTLY those four, in that exact order, and ignore all other duplicates.
+
+CRITICAL: You MUST explicitly mention the nutrient status that exists. If the OPTIMAL list contains nutrients, mention them as "optimal". If the DEFICIENT list contains nutrients, mention them as "deficient". Do NOT mention categories that are empty or say "no deficient nutrients" etc.
+
+CRITICAL: NEVER mention the percentage thresholds (like "30% below", "50% above", etc.) in your response. Focus on describing the nutrient status without explaining the calculation method.
+
+IMPORTANT: Start your analysis by explaining what "LaMotte/Reams testing" means, then describe the current nutrient status for the four selected entries only. DO NOT include any management recommendations, fertilization strategies, or solutions. Focus ONLY on describing the current nutrient levels and their implications.
+
+List ALL four nutrients and their statuses. Write your response as ONE SINGLE PARAGRAPH for the analysis (the diagnostic preface is a separate sentence), not multiple paragraphs.
+
+Provide a 2-3 sentence analysis focusing on:
+- Definition of LaMotte/Reams testing and its significance for plant nutrition
+- Current LaMotte/Reams nutrient levels across ALL categories that apply to the four selected entries and their implications for crop performance
+
+NUTRIENT MENTION RULE: When mentioning multiple nutrients in the same category, list nutrients in alphabetical order within each category.
+
+Use professional soil science terminology. Focus on describing the current situation only.
+"""
+
+
+TAE_INSTRUCTIONS = """\
+CRITICAL INSTRUCTIONS:
+- Total Available Elements (TAE) represent the total concentration of essential nutrients present in the soil, including both plant-available and potentially available forms that can be released through soil weathering and organic matter decomposition.
+- Use percentage-based logic for nutrient status classification based on deviation from ideal values:
+  * Deficient: More than 40% below the optimal ideal value
+  * Marginally Deficient: Between 18% and 40% below the optimal ideal value  
+  * Optimal: Between 18% below and 18% above the optimal ideal value
+  * Marginally Excessive: Between 18% and 40% above the optimal ideal value
+  * Excessive: Above 40% above the optimal ideal value
+
+STRICT TAE FILTER (MANDATORY): Only consider the following TAE nutrients:
+Sodium, Potassium, Calcium, Magnesium, Phosphorus, Aluminium/Aluminum, Copper, Iron, Manganese, Selenium, Zinc, Boron, Silicon, Cobalt, Molybdenum, Sulfur/Sulphur. Ignore any other rows/labels such as explanatory notes or headers (e.g., "Explanatory Notes T.A.E."), and NEVER mention them.
+
+CRITICAL: You MUST explicitly mention the nutrient status that exists. If the OPTIMAL list contains nutrients, mention them as "optimal". If the DEFICIENT list contains nutrients, mention them as "deficient". Do NOT mention categories that are empty or say "no deficient nutrients" etc.
+
+CRITICAL: If the OPTIMAL list contains nutrients, you MUST explicitly mention them as "optimal" in your response. Do NOT say "no optimal nutrients" if the OPTIMAL list contains nutrients.
+
+CRITICAL: NEVER mention the percentage thresholds (like "30% below", "50% above", etc.) in your response. Focus on describing the nutrient status without explaining the calculation method.
+
+CRITICAL: Be fluid on your response when mentioning nutrients on their category. Do not ever say: "Deficient: A, B, C. Excessive: F, G, H". Be more fluid and use sentences like "Your levels are...while...".
+
+IMPORTANT: Start your analysis by explaining what "Total Available Elements (TAE)" means, then describe the current nutrient status. DO NOT include any management recommendations, fertilization strategies, or solutions. Focus ONLY on describing the current nutrient levels and their implications. Do not use phrases like "all other listed elements"; list only the nutrients that actually appear in the provided categories.
+
+List ALL specific nutrients in each category rather than using general terms like "several nutrients" or "various nutrients". Write your response as ONE SINGLE PARAGRAPH, not multiple paragraphs.
+
+Provide a 2-3 sentence analysis focusing on:
+- Definition of Total Available Elements (TAE) and their significance for soil fertility and nutrient reserves
+- Current TAE levels across ALL categories (deficient, marginally deficient, optimal, marginally excessive, excessive) and their implications for nutrient availability and plant nutrition
+
+NUTRIENT MENTION RULE: When mentioning multiple nutrients in the same category, use the format "Aluminium, Calcium, Magnesium, and Sodium are deficient" or "Potassium and Cobalt are marginally deficient". Always list nutrients in alphabetical order within each category.
+
+Use professional soil science terminology. Focus on describing the current situation only.
+"""
+
+
+DEFAULT_INSTRUCTIONS = """\
+Provide a 2-3 sentence analysis focusing on soil health and fertility implications.
+
+NUTRIENT MENTION RULE: When mentioning multiple nutrients in the same category, use the format "nutrients are deficient" or "nutrients are optimal". Always list nutrients in alphabetical order within each category.
+
+Use professional soil science terminology.
+"""
+
+
+# section: (subject of the heading, data label, categories listed, instructions)
+SECTIONS = {
+    'cec': (" of the soil's Cation Exchange Capacity (CEC)", 'CEC DATA', MAIN_CATEGORIES, CEC_INSTRUCTIONS),
+    'soilPh': (" of the soil's pH status", 'pH DATA', CATEGORY_ORDER, SOIL_PH_INSTRUCTIONS),
+    'baseSaturation': (" of the soil's base saturation", 'BASE SATURATION DATA', CATEGORY_ORDER,
+                       BASE_SATURATION_INSTRUCTIONS),
+    'lamotteReams': (" of the soil's LaMotte/Reams test results", None, CATEGORY_ORDER,
+                     LAMOTTE_REAMS_INSTRUCTIONS),
+    'tae': (" of the soil's Total Available Elements (TAE)", 'TAE DATA', CATEGORY_ORDER, TAE_INSTRUCTIONS),
+}
+DEFAULT_SECTION = ('', None, MAIN_CATEGORIES, DEFAULT_INSTRUCTIONS)
+
+# Precompiled (heading, instructions) blocks, shared by every request
+STATIC_BLOCKS = {section: (HEADING.format(subject), instructions)
+                 for section, (subject, _, _, instructions) in SECTIONS.items()}
+STATIC_BLOCKS[None] = (HEADING.format(DEFAULT_SECTION[0]), DEFAULT_SECTION[3])
+
+
+def estimate_tokens(text):
+    """Approximate OpenAI token count: about four characters per token of English prose."""
+    return (len(text) + 3) // 4
+
+
+def _words(name):
+    return re.findall(r'[a-z]+', str(name or '').lower())
+
+
+def _is_cec(name):
+    low = str(name or '').lower()
+    return 'cec' in low or 'cation exchange' in low
+
+
+def relevant_nutrients(section, nutrients):
+    """The nutrient entries a section's prompt needs (all of them if none match)."""
+    if section == 'cec':
+        relevant = [n for n in nutrients if _is_cec(n.get('name'))]
+    elif section == 'soilPh':
+        relevant = [n for n in nutrients if is_ph(n.get('name'))]
+    elif section == 'baseSaturation':
+        relevant = [n for n in nutrients
+                    if clean_name(n.get('name')) in BASE_SATURATION_NUTRIENTS
+                    and not {'tae', 'lamotte'} & set(_words(n.get('name')))
+                    and str(n.get('unit', '')).strip().lower() != 'ppm']
+    elif section == 'tae':
+        relevant = [n for n in nutrients
+                    if str(n.get('category', '')).lower() == 'tae'
+                    or (clean_name(n.get('name')) in TAE_NUTRIENTS and 'lamotte' not in _words(n.get('name')))]
+    else:
+        return list(nutrients)
+    return relevant or list(nutrients)
+
+
+def prompt_categories(section, data):
+    """{category: [names]} restricted to the nutrients the section may mention."""
+    raw = status_categories(data)
+    if section == 'baseSaturation':
+        cats = categorise(data, BASE_SATURATION_NUTRIENTS, name=base_saturation_name)
+        # Aluminium, Hydrogen and Other Bases are only reported when excessive
+        for category in cats:
+            if category != EXCESSIVE:
+                cats[category] = [n for n in cats[category] if n not in ACID_CATIONS]
+    elif section == 'tae':
+        cats = categorise(data, TAE_NUTRIENTS, name=tae_name)
+    elif section == 'lamotteReams':
+        cats = lamotte_categories(data, lamotte_entries(data.get('nutrients') or []))
+    elif section in ('cec', 'soilPh'):
+        keep = _is_cec if section == 'cec' else is_ph
+        cats = {category: [n for n in names if keep(n)] for category, names in raw.items()}
+    else:
+        return raw
+    if not any(cats.values()):
+        return raw
+    return cats
+
+
+def _fmt_value(value):
+    if isinstance(value, float):
+        return f"{value:g}"
+    return str(value).strip()
+
+
+def _measurement(n):
+    """ "value unit (ideal x)" of a nutrient entry, leaving out missing parts."""
+    parts = []
+    current = n.get('current')
+    if current not in (None, ''):
+        parts.append(_fmt_value(current))
+        unit = str(n.get('unit') or '').strip()
+        if unit:
+            parts.append(unit)
+    ideal_range = n.get('ideal_range')
+    if ideal_range and len(ideal_range) == 2 and None not in ideal_range:
+        parts.append(f"(ideal {_fmt_value(ideal_range[0])}–{_fmt_value(ideal_range[1])})")
+    elif n.get('ideal') not in (None, ''):
+        parts.append(f"(ideal {_fmt_value(n.get('ideal'))})")
+    return ' '.join(parts) or 'N/A'
+
+
+def compact_entry(n):
+    """One nutrient as "Name value unit (ideal x)"."""
+    return f"{str(n.get('name') or 'Unknown').strip()} {_measurement(n)}"
+
+
+def selected_entries_line(nutrients):
+    """The preselected LaMotte/Reams entries the instructions tell the model to use."""
+    selected = lamotte_selection(lamotte_entries(nutrients))
+    entries = [f"{element} = {_measurement(selected[element]) if element in selected else 'N/A'}"
+               for element in LAMOTTE_NUTRIENTS]
+    return f"SELECTED ENTRIES (use these exactly): {'; '.join(entries)}."
+
+
+def _categories_block(cats, listed):
+    return '\n'.join(f"{CATEGORY_LABELS[category]}: {', '.join(cats.get(category) or []) or 'None'}"
+                     for category in listed)
+
+
+def build_soil_prompt(section, data, budget):
+    """Return (prompt, stats) for an LLM soil section.
+
+    `budget` is the input token budget; nutrient entries that do not fit are
+    left out (and counted in stats['dropped']). The static instructions are
+    always sent, so stats['over_budget'] flags a budget smaller than them.
+    """
+    _, data_label, listed, _ = SECTIONS.get(section, DEFAULT_SECTION)
+    heading, instructions = STATIC_BLOCKS[section if section in SECTIONS else None]
+    nutrients = data.get('nutrients') or []
+    categories = _categories_block(prompt_categories(section, data), listed)
+
+    if section == 'lamotteReams':
+        head = f"\n{heading}\n\n{selected_entries_line(nutrients)}\n\n"
+        entries = []
+    elif data_label is None:
+        head = f"\n{heading}\n\nSECTION: {section}\n"
+        entries = []
+    else:
+        head = f"\n{heading}\n\n{data_label}: "
+        entries = [compact_entry(n) for n in relevant_nutrients(section, nutrients)]
+    tail = f"{categories}\n\n{instructions}" if data_label is None else f"\n\n{categories}\n\n{instructions}"
+
+    # Whole entries in report order until the budget runs out, leaving room for the omitted note
+    room = budget * 4 - len(head) - len(tail) - len(' (999 more omitted)')
+    kept = []
+    for entry in entries:
+        room -= len(entry) + 2
+        if room < 0:
+            break
+        kept.append(entry)
+    dropped = len(entries) - len(kept)
+    data_text = '; '.join(kept)
+    if dropped:
+        data_text = f"{data_text} ({dropped} more omitted)".lstrip()
+
+    prompt = f"{head}{data_text}{tail}"
+    tokens = estimate_tokens(prompt)
+    return prompt, {
+        'section': section,
+        'prompt_tokens': tokens,
+        'static_tokens': estimate_tokens(heading) + estimate_tokens(instructions),
+        'budget': budget,
+        'nutrients': len(kept),
+        'dropped': dropped,
+        'over_budget': tokens > budget,
+    }
@@ -0,0 +1,217 @@
+import re
+
+# Patterns used on every cell, compiled once
+UNIT_PATTERN = re.compile(r'\s*(ppm|%|mg/kg|mS/cm)')
+NUMBER_PATTERN = re.compile(r'[-+]?\d*\.\d+|\d+')
+NON_NUMERIC_PATTERN = re.compile(r'[^0-9.]+')
+RANGE_NUMBER_PATTERN = re.compile(r'\d+\.?\d*')
+
+TABLE_ELEMENT = 'element'
+TABLE_TAE = 'tae'
+TABLE_FALLBACK = 'fallback'
+
+ROW_SKIP = 'skip'
+ROW_BASE_SATURATION = 'base_saturation'
+ROW_NUTRIENT = 'nutrient'
+
+BASE_SATURATION_NAMES = frozenset(
+    ['Calcium', 'Magnesium', 'Potassium', 'Sodium', 'Aluminum', 'Hydrogen', 'Other Bases'])
+
+
+def parse_value(val):
+    """First number in a level cell, 0 for empty or below-detection ('<') values."""
+    if not val:
+        return 0
+    val_clean = UNIT_PATTERN.sub('', val)
+    if '<' in val_clean:
+        return 0
+    match = NUMBER_PATTERN.search(val_clean)
+    if match:
+        return float(match.group())
+    return 0
+
+
+def parse_range(val):
+    # Extract numbers from a string like "99 - 124 ppm" and return the midpoint
+    nums = RANGE_NUMBER_PATTERN.findall(val)
+    if len(nums) == 2:
+        return (float(nums[0]) + float(nums[1])) / 2
+    elif len(nums) == 1:
+        return float(nums[0])
+    return None
+
+
+def range_midpoint(range_str):
+    """Midpoint of an "a - b" acceptable range cell, or None."""
+    if not range_str or '-' not in range_str:
+        return None
+    try:
+        parts = [float(NON_NUMERIC_PATTERN.sub('', p)) for p in range_str.split('-')]
+        if len(parts) == 2:
+            return sum(parts) / 2
+    except Exception:
+        return None
+    return None
+
+
+class TableLayout:
+    """How a soil report table is parsed, decided once per table."""
+
+    __slots__ = ('kind', 'header_row', 'header_idx', 'header_map')
+
+    def __init__(self, kind, header_row=None, header_idx=0, header_map=None):
+        self.kind = kind
+        self.header_row = header_row
+        self.header_idx = header_idx
+        self.header_map = header_map or {}
+
+    @property
+    def is_tae(self):
+        return self.kind == TABLE_TAE
+
+
+def map_header(header_row):
+    header_map = {}
+    for idx, cell in enumerate(header_row):
+        if not cell:
+            continue
+        cell_l = cell.strip().lower()
+        if 'element' in cell_l or 'category' in cell_l:
+            header_map['name'] = idx
+        elif 'your level' in cell_l or 'level' in cell_l:
+            header_map['current'] = idx
+        elif 'acceptable range' in cell_l or 'range' in cell_l:
+            header_map['ideal'] = idx
+        elif 'unit' in cell_l:
+            header_map['unit'] = idx
+    return header_map
+
+
+def classify_table(table):
+    """Return the TableLayout for a table, or None for tables that hold no nutrient rows.
+
+    The first row with an ELEMENT cell (element table) or a T.A.E. cell (TAE
+    table) is the header; tables with neither use the column-position fallback.
+    """
+    if not table or len(table) < 2:
+        return None
+    if len(table[0]) < 4:
+        return None
+    for i, row in enumerate(table):
+        upper = [cell.upper() for cell in row if cell and isinstance(cell, str)]
+        if any('ELEMENT' in cell for cell in upper):
+            return TableLayout(TABLE_ELEMENT, row, i, map_header(row))
+        if any('T.A.E' in cell for cell in upper):
+            return TableLayout(TABLE_TAE, row, i, map_header(row))
+    return TableLayout(TABLE_FALLBACK)
+
+
+def parse_header_row(row, layout):
+    """Nutrient dict for a data row of an element or TAE table."""
+    header_map = layout.header_map
+    # Extract the range string as shown in the PDF
+    range_str = row[header_map['ideal']].strip(
+    ) if 'ideal' in header_map and row[header_map['ideal']] else None
+    current = parse_value(
+        row[header_map['current']]) if 'current' in header_map else None
+    nutrient_row = {
+        'name': row[header_map['name']].strip() if 'name' in header_map and row[header_map['name']] else '',
+        'current': current,
+        # For compatibility, keep 'ideal' as the midpoint if possible
+        'ideal': range_midpoint(range_str),
+        'unit': '',
+        'range': range_str,
+        'category': 'tae' if layout.is_tae else None
+    }
+    # Try to extract unit from current value
+    current_raw = row[header_map['current']]
+    if current_raw and '%' in current_raw:
+        nutrient_row['unit'] = '%'
+    elif current_raw and 'ppm' in current_raw:
+        nutrient_row['unit'] = 'ppm'
+    return nutrient_row
+
+
+def classify_fallback_row(row, is_tae=False):
+    """Return (row kind, nutrient dict or None) for a row of a table without a header."""
+    if not row or len(row) < 2:
+        return ROW_SKIP, None
+    name = row[0].strip() if row[0] else ''
+    current_raw = row[1].strip() if row[1] else ''
+    ideal_raw = row[2].strip() if len(row) > 2 and row[2] else ''
+    # Skip empty names and header rows
+    if not name or 'ELEMENT' in name or 'CATEGORY' in name:
+        return ROW_SKIP, None
+    unit = ''
+    if 'ppm' in current_raw or 'ppm' in ideal_raw:
+        unit = 'ppm'
+    elif '%' in current_raw or '%' in ideal_raw:
+        unit = '%'
+    current = parse_value(current_raw)
+    ideal = parse_range(ideal_raw)
+    # Always include base saturation nutrients with % unit, even if ideal is missing,
+    # but only if this is NOT a TAE table
+    if name in BASE_SATURATION_NAMES and unit == '%' and not is_tae:
+        return ROW_BASE_SATURATION, {
+            'name': name,
+            'current': current,
+            'ideal': ideal if ideal is not None else None,
+            'unit': unit
+        }
+    # Only add if we have a valid name and some data
+    if current > 0 or ideal is not None:
+        return ROW_NUTRIENT, {
+            'name': name,
+            'current': current,
+            'ideal': ideal,
+            'unit': unit,
+            'category': 'tae' if is_tae else None
+        }
+    return ROW_SKIP, None
+
+
+class _SilentLog:
+    def info(self, *args, **kwargs):
+        pass
+
+    warning = info
+
+
+def parse_soil_table(table, log=None, layout=None):
+    """Parse one extracted table into nutrient dicts (empty when it holds none).
+
+    Header mappings and parsed rows are logged to `log`; with log=None the
+    table is parsed silently.
+    """
+    log = log or _SilentLog()
+    if layout is None:
+        layout = classify_table(table)
+    if layout is None:
+        return []
+    nutrients = []
+    if layout.kind in (TABLE_ELEMENT, TABLE_TAE):
+        if layout.is_tae:
+            log.info(f'TAE table detected! Row: {layout.header_row}')
+        else:
+            log.info(f'Element table detected! Row: {layout.header_row}')
+        log.info(f'Detected header row: {layout.header_row}')
+        log.info(f'Header mapping: {layout.header_map}')
+        for row in table[layout.header_idx + 1:]:
+            if not row or len(row) < 2:
+                continue
+            nutrient_row = parse_header_row(row, layout)
+            if layout.is_tae:
+                log.info(f'TAE nutrient created: {nutrient_row}')
+            nutrients.append(nutrient_row)
+        return nutrients
+
+    log.warning('No header row detected, using fallback extraction for this table.')
+    for row in table:
+        row_kind, nutrient_row = classify_fallback_row(row, layout.is_tae)
+        if row_kind == ROW_BASE_SATURATION:
+            log.info(f'Base saturation PATCH: {nutrient_row}')
+            nutrients.append(nutrient_row)
+        elif row_kind == ROW_NUTRIENT:
+            log.info(f'Fallback parsed nutrient row: {nutrient_row}')
+            nutrients.append(nutrient_row)
+    return nutrients
@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Keep app imports away from OpenAI and from the on-disk caches, job store and metrics
+_scratch = tempfile.mkdtemp(prefix='soil-tests-')
+os.environ['OPENAI_API_KEY'] = ''
+os.environ.setdefault('JOB_DB_PATH', os.path.join(_scratch, 'jobs.sqlite3'))
+for key in ('EXTRACTION_CACHE_DIR', 'COMMENT_CACHE_DIR', 'METRICS_DIR', 'OCR_SLOT_DIR'):
+    os.environ[key] = ''
+os.environ.setdefault('COMMENT_CACHE_SIZE', '0')
+
+from types import SimpleNamespace
+
+import pytest
+
+
+class StubLLM:
+    """Stands in for app.llm: create() answers with `reply`, word by word when stream=True.
+
+    `error` is raised instead of answering; with `fail_after` set, a stream
+    yields that many chunks before raising it.
+    """
+
+    def __init__(self, reply='Stub summary from the model.'):
+        self.reply = reply
+        self.error = None
+        self.fail_after = None
+        self.calls = 0
+
+    def create(self, deadline, stream=False, **kwargs):
+        self.calls += 1
+        if self.error is not None and self.fail_after is None:
+            raise self.error
+        if not stream:
+            message = SimpleNamespace(content=self.reply)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+        return self._chunks()
+
+    def _chunks(self):
+        words = self.reply.split(' ')
+        for index, word in enumerate(words):
+            if self.fail_after is not None and index == self.fail_after:
+                raise self.error
+            text = word if index == len(words) - 1 else word + ' '
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+
+
+@pytest.fixture
+def stub_llm(monkeypatch):
+    """Route the app's OpenAI calls to a StubLLM."""
+    import app as backend
+
+    stub = StubLLM()
+    monkeypatch.setattr(backend, 'client', object())
+    monkeypatch.setattr(backend, 'llm', stub)
+    return stub
@@ -0,0 +1,87 @@
+import pytest
+
+import app as backend
+from result_cache import ResultCache
+
+CEC = {
+    'section': 'cec',
+    'nutrients': [{'name': 'CEC', 'current': 13.3, 'unit': 'cmol/kg'}],
+    'statusCategories': {'optimal': ['CEC']},
+}
+
+
+@pytest.fixture
+def comment_cache(monkeypatch):
+    # conftest turns the comment cache off (COMMENT_CACHE_SIZE=0)
+    cache = ResultCache(max_entries=16)
+    monkeypatch.setattr(backend, 'COMMENT_CACHE_SIZE', 16)
+    monkeypatch.setattr(backend, 'comment_cache', cache)
+    return cache
+
+
+def test_equal_payloads_share_a_cache_key():
+    first = {
+        'section': 'availableNutrients',
+        'nutrients': [{'name': 'Zinc', 'current': 1.2300001, 'ideal': 2}],
+        'statusCategories': {'deficient': ['Zinc', 'Boron'], 'optimal': ['Calcium', 'Sodium']},
+    }
+    second = {
+        'statusCategories': {'optimal': ['Sodium', ' Calcium'], 'deficient': ['Boron', 'Zinc']},
+        'nutrients': [{'ideal': 2.0, 'current': 1.23, 'name': 'Zinc '}],
+        'section': 'availableNutrients',
+        'regenerate': True,
+    }
+    assert backend.comment_cache_key('soil', first) == backend.comment_cache_key('soil', second)
+
+    plant = {'deficient': ['Zinc', 'Boron'], 'optimal': [], 'excess': ['Sodium']}
+    reordered = {'excess': ['Sodium'], 'optimal': [], 'deficient': ['Boron', 'Zinc']}
+    assert backend.comment_cache_key('plant', plant) == backend.comment_cache_key('plant', reordered)
+
+    changed = dict(first, nutrients=[{'name': 'Zinc', 'current': 1.24, 'ideal': 2}])
+    assert backend.comment_cache_key('soil', changed) != backend.comment_cache_key('soil', first)
+    assert backend.comment_cache_key('plant', first) != backend.comment_cache_key('soil', first)
+
+
+def test_soil_comments_report_cache_hits(comment_cache):
+    client = backend.app.test_client()
+    body = dict(CEC, mode='deterministic')
+    first = client.post('/generate-soil-comments', json=body)
+    assert (first.status_code, first.headers['X-Cache']) == (200, 'MISS')
+    second = client.post('/generate-soil-comments', json=body)
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_json() == first.get_json()
+
+    regenerated = client.post('/generate-soil-comments', json=body, headers={'Cache-Control': 'no-cache'})
+    assert regenerated.headers['X-Cache'] == 'MISS'
+
+
+def test_plant_comments_report_cache_hits(comment_cache, stub_llm):
+    client = backend.app.test_client()
+    body = {'deficient': ['Zinc'], 'optimal': ['Calcium'], 'excess': []}
+    first = client.post('/generate-comments', json=body)
+    assert (first.status_code, first.headers['X-Cache']) == (200, 'MISS')
+    assert first.get_json() == {'summary': stub_llm.reply}
+
+    second = client.post('/generate-comments', json={'excess': [], 'optimal': ['Calcium'], 'deficient': ['Zinc']})
+    assert (second.headers['X-Cache'], second.get_json()) == ('HIT', first.get_json())
+    assert stub_llm.calls == 1
+
+    regenerated = client.post('/generate-comments', json=dict(body, regenerate=True))
+    assert regenerated.headers['X-Cache'] == 'MISS'
+    assert stub_llm.calls == 2
+
+
+def test_fallback_summaries_are_not_cached(comment_cache, stub_llm):
+    stub_llm.error = RuntimeError('model unavailable')
+    client = backend.app.test_client()
+    body = dict(CEC, mode='fallback')
+    for attempt in (1, 2):
+        response = client.post('/generate-soil-comments', json=body)
+        assert (response.status_code, response.headers['X-Cache']) == (200, 'MISS')
+        assert response.get_json()['summary'] == backend.soil_comments.render_section('cec', body)
+        assert stub_llm.calls == attempt  # nothing stored, so the LLM is tried again
+    assert comment_cache.get(backend.comment_cache_key('soil', body)) is None
+
+    stub_llm.error = None
+    assert client.post('/generate-soil-comments', json=body).get_json() == {'summary': stub_llm.reply}
+    assert client.post('/generate-soil-comments', json=body).headers['X-Cache'] == 'HIT'
@@ -0,0 +1,70 @@
+import json
+
+import app as backend
+
+PLANT = {'deficient': ['Zinc'], 'optimal': ['Calcium'], 'excess': []}
+CEC = {
+    'section': 'cec',
+    'nutrients': [{'name': 'CEC', 'current': 13.3, 'unit': 'cmol/kg'}],
+    'statusCategories': {'optimal': ['CEC']},
+}
+
+
+def read_events(response):
+    """[(event, payload)] of an SSE response, checking each frame's shape on the way."""
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    body = response.get_data(as_text=True)
+    assert body.endswith('\n\n')
+    events = []
+    for frame in body[:-2].split('\n\n'):
+        event, data = frame.split('\n')
+        assert event.startswith('event: ') and data.startswith('data: ')
+        events.append((event[len('event: '):], json.loads(data[len('data: '):])))
+    return events
+
+
+def test_plant_stream_sends_deltas_then_the_summary(stub_llm):
+    response = backend.app.test_client().post('/generate-comments/stream', json=PLANT)
+    events = read_events(response)
+    deltas = [payload['text'] for event, payload in events[:-1]]
+    assert {event for event, _ in events[:-1]} == {'delta'} and len(deltas) > 1
+    assert ''.join(deltas) == stub_llm.reply
+    assert events[-1] == ('done', {'summary': stub_llm.reply, 'cache': 'MISS'})
+
+
+def test_soil_stream_sends_deltas_then_the_summary(stub_llm):
+    response = backend.app.test_client().post('/generate-soil-comments/stream', json=dict(CEC, mode='llm'))
+    events = read_events(response)
+    assert [event for event, _ in events] == ['delta'] * len(stub_llm.reply.split(' ')) + ['done']
+    assert events[-1][1]['summary'] == stub_llm.reply
+
+
+def test_local_soil_sections_arrive_as_one_done_event(stub_llm):
+    body = dict(CEC, mode='deterministic')
+    events = read_events(backend.app.test_client().post('/generate-soil-comments/stream', json=body))
+    assert events == [('done', {'summary': backend.soil_comments.render_section('cec', body), 'cache': 'MISS'})]
+    assert stub_llm.calls == 0
+
+
+def test_llm_error_mid_stream_ends_with_an_error_event(stub_llm):
+    stub_llm.error = RuntimeError('connection reset by model')
+    stub_llm.fail_after = 2
+    for url, body in (('/generate-comments/stream', PLANT),
+                      ('/generate-soil-comments/stream', dict(CEC, mode='fallback'))):
+        events = read_events(backend.app.test_client().post(url, json=body))
+        # Text already streamed rules out the deterministic fallback
+        assert [event for event, _ in events] == ['delta', 'delta', 'error']
+        assert events[-1][1] == {'error': 'connection reset by model'}
+
+
+def test_llm_error_before_any_text_falls_back_for_soil_sections(stub_llm):
+    stub_llm.error = RuntimeError('model unavailable')
+    body = dict(CEC, mode='fallback')
+    events = read_events(backend.app.test_client().post('/generate-soil-comments/stream', json=body))
+    summary = backend.soil_comments.render_section('cec', body)
+    assert events == [('done', {'summary': summary, 'cache': 'MISS', 'fallback': True})]
+
+    events = read_events(backend.app.test_client().post('/generate-comments/stream', json=PLANT))
+    assert events == [('error', {'error': 'model unavailable'})]
@@ -0,0 +1,62 @@
+import io
+import json
+
+import pytest
+
+import app as backend
+
+
+def upload(*names):
+    return {'files': [(io.BytesIO(f'%PDF {name}'.encode()), name) for name in names]}
+
+
+def post_batch(data):
+    return backend.app.test_client().post('/extract-soil-reports/batch', data=data,
+                                          content_type='multipart/form-data')
+
+
+@pytest.fixture
+def extraction(monkeypatch):
+    """Per-file outcomes keyed by upload content: a reading, an extraction error or an exception."""
+
+    def extract(data):
+        name = data.decode().split(' ', 1)[1]
+        if name == 'crash.pdf':
+            raise RuntimeError('corrupt xref table')
+        if name == 'empty.pdf':
+            return {'error': 'No nutrient tables found'}, 422, False
+        return {'analyses': [{'id': 0, 'source': name}]}, 200, False
+
+    monkeypatch.setattr(backend, 'extract_soil_report_cached', extract)
+
+
+def test_each_file_gets_its_own_line(extraction):
+    response = post_batch(upload('a.pdf', 'b.pdf', 'c.pdf'))
+    assert (response.status_code, response.mimetype) == (200, 'application/x-ndjson')
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert sorted((line['index'], line['filename']) for line in lines) == [(0, 'a.pdf'), (1, 'b.pdf'), (2, 'c.pdf')]
+    for line in lines:
+        assert (line['status'], line['cache']) == (200, 'MISS')
+        assert line['result'] == {'analyses': [{'id': 0, 'source': line['filename']}]}
+
+
+def test_failed_files_are_reported_without_ending_the_stream(extraction):
+    response = post_batch(upload('a.pdf', 'crash.pdf', 'empty.pdf', 'd.pdf'))
+    lines = {line['filename']: line for line in map(json.loads, response.get_data(as_text=True).splitlines())}
+    assert sorted(lines) == ['a.pdf', 'crash.pdf', 'd.pdf', 'empty.pdf']
+    assert lines['crash.pdf'] == {'index': 1, 'filename': 'crash.pdf', 'status': 500,
+                                  'error': 'Exception during PDF extraction', 'details': 'corrupt xref table'}
+    assert (lines['empty.pdf']['status'], lines['empty.pdf']['error']) == (422, 'No nutrient tables found')
+    assert lines['a.pdf']['status'] == lines['d.pdf']['status'] == 200
+
+
+def test_too_many_files_are_rejected(extraction, monkeypatch):
+    monkeypatch.setattr(backend, 'BATCH_MAX_FILES', 2)
+    response = post_batch(upload('a.pdf', 'b.pdf', 'c.pdf'))
+    assert response.status_code == 413
+    assert response.get_json() == {'error': 'Too many files: at most 2 per batch'}
+    assert post_batch(upload('a.pdf', 'b.pdf')).status_code == 200
+
+
+def test_empty_batches_are_rejected():
+    assert post_batch({}).status_code == 400
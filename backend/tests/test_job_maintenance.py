@@ -0,0 +1,27 @@
+import os
+import subprocess
+import sys
+
+import app as backend
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def maintenance_running():
+    return any(thread.name == 'extract-job-maintenance' for thread in backend.threading.enumerate())
+
+
+def test_importing_the_app_starts_no_job_maintenance():
+    code = ('import threading, app; '
+            'print(any(t.name == "extract-job-maintenance" for t in threading.enumerate()))')
+    output = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, env=dict(os.environ),
+                            capture_output=True, text=True, check=True).stdout
+    assert output.strip().splitlines()[-1] == 'False'
+
+
+def test_first_job_poll_starts_job_maintenance_once():
+    client = backend.app.test_client()
+    assert client.get('/extract-soil-report/jobs/missing').status_code == 404
+    client.get('/extract-soil-report/jobs/missing')
+    assert maintenance_running()
+    assert sum(thread.name == 'extract-job-maintenance' for thread in backend.threading.enumerate()) == 1
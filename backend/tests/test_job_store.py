@@ -0,0 +1,105 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from job_store import JOB_DONE, JOB_FAILED, JOB_QUEUED, JOB_RUNNING, JobStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / 'jobs.sqlite3'))
+
+
+def backdate(store, job_id, seconds):
+    conn = sqlite3.connect(store.path)
+    with conn:
+        conn.execute('UPDATE jobs SET heartbeat_at = heartbeat_at - ?, updated_at = updated_at - ? WHERE id = ?',
+                     (seconds, seconds, job_id))
+    conn.close()
+
+
+def test_database_uses_wal_journal(store):
+    store.create('extract-soil-report', 'report.pdf', b'%PDF')
+    conn = sqlite3.connect(store.path)
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    conn.close()
+
+
+def test_job_lifecycle(store):
+    job_id = store.create('extract-soil-report', 'report.pdf', b'%PDF-1.4')
+    assert store.get(job_id)['status'] == JOB_QUEUED
+    assert store.claim(job_id, 'worker-1')
+    assert store.load_input(job_id) == ('extract-soil-report', 'report.pdf', b'%PDF-1.4')
+
+    store.update_progress(job_id, 0.5, 'Reading nutrient tables')
+    job = store.get(job_id)
+    assert (job['status'], job['progress'], job['message']) == (JOB_RUNNING, 0.5, 'Reading nutrient tables')
+
+    store.finish(job_id, {'analyses': [1, 2]})
+    job = store.get(job_id)
+    assert (job['status'], job['progress'], job['result']) == (JOB_DONE, 1, {'analyses': [1, 2]})
+    # The upload is dropped once the job has an outcome
+    assert store.load_input(job_id)[2] is None
+
+
+def test_claim_is_exclusive_across_connections(store):
+    job_id = store.create('extract-soil-report', 'report.pdf', b'%PDF')
+    # Separate JobStore objects stand in for separate gunicorn workers
+    workers = [JobStore(store.path) for _ in range(8)]
+    claimed = []
+    barrier = threading.Barrier(len(workers))
+
+    def claim(worker, owner):
+        barrier.wait()
+        if worker.claim(job_id, owner):
+            claimed.append(owner)
+
+    threads = [threading.Thread(target=claim, args=(worker, f'worker-{i}')) for i, worker in enumerate(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    assert len(claimed) == 1
+    assert store.get(job_id)['attempts'] == 1
+
+
+def test_stale_jobs_are_requeued_then_failed(store):
+    job_id = store.create('extract-soil-report', 'report.pdf', b'%PDF')
+    store.claim(job_id, 'worker-1')
+    assert store.requeue_stale(stale_after=60, max_attempts=2) == []
+
+    backdate(store, job_id, 120)
+    assert store.requeue_stale(stale_after=60, max_attempts=2) == [job_id]
+    assert store.get(job_id)['status'] == JOB_QUEUED
+
+    store.claim(job_id, 'worker-2')
+    backdate(store, job_id, 120)
+    assert store.requeue_stale(stale_after=60, max_attempts=2) == []
+    job = store.get(job_id)
+    assert (job['status'], job['error']) == (JOB_FAILED, 'Job was interrupted too many times')
+
+
+def test_heartbeat_keeps_running_jobs_alive(store):
+    job_id = store.create('extract-soil-report', 'report.pdf', b'%PDF')
+    store.claim(job_id, 'worker-1')
+    backdate(store, job_id, 120)
+    store.heartbeat('worker-1')
+    assert store.requeue_stale(stale_after=60, max_attempts=3) == []
+
+
+def test_queued_before_and_purge(store):
+    queued = store.create('extract-soil-report', 'a.pdf', b'%PDF')
+    failed = store.create('extract-soil-report', 'b.pdf', b'%PDF')
+    store.fail(failed, 'Extraction failed', {'error': 'Extraction failed'})
+    assert store.get(failed)['result'] == {'error': 'Extraction failed'}
+
+    assert store.queued_before(time.time() - 60) == []
+    assert store.queued_before(time.time() + 1) == [queued]
+
+    assert store.purge(older_than=60) == 0
+    backdate(store, failed, 120)
+    assert store.purge(older_than=60) == 1
+    assert store.get(failed) is None
+    assert store.get(queued)['status'] == JOB_QUEUED
@@ -0,0 +1,120 @@
+import httpx
+import openai
+import pytest
+
+from llm_resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, ResilientLLM
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeClient:
+    """Stands in for openai.OpenAI: create() pops the next outcome (an exception is raised)."""
+
+    def __init__(self, outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = 0
+        self.chat = self
+        self.completions = self
+
+    def with_options(self, **options):
+        return self
+
+    def create(self, **kwargs):
+        self.calls += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def connection_error():
+    return openai.APIConnectionError(request=httpx.Request('POST', 'https://api.openai.com/v1/chat/completions'))
+
+
+def bad_request():
+    request = httpx.Request('POST', 'https://api.openai.com/v1/chat/completions')
+    return openai.BadRequestError('bad request', response=httpx.Response(400, request=request), body=None)
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_after=30, clock=FakeClock())
+    assert not breaker.record_failure()
+    breaker.record_success()  # a success resets the count
+    assert [breaker.record_failure() for _ in range(3)] == [False, False, True]
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_lets_one_probe_through_when_half_open():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=30, clock=clock)
+    breaker.record_failure()
+    clock.now = 29.9
+    assert not breaker.allow()
+    clock.now = 30
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # only one probe at a time
+
+
+def test_half_open_probe_success_closes_the_circuit():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=30, clock=clock)
+    breaker.record_failure()
+    clock.now = 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    assert breaker.allow() and breaker.allow()
+
+
+def test_half_open_probe_failure_reopens_the_circuit():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=5, reset_after=30, clock=clock)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now = 30
+    assert breaker.allow()
+    assert breaker.record_failure()  # a single failed probe is enough
+    assert breaker.state == OPEN
+    clock.now = 59
+    assert not breaker.allow()
+    clock.now = 60
+    assert breaker.allow()
+
+
+def test_resilient_llm_retries_then_opens_the_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=30, clock=clock)
+    client = FakeClient([connection_error(), connection_error()])
+    llm = ResilientLLM(client, breaker, attempts=2, retry_backoff=0)
+
+    with pytest.raises(openai.APIConnectionError):
+        llm.create(5, model='gpt', messages=[])
+    assert client.calls == 2
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError):
+        llm.create(5, model='gpt', messages=[])
+    assert client.calls == 2  # rejected without calling OpenAI
+
+    clock.now = 30
+    client.outcomes.append('summary')
+    assert llm.create(5, model='gpt', messages=[]) == 'summary'
+    assert breaker.state == CLOSED
+
+
+def test_client_errors_do_not_count_against_the_breaker():
+    breaker = CircuitBreaker(failure_threshold=1, reset_after=30, clock=FakeClock())
+    client = FakeClient([bad_request()])
+    llm = ResilientLLM(client, breaker, attempts=3, retry_backoff=0)
+    with pytest.raises(openai.BadRequestError):
+        llm.create(5, model='gpt', messages=[])
+    assert client.calls == 1
+    assert breaker.state == CLOSED
@@ -0,0 +1,31 @@
+import app as backend
+from instrumentation import metrics
+
+
+def test_requests_flush_metrics_at_most_once_per_interval(tmp_path, monkeypatch):
+    flushes = []
+    real_flush = metrics.flush
+
+    def counted_flush():
+        flushes.append(1)
+        real_flush()
+
+    monkeypatch.setattr(metrics, 'directory', str(tmp_path))
+    monkeypatch.setattr(metrics, 'flush', counted_flush)
+    monkeypatch.setattr(metrics, '_flushed_at', 0.0)
+
+    client = backend.app.test_client()
+    for _ in range(20):
+        assert client.get('/no-such-route').status_code == 404
+    assert len(flushes) == 1
+    assert (tmp_path / f'{backend.os.getpid()}.json').exists()
+
+
+def test_metrics_endpoint_flushes_its_own_worker(tmp_path, monkeypatch):
+    flushes = []
+    monkeypatch.setattr(metrics, 'directory', str(tmp_path))
+    monkeypatch.setattr(metrics, 'flush', lambda: flushes.append(1))
+    monkeypatch.setattr(metrics, '_flushed_at', 1e18)  # request flushes are rate limited away
+
+    assert backend.app.test_client().get('/metrics').status_code == 200
+    assert len(flushes) == 1
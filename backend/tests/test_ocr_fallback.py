@@ -0,0 +1,21 @@
+import app as backend
+from pdf_document import PdfDocument, PdfPage
+
+
+def test_only_pages_without_text_are_ocred():
+    document = PdfDocument(b'', [
+        PdfPage(1, 'Soil Therapy report\nCalcium 1200 ppm', [[['Calcium', '1200']]]),
+        PdfPage(2, 'Notes on sampling depth and interpretation of the results.', []),
+        PdfPage(3, '', []),
+        PdfPage(4, ' 3 \n', []),
+    ])
+    assert backend.pages_needing_ocr(document, analysed_pages={1}) == [3, 4]
+
+
+def test_ocr_analysis_info_has_the_table_info_keys():
+    info = backend.ocr_analysis_info('Crop: Wheat\nPaddock: North 2\nSampled 12/03/2024\nCalcium 1200',
+                                     'OCR Analysis (page 3)', 3)
+    assert set(info) == set(backend.extract_analysis_info([[['x']]], 0))
+    assert info['name'] == 'OCR Analysis (page 3)' and info['page'] == 3
+    assert info['crop'] == 'Wheat' and info['paddock'] == 'North 2' and info['date'] == '12/03/2024'
+    assert info['location'] == 'Unknown'
@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+
+import pytest
+
+from result_cache import ResultCache
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'b' is now the least recently used
+    cache.set('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1 and cache.get('c') == 3
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path):
+    cache = ResultCache(max_entries=0, cache_dir=str(tmp_path), max_disk_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    old = time.time() - 60
+    os.utime(tmp_path / 'a.json', (old, old))
+    os.utime(tmp_path / 'b.json', (old - 60, old - 60))
+    assert cache.get('b') == 2  # touching 'b' makes 'a' the oldest file
+    cache.set('c', 3)
+    assert sorted(os.listdir(tmp_path)) == ['b.json', 'c.json']
+
+
+def test_ttl_expires_entries():
+    cache = ResultCache(ttl=0)
+    cache.set('a', 1)
+    time.sleep(0.01)
+    assert cache.get('a') is None
+
+
+def run_coalesced(cache, compute, waiters=4):
+    """Start a leader blocked inside compute() plus `waiters` callers of the same key."""
+    release = threading.Event()
+    started = threading.Event()
+    calls = []
+
+    def leader_compute():
+        calls.append('leader')
+        started.set()
+        release.wait(5)
+        return compute()
+
+    def waiter_compute():
+        calls.append('waiter')
+        return compute()
+
+    outcomes = [None] * (waiters + 1)
+
+    def call(index, fn):
+        try:
+            outcomes[index] = ('value', cache.get_or_compute('key', fn, cacheable=lambda v: v != 'uncached'))
+        except Exception as e:
+            outcomes[index] = ('error', e)
+
+    threads = [threading.Thread(target=call, args=(0, leader_compute))]
+    threads[0].start()
+    started.wait(5)
+    for index in range(1, waiters + 1):
+        threads.append(threading.Thread(target=call, args=(index, waiter_compute)))
+        threads[-1].start()
+    time.sleep(0.05)  # let the waiters block on the leader
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes, calls
+
+
+def test_coalesced_waiters_share_the_leaders_result():
+    outcomes, calls = run_coalesced(ResultCache(), lambda: {'answer': 42})
+    assert calls == ['leader']
+    assert outcomes[0] == ('value', ({'answer': 42}, False))
+    assert all(outcome == ('value', ({'answer': 42}, True)) for outcome in outcomes[1:])
+
+
+def test_coalesced_waiters_share_an_uncacheable_result():
+    cache = ResultCache()
+    outcomes, calls = run_coalesced(cache, lambda: 'uncached')
+    assert calls == ['leader']
+    # Shared, but not a hit: nothing was stored for the waiters to find
+    assert all(outcome == ('value', ('uncached', False)) for outcome in outcomes)
+    assert cache.get('key') is None
+
+
+def test_coalesced_waiters_see_the_leaders_exception():
+    def fail():
+        raise RuntimeError('extraction failed')
+
+    cache = ResultCache()
+    outcomes, calls = run_coalesced(cache, fail)
+    assert calls == ['leader']
+    for kind, error in outcomes:
+        assert kind == 'error' and str(error) == 'extraction failed'
+    # Nothing was stored, so the next caller computes again
+    assert cache.get_or_compute('key', lambda: 'fresh') == ('fresh', False)
+
+
+def test_get_or_compute_hits_after_a_cacheable_result():
+    cache = ResultCache()
+    assert cache.get_or_compute('key', lambda: 'value') == ('value', False)
+    assert cache.get_or_compute('key', pytest.fail) == ('value', True)
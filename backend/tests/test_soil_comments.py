@@ -0,0 +1,59 @@
+import soil_comments
+import soil_prompts
+
+
+def categories(**lists):
+    keys = ('deficient', 'marginallyDeficient', 'optimal', 'marginallyExcessive', 'excess')
+    return {key: lists.get(key, []) for key in keys}
+
+
+def test_soil_ph_ignores_other_nutrients_in_the_status_lists():
+    data = {
+        'nutrients': [{'name': 'Phosphorus', 'current': 20, 'ideal': 50},
+                      {'name': 'pH-level (1:5 water)', 'current': 6.5, 'ideal': 6.5}],
+        'statusCategories': categories(excess=['Sodium (Mehlich III)'], deficient=['Phosphorus']),
+    }
+    summary = soil_comments.render_soil_ph(data)
+    assert 'is optimal at 6.5' in summary
+
+
+def test_soil_ph_uses_a_listed_ph_category():
+    data = {
+        'nutrients': [{'name': 'pH-level (1:5 water)', 'current': 8.4, 'ideal': 6.5}],
+        'statusCategories': categories(optimal=['Calcium'], excess=['pH-level (1:5 water)']),
+    }
+    assert 'is alkaline at 8.4' in soil_comments.render_soil_ph(data)
+
+
+def test_base_saturation_skips_mehlich_tae_and_lamotte_readings():
+    data = {'statusCategories': categories(
+        optimal=['Calcium', 'Sodium'],
+        deficient=['Calcium (Mehlich III)', 'Magnesium_LaMotte'],
+        excess=['Sodium (Mehlich III)', 'Sodium TAE'])}
+    summary = soil_comments.render_base_saturation(data)
+    assert 'Calcium and Sodium are optimal' in summary
+    assert 'deficient' not in summary and 'excessive' not in summary
+    assert soil_prompts.prompt_categories('baseSaturation', data)[soil_comments.OPTIMAL] == ['Calcium', 'Sodium']
+
+
+def test_lamotte_reams_reads_only_lamotte_entries():
+    data = {
+        'nutrients': [{'name': 'Calcium (Mehlich III)', 'current': 900, 'ideal': 2000, 'unit': 'ppm'},
+                      {'name': 'Calcium_LaMotte', 'current': 1500, 'ideal': 1500, 'unit': 'ppm'}],
+        'statusCategories': categories(deficient=['Calcium (Mehlich III)'], excess=['Potassium TAE']),
+    }
+    summary = soil_comments.render_lamotte_reams(data)
+    assert 'Calcium is optimal' in summary
+    assert 'Potassium' not in summary.split('Of the key entries', 1)[1]
+
+
+def test_available_nutrients_mentions_aluminium_only_when_excessive():
+    data = {'statusCategories': categories(
+        deficient=['Aluminum', 'Phosphorus (Mehlich III)'], optimal=['Sulphur'], excess=['Sodium'])}
+    summary = soil_comments.render_available_nutrients(data)
+    assert summary.startswith('Available nutrients are the plant-available forms')
+    assert 'Aluminium' not in summary and 'Sulfur' in summary
+    assert soil_comments.RENDERERS['availableNutrients'] is soil_comments.render_available_nutrients
+
+    data['statusCategories']['excess'].append('Aluminium')
+    assert 'Aluminium' in soil_comments.render_available_nutrients(data)
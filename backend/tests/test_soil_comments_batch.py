@@ -0,0 +1,62 @@
+import pytest
+
+import app as backend
+
+# One report-wide payload: every table's readings and one set of status lists
+REPORT = {
+    'mode': 'deterministic',
+    'nutrients': [
+        {'name': 'CEC', 'current': 13.3, 'unit': 'cmol/kg'},
+        {'name': 'pH-level (1:5 water)', 'current': 6.5, 'ideal': 6.5, 'unit': ''},
+        {'name': 'Organic Matter (Calc)', 'current': 4.1, 'ideal': 5, 'unit': '%'},
+        {'name': 'Calcium', 'current': 68, 'ideal': 68, 'unit': '%'},
+        {'name': 'Sodium', 'current': 1.5, 'ideal': 1.5, 'unit': '%'},
+        {'name': 'Calcium (Mehlich III)', 'current': 900, 'ideal': 2000, 'unit': 'ppm'},
+        {'name': 'Sodium (Mehlich III)', 'current': 300, 'ideal': 50, 'unit': 'ppm'},
+        {'name': 'Calcium_LaMotte', 'current': 1500, 'ideal': 1500, 'unit': 'ppm', 'category': 'lamotte_reams'},
+        {'name': 'Calcium TAE', 'current': 4000, 'ideal': 4000, 'unit': 'ppm', 'category': 'tae'},
+        {'name': 'Sodium TAE', 'current': 900, 'ideal': 300, 'unit': 'ppm', 'category': 'tae'},
+    ],
+    'statusCategories': {
+        'deficient': ['Calcium (Mehlich III)'],
+        'marginallyDeficient': [],
+        'optimal': ['CEC', 'pH-level (1:5 water)', 'Organic Matter (Calc)', 'Calcium', 'Sodium',
+                    'Calcium_LaMotte', 'Calcium TAE'],
+        'marginallyExcessive': [],
+        'excess': ['Sodium (Mehlich III)', 'Sodium TAE'],
+    },
+}
+
+
+@pytest.fixture
+def sections():
+    response = backend.app.test_client().post('/generate-soil-comments/batch', json=REPORT)
+    assert response.status_code == 200
+    return {name: result.get('summary') for name, result in response.get_json()['sections'].items()}
+
+
+def test_each_section_sees_only_its_own_nutrients(sections):
+    assert 'is optimal at 6.5' in sections['soilPh']
+    assert 'is alkaline' not in sections['soilPh']
+
+    available = sections['availableNutrients']
+    assert 'Sodium' in available and 'Calcium' in available
+    for other in ('CEC', 'pH', 'Organic Matter'):
+        assert other not in available
+
+    # Base saturation Calcium and Sodium are optimal; the Mehlich and TAE readings are not theirs
+    base = sections['baseSaturation']
+    assert 'Calcium and Sodium are optimal' in base
+    assert 'excessive' not in base and 'deficient' not in base
+
+    assert 'Calcium is optimal' in sections['lamotteReams']
+    assert 'excessive level of Sodium' in sections['tae']
+    assert 'Calcium' in sections['tae']
+
+
+def test_sections_bringing_their_own_payload_are_not_narrowed():
+    body = dict(REPORT, sections=[{'section': 'soilPh',
+                                   'nutrients': [{'name': 'pH', 'current': 8.4, 'ideal': 6.5}],
+                                   'statusCategories': {'excess': ['pH']}}])
+    response = backend.app.test_client().post('/generate-soil-comments/batch', json=body)
+    assert 'is alkaline at 8.4' in response.get_json()['sections']['soilPh']['summary']
@@ -0,0 +1,107 @@
+import threading
+import time
+
+import httpx
+import pytest
+
+from devtools.fake_upstream import start_fake_upstream
+from upstream_comments import UpstreamCommentsClient
+
+TTL = 0.1
+
+
+@pytest.fixture
+def upstream():
+    server = start_fake_upstream()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def client_for(server, **options):
+    return UpstreamCommentsClient(server.base_url, timeout=2, **dict({'ttl': TTL}, **options))
+
+
+def explanation(entry):
+    return entry['data']['ai_comments']['combined_nutrients_explanation']
+
+
+def expire():
+    time.sleep(TTL * 1.5)
+
+
+def test_fresh_entries_are_served_from_the_cache(upstream):
+    client = client_for(upstream)
+    entry, cache = client.get('report-1', 'k1')
+    assert (entry['status'], cache) == (200, 'MISS')
+    assert client.get('report-1', 'k1') == (entry, 'HIT')
+    assert upstream.stats['requests'] == 1
+
+
+def test_expired_entries_are_revalidated_with_304(upstream):
+    client = client_for(upstream)
+    first, _ = client.get('report-1', 'k1')
+    assert first['etag'] and first['last_modified']
+    expire()
+    entry, cache = client.get('report-1', 'k1')
+    assert cache == 'REVALIDATED'
+    assert explanation(entry) == explanation(first)
+    assert upstream.stats['not_modified'] == 1
+    # The 304 restarted the TTL
+    assert client.get('report-1', 'k1')[1] == 'HIT'
+
+
+def test_changed_payload_replaces_the_entry(upstream):
+    client = client_for(upstream)
+    client.get('report-1', 'k1')
+    upstream.configure(version=2)
+    expire()
+    entry, cache = client.get('report-1', 'k1')
+    assert cache == 'MISS'
+    assert '(version 2)' in explanation(entry)
+
+
+def test_stale_entry_is_served_when_upstream_fails(upstream):
+    client = client_for(upstream, stale_if_error=60)
+    first, _ = client.get('report-1', 'k1')
+    expire()
+    upstream.configure(fail_next=1, fail_status=503)
+    entry, cache = client.get('report-1', 'k1')
+    assert (cache, entry['status'], explanation(entry)) == ('STALE', 200, explanation(first))
+
+
+def test_stale_entry_is_served_when_upstream_times_out(upstream):
+    client = UpstreamCommentsClient(upstream.base_url, timeout=0.2, ttl=TTL, stale_if_error=60)
+    client.get('report-1', 'k1')
+    upstream.configure(delay=0.5)
+    expire()
+    entry, cache = client.get('report-1', 'k1')
+    assert (cache, entry['status']) == ('STALE', 200)
+    with pytest.raises(httpx.TransportError):
+        client.get('report-2', 'k1')  # nothing stored to fall back on
+
+
+def test_errors_pass_through_after_the_stale_window(upstream):
+    client = client_for(upstream, stale_if_error=0)
+    client.get('report-1', 'k1')
+    expire()
+    upstream.configure(fail_next=1, fail_status=502)
+    entry, cache = client.get('report-1', 'k1')
+    assert (cache, entry['status']) == ('MISS', 502)
+    # The error answer was not stored, so the next call fetches again
+    assert client.get('report-1', 'k1')[0]['status'] == 200
+
+
+def test_concurrent_requests_share_one_upstream_call(upstream):
+    upstream.configure(delay=0.3)
+    client = client_for(upstream, ttl=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.get('report-1', 'k1')))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert upstream.stats['requests'] == 1
+    assert sorted(cache for _, cache in results) == ['COALESCED'] * 4 + ['MISS']
+    assert len({id(entry) for entry, _ in results}) == 1
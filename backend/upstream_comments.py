@@ -0,0 +1,129 @@
+import json
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+
+import httpx
+
+COMMENTS_PATH = '/api/downloadable-charts-pdfs/{report_ref_id}/get_ai_comments/'
+
+
+class UpstreamCommentsClient:
+    """GETs of the upstream AI comments API through a keep-alive connection pool.
+
+    Successful responses are cached per (report_ref_id, key) for ``ttl``
+    seconds. Once an entry is older it is revalidated with If-None-Match /
+    If-Modified-Since, and a 304 keeps the stored body. When the upstream
+    cannot be reached or answers with a 5xx, an entry up to
+    ``stale_if_error`` seconds past its TTL is served instead. Concurrent
+    requests for the same pair share one upstream call.
+
+    get() returns (entry, cache) where entry holds status, data (parsed JSON
+    or None), text, etag and last_modified, and cache is HIT, MISS,
+    REVALIDATED, STALE or COALESCED (answered by another thread's call).
+    """
+
+    def __init__(self, base_url, timeout=10.0, ttl=60, max_entries=256, stale_if_error=300,
+                 max_connections=20):
+        self.base_url = base_url.rstrip('/')
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stale_if_error = stale_if_error
+        self.http = httpx.Client(
+            timeout=httpx.Timeout(timeout, connect=min(timeout, 5.0)),
+            limits=httpx.Limits(max_connections=max_connections,
+                                max_keepalive_connections=max_connections),
+            headers={'User-Agent': 'Mozilla/5.0'},
+        )
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def url(self, report_ref_id):
+        return self.base_url + COMMENTS_PATH.format(report_ref_id=urllib.parse.quote(report_ref_id, safe=''))
+
+    def _cached(self, cache_key):
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self._entries.move_to_end(cache_key)
+            return entry
+
+    def _store(self, cache_key, entry):
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[cache_key] = entry
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, report_ref_id, key):
+        cache_key = (report_ref_id, key)
+        cached = self._cached(cache_key)
+        if cached is not None and time.monotonic() - cached['fetched_at'] < self.ttl:
+            return cached, 'HIT'
+
+        with self._lock:
+            flight = self._inflight.get(cache_key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[cache_key] = {'done': threading.Event()}
+        if not leader:
+            # Same report already being fetched by another thread: share its answer
+            flight['done'].wait()
+            if 'error' in flight:
+                raise flight['error']
+            return flight['result'][0], 'COALESCED'
+
+        try:
+            flight['result'] = self._fetch(report_ref_id, key, cache_key, cached)
+            return flight['result']
+        except Exception as e:
+            flight['error'] = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(cache_key, None)
+            flight['done'].set()
+
+    def _fetch(self, report_ref_id, key, cache_key, cached):
+        headers = {}
+        if cached is not None:
+            if cached['etag']:
+                headers['If-None-Match'] = cached['etag']
+            if cached['last_modified']:
+                headers['If-Modified-Since'] = cached['last_modified']
+        usable_if_error = (cached is not None
+                           and time.monotonic() - cached['fetched_at'] < self.ttl + self.stale_if_error)
+        try:
+            response = self.http.get(self.url(report_ref_id), params={'key': key}, headers=headers)
+        except httpx.TransportError:
+            if usable_if_error:
+                return cached, 'STALE'
+            raise
+        if response.status_code >= 500 and usable_if_error:
+            return cached, 'STALE'
+        now = time.monotonic()
+        if response.status_code == 304 and cached is not None:
+            entry = dict(cached, fetched_at=now)
+            self._store(cache_key, entry)
+            return entry, 'REVALIDATED'
+
+        text = response.text
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+        entry = {
+            'status': response.status_code,
+            'data': data,
+            'text': text,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'fetched_at': now,
+        }
+        if response.status_code == 200 and data is not None:
+            self._store(cache_key, entry)
+        return entry, 'MISS'
@@ -13,10 +13,23 @@ and prints summary tables.
 import fitz  # PyMuPDF
 import re
 import os
+import io
+import json
+import hashlib
+import tempfile
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import pandas as pd
 import numpy as np
 from datetime import datetime
 
+# Bump when extraction or scoring changes: stored results of other versions are discarded
+PARSER_VERSION = 1
+
+# Manifest and stored per-paddock results of the PDFs in a folder, kept in that folder
+RESULT_STORE = ".plant_scores.json"
+
 def smooth_score(deviation, D=50, n=2, cutoff=250):
     """
     Calculate a smooth score from deviation (%).
@@ -29,101 +42,254 @@ def smooth_score(deviation, D=50, n=2, cutoff=250):
     score = 100 / (1 + (x / D)**n)
     return max(min(score, 100), 0)
 
-def extract_reports(pdf_path):
-    doc = fitz.open(pdf_path)
-    text = "\n".join(page.get_text() for page in doc)
-    raw_sections = text.split("PADDOCK:")
+# Nutrients whose ideal is the top of the range rather than its midpoint
+MAX_IDEAL_NUTRIENTS = ["P - Phosphorus", "Ca - Calcium", "Mg - Magnesium", "B - Boron"]
 
-    expected_nutrients = [
-        "N - Nitrogen", "P - Phosphorus", "K - Potassium", "S - Sulphur",
-        "Ca - Calcium", "Mg - Magnesium", "Na - Sodium", "Cu - Copper",
-        "Zn - Zinc", "Mn - Manganese", "Fe - Iron", "B - Boron",
-        "Mo - Molybdenum", "Si - Silicon", "Co - Cobalt"
-    ]
+# Status codes returned by score_nutrients index into this list
+STATUS_LABELS = ["Extremely Deficient", "Deficient", "Good", "Excessive", "Extremely Excessive"]
 
-    reports = []
+def uses_max_ideal(label):
+    return any(x in label for x in MAX_IDEAL_NUTRIENTS)
 
-    for section in raw_sections[1:]:
-        lines = section.splitlines()
+def round_like_python(values, decimals=2):
+    """
+    Element-wise round(value, decimals) on an array.
+    np.round rounds value * 10**decimals, which can land on the other side
+    of a tie from Python's exact rounding; the few values that close to a
+    tie are rounded one by one.
+    """
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, decimals)
+    scaled = values * 10**decimals
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) <= 1e-9 * np.maximum(np.abs(scaled), 1)
+    for i in np.flatnonzero(near_tie):
+        rounded.flat[i] = round(float(values.flat[i]), decimals)
+    return rounded
+
+def score_nutrients(actual, min_vals, max_vals, max_ideal, D=50, n=2, cutoff=250):
+    """
+    Array version of the per-nutrient scoring in extract_reports.
+    actual, min_vals and max_vals are arrays of readings (any number of
+    paddocks laid end to end); max_ideal is a boolean mask of the readings
+    whose ideal is the range max (see uses_max_ideal), the others use the
+    midpoint. Returns a dict of arrays: ideal, deviation_pct, score
+    (unrounded, as smooth_score), cutoff (True where the score was zeroed)
+    and status (codes into STATUS_LABELS). The values are the same floats
+    the scalar code produces.
+    """
+    actual = np.asarray(actual, dtype=float)
+    min_vals = np.asarray(min_vals, dtype=float)
+    max_vals = np.asarray(max_vals, dtype=float)
+    ideal = np.where(max_ideal, max_vals, (min_vals + max_vals) / 2)
+    if (ideal == 0).any():
+        # A zero ideal is a ZeroDivisionError in the scalar code, not an inf/NaN score
+        raise ZeroDivisionError("float division by zero")
+    deviation = (actual - ideal) / ideal
+    x = np.abs(deviation) * 100
+    cut = x >= cutoff
+    # float_power goes through the same pow() as Python's ** (np.power(x, 2) is x * x,
+    # which differs in the last bit for some values)
+    score = np.clip(100 / (1 + np.float_power(x / D, n)), 0, 100)
+    score[cut] = 0
+    deviation_pct = deviation * 100
+    # First matching band wins, as in the if/elif chain; NaN falls through to the last
+    status = np.select(
+        [deviation_pct <= -100, deviation_pct <= -25, deviation_pct < 25, deviation_pct <= 100],
+        [0, 1, 2, 3], default=4)
+    return {"ideal": ideal, "deviation_pct": deviation_pct, "score": score,
+            "cutoff": cut, "status": status}
+
+def general_scores(scores, counts):
+    """
+    Per-paddock general score: the mean of each paddock's (rounded) nutrient
+    scores, rounded to 2 decimals, for scores laid out paddock after paddock
+    with counts[i] readings in paddock i. Matches
+    round(pd.DataFrame(nutrients)["Score"].mean(), 2): NaN scores are left
+    out of both the sum and the count, and a paddock without (non-NaN)
+    readings scores NaN.
+    """
+    scores = np.asarray(scores, dtype=float)
+    counts = np.asarray(counts, dtype=int)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(int)
+    sums = np.full(len(counts), np.nan)
+    valid = np.zeros(len(counts))
+    # Paddocks with the same number of readings are summed as the rows of one
+    # matrix: a row sum adds in the same order as pandas' sum of a column,
+    # np.add.reduceat does not
+    for count in np.unique(counts[counts > 0]):
+        group = np.flatnonzero(counts == count)
+        block = scores[starts[group, None] + np.arange(count)]
+        sums[group] = np.nansum(block, axis=1)
+        valid[group] = (~np.isnan(block)).sum(axis=1)
+    with np.errstate(invalid="ignore"):
+        return np.round(sums / valid, 2)
+
+def score_reports(reports, D=50, n=2, cutoff=250):
+    """
+    (Re-)score paddock reports in one pass over all their readings.
+    Each report is {"paddock": ..., "nutrients": [{"Nutrient", "Actual",
+    "Min", "Max", ...}]}, as returned by extract_reports; returns new reports
+    with Ideal, Deviation (%), Score and Status computed.
+    """
+    rows = [row for report in reports for row in report["nutrients"]]
+    result = score_nutrients(
+        [row["Actual"] for row in rows], [row["Min"] for row in rows], [row["Max"] for row in rows],
+        np.array([uses_max_ideal(row["Nutrient"]) for row in rows], dtype=bool),
+        D=D, n=n, cutoff=cutoff)
+    ideals = result["ideal"].tolist()
+    deviations = round_like_python(result["deviation_pct"]).tolist()
+    scores = round_like_python(result["score"]).tolist()
+    # A zeroed score is the int 0, as smooth_score returns it
+    scores = [0 if cut else score for score, cut in zip(scores, result["cutoff"].tolist())]
+    statuses = [STATUS_LABELS[code] for code in result["status"].tolist()]
+
+    scored = []
+    i = 0
+    for report in reports:
+        nutrients = []
+        for row in report["nutrients"]:
+            nutrients.append({
+                "Nutrient": row["Nutrient"],
+                "Actual": row["Actual"],
+                "Min": row["Min"],
+                "Max": row["Max"],
+                "Ideal": ideals[i],
+                "Deviation (%)": deviations[i],
+                "Score": scores[i],
+                "Status": statuses[i]
+            })
+            i += 1
+        scored.append(dict(report, nutrients=nutrients))
+    return scored
+
+def report_general_scores(reports):
+    """General score of each report, from its nutrients' rounded scores."""
+    return general_scores([row["Score"] for report in reports for row in report["nutrients"]],
+                          [len(report["nutrients"]) for report in reports])
+
+EXPECTED_NUTRIENTS = [
+    "N - Nitrogen", "P - Phosphorus", "K - Potassium", "S - Sulphur",
+    "Ca - Calcium", "Mg - Magnesium", "Na - Sodium", "Cu - Copper",
+    "Zn - Zinc", "Mn - Manganese", "Fe - Iron", "B - Boron",
+    "Mo - Molybdenum", "Si - Silicon", "Co - Cobalt"
+]
+
+# The ideal ranges of a paddock follow this heading (up to its next occurrence)
+RANGE_MARKER = "Plant TherapyTM"
+
+# Line token kinds produced by tokenize_section
+LABEL, VALUE, RANGE, NA, OTHER = "label", "value", "range", "n/a", "other"
+
+NUTRIENT_LABEL = re.compile("|".join(re.escape(label) for label in EXPECTED_NUTRIENTS))
+# Exactly the strings float() accepts (Python's float literal grammar, inf and nan)
+_DIGITS = r"\d(?:_?\d)*"
+_FLOAT = (rf"[+-]?(?:(?:(?:{_DIGITS})?\.{_DIGITS}|{_DIGITS}\.?)(?:[eE][+-]?{_DIGITS})?"
+          r"|(?i:inf(?:inity)?|nan))")
+# A stripped line that is a number on its own, or that starts with a "min - max" range
+LINE_TOKEN = re.compile(rf"(?P<value>{_FLOAT})\Z|(?P<min>\d+\.?\d*)\s*-\s*(?P<max>\d+\.?\d*)")
+# Cheap pre-checks that skip the regexes for most lines: numbers and ranges start with
+# one of these or a digit, and every label contains " - "
+_NUMBER_START = frozenset("+-.iInN")
+_LABEL_PART = " - "
+
+def tokenize_section(section):
+    """
+    Tag every line of one PADDOCK section in a single pass, as a list of
+    (kind, value) tokens: LABEL (value: the line), VALUE (the float), RANGE
+    ((min, max), only inside the range block), NA (an N/A line of the range
+    block) or OTHER. A nutrient label inside the range block can yield a
+    RANGE token too; the lines holding RANGE_MARKER are tagged by their text
+    inside the block.
+    """
+    lines = section.splitlines()
+    # The range block runs from the first RANGE_MARKER to the next one (or the end)
+    first = last = len(lines)
+    for i, raw in enumerate(lines):
+        if RANGE_MARKER in raw:
+            first = i
+            break
+    if first < len(lines):
+        last = len(lines) - 1
+        for i in range(first, len(lines)):
+            text = lines[i].split(RANGE_MARKER, 1)[1] if i == first else lines[i]
+            if RANGE_MARKER in text:
+                last = i
+                break
+
+    tokens = []
+    for i, raw in enumerate(lines):
+        line = raw.strip()
+        head = line[:1]
+        match = LINE_TOKEN.match(line) if head in _NUMBER_START or head.isdecimal() else None
+        if _LABEL_PART in line and NUTRIENT_LABEL.search(line):
+            tokens.append((LABEL, line))
+            tagged = True
+        elif match is not None and match.lastgroup == "value":
+            tokens.append((VALUE, float(line)))
+            continue
+        else:
+            tagged = False
+
+        if first <= i <= last:
+            # Only the part of the marker lines inside the block counts
+            if i == first:
+                raw = raw.split(RANGE_MARKER, 1)[1]
+            if i == last and RANGE_MARKER in raw:
+                raw = raw.split(RANGE_MARKER, 1)[0]
+            if i == first or i == last:
+                line = raw.strip()
+                head = line[:1]
+                match = LINE_TOKEN.match(line) if head in _NUMBER_START or head.isdecimal() else None
+            if "N/A" in line:
+                tokens.append((NA, None))
+                continue
+            if match is not None and match.lastgroup == "max":
+                tokens.append((RANGE, (float(match.group("min")), float(match.group("max")))))
+                continue
+        if not tagged:
+            tokens.append((OTHER, None))
+    return tokens
 
-        paddock = next((line.strip() for line in lines if line.strip()), "Unknown")
+def parse_reports(text):
+    """
+    Paddock reports (nutrient readings with their ideal ranges, not yet
+    scored) from the text of a Plant Therapy report.
+    """
+    reports = []
+
+    for section in text.split("PADDOCK:")[1:]:
+        paddock = next((line.strip() for line in section.splitlines() if line.strip()), "Unknown")
         paddock = paddock.replace("\u201c", "\"").replace("\u201d", "\"").replace("\u2013", "-")
 
+        tokens = tokenize_section(section)
+
+        # Each label takes the next value; labels seen while one is waiting are dropped
         actual_values = []
-        i = 0
-        while i < len(lines):
-            line = lines[i].strip()
-            if any(n in line for n in expected_nutrients):
-                nutrient = line
-                j = i + 1
-                while j < len(lines):
-                    val_line = lines[j].strip()
-                    try:
-                        value = float(val_line)
-                        actual_values.append((nutrient, value))
-                        break
-                    except ValueError:
-                        j += 1
-                i = j
-            else:
-                i += 1
+        label = None
+        for kind, value in tokens:
+            if kind == LABEL:
+                if label is None:
+                    label = value
+            elif kind == VALUE and label is not None:
+                actual_values.append((label, value))
+                label = None
 
         actual_values = actual_values[:15]
 
-        if "Plant TherapyTM" not in section:
+        if RANGE_MARKER not in section:
             print(f"⚠️ Skipping paddock '{paddock}' – no ideal range block.")
             continue
 
-        range_block = section.split("Plant TherapyTM")[1]
-        range_lines = range_block.splitlines()
-        range_values = []
-        for line in range_lines:
-            line = line.strip()
-            if "N/A" in line:
-                continue
-            match = re.match(r"(\d+\.?\d*)\s*-\s*(\d+\.?\d*)", line)
-            if match:
-                range_values.append((float(match.group(1)), float(match.group(2))))
+        range_values = [value for kind, value in tokens if kind == RANGE]
 
         if len(range_values) == 0:
             print(f"⚠️ Skipping paddock '{paddock}' – no usable ranges found.")
             continue
 
-        nutrients = []
-        for (label, actual), (min_val, max_val) in zip(actual_values[:len(range_values)], range_values):
-            # Adjust ideal: use max for P, Ca, Mg, B; else average
-            if any(x in label for x in ["P - Phosphorus", "Ca - Calcium", "Mg - Magnesium", "B - Boron"]):
-                ideal = max_val
-            else:
-                ideal = (min_val + max_val) / 2
-
-            deviation = (actual - ideal) / ideal
-            score = smooth_score(deviation)
-            deviation_pct = deviation * 100
-
-            # Classify status
-            if deviation_pct <= -100:
-                status = "Extremely Deficient"
-            elif -100 < deviation_pct <= -25:
-                status = "Deficient"
-            elif -25 < deviation_pct < 25:
-                status = "Good"
-            elif 25 <= deviation_pct <= 100:
-                status = "Excessive"
-            else:
-                status = "Extremely Excessive"
-
-
-            nutrients.append({
-                "Nutrient": label,
-                "Actual": actual,
-                "Min": min_val,
-                "Max": max_val,
-                "Ideal": ideal,
-                "Deviation (%)": round(deviation_pct, 2),
-                "Score": round(score, 2),
-                "Status": status
-            })
+        nutrients = [
+            {"Nutrient": label, "Actual": actual, "Min": min_val, "Max": max_val}
+            for (label, actual), (min_val, max_val) in zip(actual_values[:len(range_values)], range_values)
+        ]
 
         reports.append({
             "paddock": paddock,
@@ -132,12 +298,15 @@ def extract_reports(pdf_path):
 
     return reports
 
+def extract_reports(pdf_path):
+    doc = fitz.open(pdf_path)
+    text = "\n".join(page.get_text() for page in doc)
+    return score_reports(parse_reports(text))
+
 def print_summary_score_table(all_reports):
     paddock_scores = []
 
-    for report in all_reports:
-        df = pd.DataFrame(report["nutrients"])
-        score = round(df["Score"].mean(), 2)
+    for report, score in zip(all_reports, report_general_scores(all_reports)):
         filename = report.get("source_file", "N/A")
         paddock_scores.append((report["paddock"], score, filename))
 
@@ -151,42 +320,188 @@ def print_summary_score_table(all_reports):
     summary_df = pd.DataFrame(sorted_scores, columns=["Paddock", "General Score", "Source File"])
     return summary_df
 
-def process_all_pdfs(folder_path):
-    all_data = []
+def render_reports(reports):
+    """The paddock tables and general scores process_all_pdfs prints for one file."""
+    out = io.StringIO()
+    for report, general_score in zip(reports, report_general_scores(reports)):
+        df = pd.DataFrame(report["nutrients"])
+        print(f"📍 Paddock: {report['paddock']}", file=out)
+        print(df.to_string(index=False), file=out)
+        print(f"🌿 General Nutritional Score: {general_score}/100\n", file=out)
+    return out.getvalue()
+
+def extract_file(pdf_path):
+    """
+    extract_reports for one file with its printed warnings captured and its
+    tables rendered, so files processed in worker processes can be reported
+    in order. Returns (reports, output text, error message or None).
+    """
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            reports = extract_reports(pdf_path)
+    except Exception as e:
+        return [], log.getvalue(), f"{type(e).__name__}: {e}"
+    return reports, log.getvalue() + render_reports(reports), None
+
+def extract_file_isolated(pdf_path):
+    """
+    extract_file in a fresh single-worker process, for a file whose pool
+    broke: a crash of that process (PyMuPDF segfault, OOM kill) is reported
+    as the file's error instead of ending the run.
+    """
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        try:
+            return pool.submit(extract_file, pdf_path).result()
+        except BrokenProcessPool:
+            return [], "", "worker process died (crash or out of memory)"
+
+def collect_extraction(future, pdf_path):
+    # A dead worker breaks the whole pool: every unfinished file is re-run on its own
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        return extract_file_isolated(pdf_path)
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_result_store(folder_path):
+    """
+    Stored results of the folder's PDFs: {filename: {"size", "mtime_ns",
+    "sha256", "reports", "output"}}. Empty when there is no store, it cannot be
+    read or it was written by another PARSER_VERSION.
+    """
+    try:
+        with open(os.path.join(folder_path, RESULT_STORE), encoding="utf-8") as f:
+            store = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(store, dict) or store.get("parser_version") != PARSER_VERSION:
+        return {}
+    return store.get("files", {})
+
+def save_result_store(folder_path, files):
+    # Written to a temporary file and renamed, so an interrupted run leaves the old store intact
+    fd, tmp_path = tempfile.mkstemp(dir=folder_path, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            # dumps, not dump: json.dump streams through the much slower pure Python encoder
+            f.write(json.dumps({"parser_version": PARSER_VERSION, "files": files}))
+        os.replace(tmp_path, os.path.join(folder_path, RESULT_STORE))
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+
+def stored_result(entry, pdf_path, stat):
+    """
+    The stored entry of an unchanged file, else None. Size and mtime are
+    trusted when both match; otherwise the content hash decides (the file
+    was copied or touched but not changed).
+    """
+    if entry is None or entry["size"] != stat.st_size:
+        return None
+    if entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry
+    if entry["sha256"] == file_sha256(pdf_path):
+        return dict(entry, mtime_ns=stat.st_mtime_ns)
+    return None
+
+def process_all_pdfs(folder_path, workers=1, incremental=True):
+    """
+    Score every PDF in the folder. With workers > 1 the files are extracted
+    in a pool of that many processes; output and summary are the same as a
+    serial run (files in name order, paddocks in report order). A file that
+    fails to extract, or whose worker process dies, is reported and skipped.
+    With incremental set, files unchanged since the last run are not
+    re-opened: their results come from RESULT_STORE in the folder, which is
+    updated at the end of the run.
+    """
     all_reports = []
+    failures = []
 
-    pdf_files = [f for f in os.listdir(folder_path) if f.lower().endswith(".pdf")]
+    pdf_files = sorted(f for f in os.listdir(folder_path) if f.lower().endswith(".pdf"))
     if not pdf_files:
         print("❌ No PDF files found in the folder.")
         return
 
     print(f"📁 Found {len(pdf_files)} PDF(s) to process.")
-
-    for filename in pdf_files:
-        pdf_path = os.path.join(folder_path, filename)
-        print(f"\n📄 Processing: {filename}")
-        reports = extract_reports(pdf_path)
-
-        for report in reports:
-            df = pd.DataFrame(report["nutrients"])
-            general_score = round(df["Score"].mean(), 2)
-
-            print(f"📍 Paddock: {report['paddock']}")
-            print(df.to_string(index=False))
-            print(f"🌿 General Nutritional Score: {general_score}/100\n")
-
-            df.insert(0, "Paddock", report["paddock"])
-            df["General Score"] = general_score
-            all_data.append(df)
-
-            report["source_file"] = filename
-            all_reports.append(report)
-
-    if all_data:
+    pdf_paths = [os.path.join(folder_path, filename) for filename in pdf_files]
+
+    store = load_result_store(folder_path) if incremental else {}
+    new_store = {}
+    manifest = {}
+    to_extract = []
+    for filename, pdf_path in zip(pdf_files, pdf_paths):
+        stat = os.stat(pdf_path)
+        entry = stored_result(store.get(filename), pdf_path, stat)
+        if entry is not None:
+            new_store[filename] = entry
+            continue
+        to_extract.append(pdf_path)
+        if incremental:
+            # Taken before extraction: a file changed meanwhile is extracted again next run
+            manifest[filename] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+                                  "sha256": file_sha256(pdf_path)}
+    if incremental:
+        print(f"♻️ Reusing stored results for {len(new_store)} file(s), extracting {len(to_extract)}.")
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 and len(to_extract) > 1 else None
+    try:
+        if pool is not None:
+            # Submit everything up front, collect in file order
+            futures = [pool.submit(extract_file, pdf_path) for pdf_path in to_extract]
+            extracted = (collect_extraction(future, pdf_path) for future, pdf_path in zip(futures, to_extract))
+        else:
+            extracted = map(extract_file, to_extract)
+
+        def results():
+            for filename, pdf_path in zip(pdf_files, pdf_paths):
+                entry = new_store.get(filename)
+                if entry is not None:
+                    yield entry["reports"], entry["output"], None
+                    continue
+                reports, output, error = next(extracted)
+                if incremental and not error:
+                    new_store[filename] = dict(manifest[filename], reports=reports, output=output)
+                yield reports, output, error
+
+        for filename, (reports, output, error) in zip(pdf_files, results()):
+            print(f"\n📄 Processing: {filename}")
+            print(output, end="")
+            if error:
+                print(f"❌ Failed to process {filename}: {error}")
+                failures.append((filename, error))
+                continue
+            all_reports.extend(dict(report, source_file=filename) for report in reports)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    # Entries of unchanged files are the stored objects themselves
+    changed = new_store.keys() != store.keys() or any(
+        entry is not store.get(filename) for filename, entry in new_store.items())
+    if incremental and changed:
+        try:
+            save_result_store(folder_path, new_store)
+        except OSError as e:
+            print(f"⚠️ Could not save {RESULT_STORE}: {e}")
+
+    if all_reports:
         summary_df = print_summary_score_table(all_reports)
     else:
         print("❌ No valid data extracted.")
 
+    if failures:
+        print(f"\n⚠️ {len(failures)} file(s) could not be processed:")
+        for filename, error in failures:
+            print(f"   {filename}: {error}")
+
 if __name__ == "__main__":
     folder_path = r"C:\Users\Franz Hentze\Desktop\NTS\NTS Digital\Crop Nutrition\NTS G.R.O.W Nutritional Score\NTS Plant Nutritional Score"
-    process_all_pdfs(folder_path)
+    process_all_pdfs(folder_path, workers=os.cpu_count() or 1)
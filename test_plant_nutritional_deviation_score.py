@@ -0,0 +1,56 @@
+import glob
+import math
+import multiprocessing
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import plant_nutritional_deviation_score_2 as pnds
+from plant_nutritional_deviation_score_2 import general_scores, score_nutrients
+
+
+def test_general_scores_skip_nan_like_pandas_mean():
+    paddocks = [[80.5, float("nan"), 60.25], [float("nan"), float("nan")], [], [99.99, 12.3]]
+    scores = [score for paddock in paddocks for score in paddock]
+    result = general_scores(scores, [len(paddock) for paddock in paddocks])
+
+    for paddock, score in zip(paddocks, result):
+        expected = round(pd.DataFrame({"Score": paddock}, dtype=float)["Score"].mean(), 2)
+        if math.isnan(expected):
+            assert np.isnan(score)
+        else:
+            assert score == expected
+    assert result[0] == 70.38
+
+
+def test_zero_ideal_raises_zero_division_error():
+    with pytest.raises(ZeroDivisionError):
+        score_nutrients([0.5, 1.0], [0.0, 1.0], [0.0, 3.0], np.array([False, False]))
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != "fork",
+                    reason="the crashing extract_reports is patched in before the workers fork")
+def test_dead_worker_is_reported_without_aborting_the_run(tmp_path, monkeypatch, capsys):
+    sample = glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), "Plant Therapy _*.pdf"))[0]
+    for name in ("a.pdf", "c.pdf"):
+        shutil.copy(sample, tmp_path / name)
+    (tmp_path / "b.pdf").write_bytes(b"%PDF-1.4 crashes the worker")
+
+    original = pnds.extract_reports
+
+    def extract_or_crash(pdf_path):
+        if pdf_path.endswith("b.pdf"):
+            os._exit(1)  # as a PyMuPDF segfault or an OOM kill would
+        return original(pdf_path)
+
+    monkeypatch.setattr(pnds, "extract_reports", extract_or_crash)
+    pnds.process_all_pdfs(str(tmp_path), workers=2)
+
+    out = capsys.readouterr().out
+    assert "Failed to process b.pdf: worker process died" in out
+    assert "Summary Table" in out
+    stored = pnds.load_result_store(str(tmp_path))
+    assert sorted(stored) == ["a.pdf", "c.pdf"]